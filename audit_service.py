@@ -0,0 +1,527 @@
+"""
+Long-running audit scoring service
+
+Keeps one warm EnterpriseExpenseAuditSystem (agents, models and memory) and
+serves it over a small asyncio HTTP/JSON server built on the standard library:
+
+    POST /score    one expense, a list of expenses, {"expenses": [...]}
+                   or {"receipts": ["raw receipt text", ...]}
+    GET  /health   liveness check
+    GET  /metrics  request counts and latency percentiles
+
+Run ``python audit_service.py --port 8080`` to serve, or
+``python audit_service.py --benchmark`` to measure p50/p99 latency locally.
+``--max-batch``/``--max-wait-ms`` enable micro-batching of concurrent requests.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from main import EnterpriseExpenseAuditSystem
+
+# Latency targets for single-expense /score requests on a warm service
+LATENCY_TARGET_MS = {'p50': 25.0, 'p99': 100.0}
+
+MAX_BODY_BYTES = 10 * 1024 * 1024
+
+HTTP_STATUS = {
+    200: 'OK',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    413: 'Payload Too Large',
+    500: 'Internal Server Error'
+}
+
+
+class BadRequest(ValueError):
+    """Raised for payloads the service cannot score"""
+
+
+class LatencyTracker:
+    """Rolling window of request latencies"""
+
+    def __init__(self, window=10000):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+
+    def record(self, seconds):
+        self.samples.append(seconds * 1000.0)
+        self.count += 1
+
+    def percentiles(self):
+        if not self.samples:
+            return {'p50': 0.0, 'p90': 0.0, 'p99': 0.0, 'max': 0.0}
+        values = np.fromiter(self.samples, dtype=float)
+        p50, p90, p99 = np.percentile(values, [50, 90, 99])
+        return {'p50': float(p50), 'p90': float(p90), 'p99': float(p99), 'max': float(values.max())}
+
+
+def to_native(value):
+    """Convert numpy/pandas scalars into JSON-serializable Python values"""
+    if isinstance(value, dict):
+        return {k: to_native(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_native(v) for v in value]
+    if isinstance(value, np.ndarray):
+        return [to_native(v) for v in value.tolist()]
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent scoring requests into shared batches
+
+    Requests queue up until ``max_batch_size`` expenses are waiting or the
+    oldest request has waited ``max_wait_ms``; the whole batch then runs
+    through ``process_batch`` once and results are fanned back to each
+    caller's future. Larger batches raise throughput at the cost of latency.
+    Batch-level checks (duplicates, repeated amounts) see every expense in
+    the coalesced batch, not just the caller's own. When a coalesced batch
+    raises, each request is re-run on its own, so only the request that
+    fails gets the error.
+    """
+
+    def __init__(self, process_batch, executor, max_batch_size=32, max_wait_ms=5.0):
+        self.process_batch = process_batch
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.queue = None
+        self.worker = None
+        self.batches_run = 0
+        self.items_batched = 0
+        self.errors = 0  # failed process_batch calls, coalesced or isolated
+        self._in_flight = []  # requests taken off the queue and not yet answered
+
+    def start(self):
+        if self.worker is None:
+            self.queue = asyncio.Queue()
+            self.worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Stop the worker; requests still queued or in flight fail instead of waiting forever"""
+        if self.worker is not None:
+            self.worker.cancel()
+            try:
+                await self.worker
+            except asyncio.CancelledError:
+                pass
+            self.worker = None
+        pending = self._in_flight
+        while self.queue is not None and not self.queue.empty():
+            pending.append(self.queue.get_nowait())
+        self._fail(pending, RuntimeError('Micro-batcher stopped'))
+        self._in_flight = []
+
+    async def submit(self, items):
+        """Queue ``items`` for the next batch and wait for their results"""
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((items, future))
+        return await future
+
+    async def _collect(self):
+        pending = self._in_flight = [await self.queue.get()]
+        size = len(pending[0][0])
+        deadline = time.perf_counter() + self.max_wait
+        while size < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                entry = await asyncio.wait_for(self.queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            pending.append(entry)
+            size += len(entry[0])
+        # Anything that arrived meanwhile joins without further waiting
+        while size < self.max_batch_size and not self.queue.empty():
+            entry = self.queue.get_nowait()
+            pending.append(entry)
+            size += len(entry[0])
+        return pending
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            pending = await self._collect()
+            batch = [item for items, _ in pending for item in items]
+            try:
+                results = await loop.run_in_executor(self.executor, self.process_batch, batch)
+            except Exception as e:
+                self.errors += 1
+                if len(pending) == 1:
+                    self._fail(pending, e)
+                else:
+                    await self._run_isolated(loop, pending)
+                self._in_flight = []
+                continue
+
+            self.batches_run += 1
+            self.items_batched += len(batch)
+            offset = 0
+            for items, future in pending:
+                if not future.done():
+                    future.set_result(results[offset:offset + len(items)])
+                offset += len(items)
+            self._in_flight = []
+
+    async def _run_isolated(self, loop, pending):
+        """Re-run each request of a failed batch alone so one bad request does not fail the others"""
+        for items, future in pending:
+            try:
+                results = await loop.run_in_executor(self.executor, self.process_batch, items)
+            except Exception as e:
+                self.errors += 1
+                self._fail([(items, future)], e)
+                continue
+            self.batches_run += 1
+            self.items_batched += len(items)
+            if not future.done():
+                future.set_result(results)
+
+    @staticmethod
+    def _fail(pending, error):
+        for _, future in pending:
+            if not future.done():
+                future.set_exception(error)
+
+    def stats(self):
+        return {
+            'batches_run': self.batches_run,
+            'errors': self.errors,
+            'average_batch_size': self.items_batched / self.batches_run if self.batches_run else 0.0,
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000.0
+        }
+
+
+class AuditService:
+    """Scores expenses against a warm audit system"""
+
+    def __init__(self, audit_system=None, max_batch_size=1, max_wait_ms=0.0):
+        self._owns_system = audit_system is None
+        self.system = audit_system or EnterpriseExpenseAuditSystem()
+        # Agents are not thread-safe: all scoring runs on one worker thread
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='audit-score')
+        self.batcher = None
+        if max_batch_size > 1:
+            self.batcher = MicroBatcher(self.score, self.executor, max_batch_size, max_wait_ms)
+        self.latency = LatencyTracker()
+        self.expenses_scored = 0
+        self.errors = 0
+        self._ids = itertools.count(1)
+
+    def normalize_payload(self, payload):
+        """Turn a request body into structured expenses"""
+        if isinstance(payload, dict) and 'receipts' in payload:
+            receipts = payload['receipts']
+            if not isinstance(receipts, list) or not all(isinstance(r, str) for r in receipts):
+                raise BadRequest("'receipts' must be a list of strings")
+            if not receipts:
+                raise BadRequest("No receipts to score")
+            # One extraction pass for the request; its positional ids restart at
+            # EXP000000 for every call, so each expense gets a service-wide id
+            expenses = self.system.agents['field_extraction'].process_raw_receipts(receipts)
+            for expense in expenses:
+                expense['id'] = f'REQ{next(self._ids):08d}'
+            return expenses
+
+        if isinstance(payload, dict) and 'expenses' in payload:
+            payload = payload['expenses']
+        expenses = payload if isinstance(payload, list) else [payload]
+        if not expenses:
+            raise BadRequest("No expenses to score")
+        return [self._normalize_expense(expense) for expense in expenses]
+
+    def _normalize_expense(self, expense):
+        if not isinstance(expense, dict):
+            raise BadRequest("Each expense must be a JSON object")
+        expense = dict(expense)
+        expense.setdefault('id', f'REQ{next(self._ids):08d}')
+        expense.setdefault('employee_id', 'UNKNOWN')
+        expense.setdefault('category', 'Other')
+        expense.setdefault('date', '')
+        expense['merchant'] = expense.get('merchant') or expense.get('vendor') or ''
+        try:
+            expense['amount'] = float(expense.get('amount', 0) or 0)
+        except (TypeError, ValueError):
+            raise BadRequest(f"Invalid amount for expense {expense['id']}: {expense.get('amount')!r}")
+        return expense
+
+    def score(self, expenses):
+        """Run the scoring stages and build one response record per expense"""
+        # Rows are joined back by id, and coalesced requests may reuse the same
+        # client ids, so the batch runs on internal keys (the caller's ids are
+        # restored in the response)
+        keys = [f'ROW{i:06d}' for i in range(len(expenses))]
+        results = self.system.score_expenses([dict(expense, id=key) for expense, key in zip(expenses, keys)])
+        policy = results['policy_validation']
+        fraud = results['rule_based_fraud']
+        summaries = results['summary_results']
+
+        id_column = 'expense_id' if 'expense_id' in policy.columns else 'id'
+        policy_by_id = dict(zip(policy[id_column], policy['violations']))
+        fraud_by_id = {row['expense_id']: row for row in fraud.to_dict('records')}
+        summary_by_id = {row['expense_id']: row for row in summaries.to_dict('records')} if not summaries.empty else {}
+
+        scored = []
+        for expense, key in zip(expenses, keys):
+            fraud_row = fraud_by_id.get(key, {})
+            summary_row = summary_by_id.get(key, {})
+            scored.append(to_native({
+                'expense_id': expense['id'],
+                'employee_id': expense['employee_id'],
+                'fraud_decision': fraud_row.get('fraud_decision'),
+                'fraud_score': fraud_row.get('fraud_score'),
+                'fraud_reasons': fraud_row.get('fraud_reasons', []),
+                'is_duplicate': fraud_row.get('is_duplicate', False),
+                'policy_violations': list(policy_by_id.get(key, [])),
+                'summary': {
+                    'summary_text': summary_row.get('summary_text'),
+                    'confidence_score': summary_row.get('confidence_score'),
+                    'recommendation': summary_row.get('recommendation'),
+                    'explanation_points': summary_row.get('explanation_points', [])
+                }
+            }))
+        self.expenses_scored += len(scored)
+        return scored
+
+    async def handle_score(self, body):
+        try:
+            payload = json.loads(body or b'null')
+        except json.JSONDecodeError as e:
+            raise BadRequest(f"Invalid JSON: {e}")
+        loop = asyncio.get_running_loop()
+        expenses = await loop.run_in_executor(self.executor, self.normalize_payload, payload)
+        if self.batcher is not None:
+            return {'results': await self.batcher.submit(expenses)}
+        return {'results': await loop.run_in_executor(self.executor, self.score, expenses)}
+
+    def metrics(self):
+        return {
+            'requests': self.latency.count,
+            'expenses_scored': self.expenses_scored,
+            'errors': self.errors,
+            'latency_ms': self.latency.percentiles(),
+            'latency_target_ms': LATENCY_TARGET_MS,
+            'batching': self.batcher.stats() if self.batcher is not None else None
+        }
+
+    async def dispatch(self, method, path, body):
+        if path == '/score':
+            if method != 'POST':
+                return 405, {'error': 'Use POST /score'}
+            return 200, await self.handle_score(body)
+        if path == '/health':
+            return 200, {'status': 'ok'}
+        if path == '/metrics':
+            return 200, self.metrics()
+        return 404, {'error': f'Unknown path {path}'}
+
+    async def handle_connection(self, reader, writer):
+        """Serve HTTP/1.1 requests on one connection, honouring keep-alive"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, path, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    await self._respond(writer, 400, {'error': 'Malformed request line'}, False)
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+                try:
+                    length = int(headers.get('content-length', 0) or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    # The body cannot be framed, so the connection cannot be reused
+                    await self._respond(writer, 400, {'error': 'Invalid Content-Length'}, False)
+                    break
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, 413, {'error': 'Request body too large'}, False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+
+                started = time.perf_counter()
+                try:
+                    status, response = await self.dispatch(method, path.split('?')[0], body)
+                except BadRequest as e:
+                    status, response = 400, {'error': str(e)}
+                except Exception as e:
+                    self.errors += 1
+                    status, response = 500, {'error': f'Scoring failed: {e}'}
+                if path.startswith('/score'):
+                    self.latency.record(time.perf_counter() - started)
+
+                await self._respond(writer, status, response, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, writer, status, payload, keep_alive):
+        body = json.dumps(payload, default=str).encode('utf-8')
+        head = (
+            f"HTTP/1.1 {status} {HTTP_STATUS.get(status, 'OK')}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode('latin-1') + body)
+        await writer.drain()
+
+    async def start(self, host='127.0.0.1', port=8080):
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+    def close(self):
+        """Stop the scoring thread, and the audit system's workers when the service created it"""
+        self.executor.shutdown(wait=True)
+        if self._owns_system:
+            self.system.close()
+
+
+def sample_expense(rng, index):
+    """Synthetic expense used by the latency benchmark"""
+    vendors = ['Uber', 'Zomato', 'Amazon', 'Marriott', 'Starbucks', 'Mobile Recharge Store']
+    categories = ['Travel', 'Meals', 'Shopping', 'Accommodation', 'Meals', 'Personal']
+    choice = rng.randrange(len(vendors))
+    return {
+        'id': f'BENCH{index:08d}',
+        'employee_id': f'E{rng.randint(1, 50):03d}',
+        'amount': round(rng.uniform(50, 2500), 2),
+        'category': categories[choice],
+        'date': f'{rng.randint(1, 28)} Jan 2025',
+        'merchant': vendors[choice],
+        'location': 'Mumbai',
+        'description': f'Expense at {vendors[choice]}'
+    }
+
+
+async def _client(host, port, payloads, latencies):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for payload in payloads:
+            body = json.dumps(payload).encode('utf-8')
+            started = time.perf_counter()
+            writer.write(
+                f"POST /score HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n\r\n".encode('latin-1') + body
+            )
+            await writer.drain()
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b''):
+                    break
+                if line.lower().startswith(b'content-length:'):
+                    length = int(line.split(b':')[1])
+            await reader.readexactly(length)
+            latencies.append((time.perf_counter() - started) * 1000.0)
+    finally:
+        writer.close()
+
+
+async def run_benchmark(requests=500, concurrency=4, batch_size=1, warmup=20, port=0,
+                        max_batch_size=1, max_wait_ms=0.0):
+    """Start the service in-process and measure client-observed latency"""
+    service = AuditService(max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
+    server = await service.start('127.0.0.1', port)
+    port = server.sockets[0].getsockname()[1]
+    rng = random.Random(42)
+
+    def payload(i):
+        if batch_size == 1:
+            return sample_expense(rng, i)
+        return [sample_expense(rng, i * batch_size + j) for j in range(batch_size)]
+
+    async with server:
+        await _client('127.0.0.1', port, [payload(i) for i in range(warmup)], [])
+        per_client = [[payload(i) for i in range(c, requests, concurrency)] for c in range(concurrency)]
+        latencies = []
+        started = time.perf_counter()
+        await asyncio.gather(*(_client('127.0.0.1', port, p, latencies) for p in per_client))
+        elapsed = time.perf_counter() - started
+        if service.batcher is not None:
+            await service.batcher.stop()
+    service.close()
+
+    p50, p99 = np.percentile(latencies, [50, 99])
+    print(f"\n⏱️  /score benchmark: {requests} requests, concurrency {concurrency}, batch size {batch_size}")
+    if service.batcher is not None:
+        batching = service.batcher.stats()
+        print(f"   Coalescing: max {max_batch_size} items / {max_wait_ms:.1f} ms, "
+              f"average batch {batching['average_batch_size']:.1f}")
+    print(f"   Throughput: {requests * batch_size / elapsed:.0f} expenses/sec")
+    for name, value in (('p50', p50), ('p99', p99)):
+        target = LATENCY_TARGET_MS[name]
+        status = '✅' if value <= target else '❌'
+        print(f"   {status} {name}: {value:.2f} ms (target {target:.0f} ms)")
+    return {'p50': float(p50), 'p99': float(p99), 'elapsed': elapsed}
+
+
+async def serve(host, port, max_batch_size=1, max_wait_ms=0.0):
+    service = AuditService(max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
+    server = await service.start(host, port)
+    print(f"🚀 Audit scoring service listening on http://{host}:{port}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Expense audit scoring service')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--benchmark', action='store_true', help='Measure /score latency and exit')
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--batch-size', type=int, default=1, help='Expenses per benchmark request')
+    parser.add_argument('--max-batch', type=int, default=1,
+                        help='Coalesce concurrent requests into batches of up to this many expenses')
+    parser.add_argument('--max-wait-ms', type=float, default=2.0,
+                        help='Longest a request waits for a batch to fill')
+    args = parser.parse_args()
+
+    if args.benchmark:
+        result = asyncio.run(run_benchmark(
+            args.requests, args.concurrency, args.batch_size,
+            max_batch_size=args.max_batch, max_wait_ms=args.max_wait_ms
+        ))
+        met = all(result[name] <= target for name, target in LATENCY_TARGET_MS.items())
+        sys.exit(0 if met or args.batch_size > 1 else 1)
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.max_batch, args.max_wait_ms))
+    except KeyboardInterrupt:
+        print("\n👋 Service stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,349 @@
+"""
+Multi-node batch audits over a file-based work queue
+
+The only thing nodes share is a directory (NFS, SMB or a local path). The
+coordinator splits the input into partitions keyed by employee and writes
+one task file per partition; workers on any machine claim tasks with an
+atomic rename, run ``EnterpriseExpenseAuditSystem.process_expenses`` on
+them and write partial results; the merge step puts the partials back
+together in input order and combines the audit and compliance reports.
+
+    python batch_queue.py coordinate --input expenses.json --queue /shared/q3_audit --partitions 32
+    python batch_queue.py work --queue /shared/q3_audit          # on every node
+    python batch_queue.py merge --queue /shared/q3_audit --output reports/q3_audit
+
+Queue layout::
+
+    manifest.json             job id, partition count, task ids
+    pending/<task>.json       tasks nobody has claimed
+    claimed/<task>~<worker>~<claimed at>.json
+    done/<task>.json          finished tasks
+    results/<task>.json       partial results
+
+A claim whose worker has not finished within the lease goes back to
+pending, so a crashed node only delays its tasks. Results are written
+atomically and are idempotent per task, so a late duplicate finish is
+harmless. Duplicate checks only see the expenses of their own partition,
+so duplicates filed by different employees are not caught across nodes.
+"""
+import argparse
+import json
+import os
+import re
+import socket
+import sys
+import time
+import uuid
+import zlib
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+from src.reporting import ReportAggregate
+
+QUEUE_DIRS = ('pending', 'claimed', 'done', 'results')
+RESULT_FRAMES = ('policy_validation', 'fraud_detection', 'rule_based_fraud', 'summary_results')
+DEFAULT_LEASE_SECONDS = 3600
+
+
+def _json_default(value):
+    """NumPy scalars (e.g. counts from ``.sum()``) as native numbers, anything else as a string"""
+    return value.item() if hasattr(value, 'item') else str(value)
+
+
+def _atomic_write(path: str, data):
+    """Write JSON to a temporary file in the same directory, then rename over ``path``"""
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, default=_json_default)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path: str):
+    with open(path) as f:
+        return json.load(f)
+
+
+class WorkQueue:
+    def __init__(self, root: str, lease_seconds: float = DEFAULT_LEASE_SECONDS):
+        self.root = root
+        self.lease_seconds = lease_seconds
+        for name in QUEUE_DIRS:
+            os.makedirs(os.path.join(root, name), exist_ok=True)
+
+    def _dir(self, name: str) -> str:
+        return os.path.join(self.root, name)
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.root, 'manifest.json')
+
+    def create(self, expenses: List[Dict], partitions: int = 8) -> Dict:
+        """Write one task per non-empty employee partition, then the manifest"""
+        groups = [[] for _ in range(max(partitions, 1))]
+        for i, expense in enumerate(expenses):
+            employee_id = str(expense.get('employee_id'))
+            groups[zlib.crc32(employee_id.encode()) % len(groups)].append(i)
+
+        task_ids = []
+        for number, indices in enumerate(groups):
+            if not indices:
+                continue
+            task_id = f'task-{number:05d}'
+            _atomic_write(os.path.join(self._dir('pending'), f'{task_id}.json'), {
+                'task_id': task_id,
+                'indices': indices,
+                'expenses': [expenses[i] for i in indices]
+            })
+            task_ids.append(task_id)
+
+        # Written last: workers and the merge step treat the job as ready once it exists
+        manifest = {
+            'job_id': uuid.uuid4().hex,
+            'created_at': datetime.now().isoformat(),
+            'expense_count': len(expenses),
+            'partitions': partitions,
+            'tasks': task_ids
+        }
+        _atomic_write(self.manifest_path, manifest)
+        return manifest
+
+    def manifest(self) -> Optional[Dict]:
+        return _read_json(self.manifest_path) if os.path.exists(self.manifest_path) else None
+
+    def claim(self, worker_id: str) -> Optional[Dict]:
+        """Atomically move one pending task to claimed; None when nothing is pending"""
+        self.requeue_stale()
+        worker = re.sub(r'[^\w.-]', '_', worker_id)
+        for name in sorted(os.listdir(self._dir('pending'))):
+            if not name.endswith('.json'):
+                continue
+            task_id = name[:-len('.json')]
+            claimed = os.path.join(self._dir('claimed'), f'{task_id}~{worker}~{time.time():.3f}.json')
+            try:
+                os.rename(os.path.join(self._dir('pending'), name), claimed)
+            except FileNotFoundError:
+                continue  # another worker got there first
+            task = _read_json(claimed)
+            task['claim_path'] = claimed
+            return task
+        return None
+
+    def complete(self, task: Dict, result: Dict):
+        _atomic_write(os.path.join(self._dir('results'), f"{task['task_id']}.json"), result)
+        try:
+            os.rename(task['claim_path'], os.path.join(self._dir('done'), f"{task['task_id']}.json"))
+        except FileNotFoundError:
+            pass  # the lease expired and the task was requeued; the result is still valid
+
+    def requeue_stale(self, now: Optional[float] = None) -> List[str]:
+        """Move claims older than the lease back to pending"""
+        now = time.time() if now is None else now
+        requeued = []
+        for name in os.listdir(self._dir('claimed')):
+            task_id, _, claimed_at = name[:-len('.json')].split('~')
+            if now - float(claimed_at) < self.lease_seconds:
+                continue
+            if os.path.exists(os.path.join(self._dir('results'), f'{task_id}.json')):
+                continue  # finished; only the final rename is outstanding
+            try:
+                os.rename(os.path.join(self._dir('claimed'), name),
+                          os.path.join(self._dir('pending'), f'{task_id}.json'))
+                requeued.append(task_id)
+            except FileNotFoundError:
+                pass
+        return requeued
+
+    def status(self) -> Dict[str, int]:
+        return {
+            name: sum(1 for f in os.listdir(self._dir(name)) if f.endswith('.json'))
+            for name in QUEUE_DIRS
+        }
+
+    def is_complete(self) -> bool:
+        manifest = self.manifest()
+        return manifest is not None and all(
+            os.path.exists(os.path.join(self._dir('results'), f'{task_id}.json')) for task_id in manifest['tasks']
+        )
+
+    def load_results(self) -> List[Dict]:
+        manifest = self.manifest()
+        missing = [t for t in manifest['tasks'] if not os.path.exists(os.path.join(self._dir('results'), f'{t}.json'))]
+        if missing:
+            raise RuntimeError(f"{len(missing)} task(s) have no results yet: {', '.join(missing[:5])}")
+        return [_read_json(os.path.join(self._dir('results'), f'{t}.json')) for t in manifest['tasks']]
+
+
+def _frame_records(frame) -> List[Dict]:
+    """JSON-safe records (numpy scalars become plain numbers/bools)"""
+    if frame is None or frame.empty:
+        return []
+    return json.loads(frame.to_json(orient='records', date_format='iso'))
+
+
+def partial_result(task: Dict, results: Dict, worker_id: str) -> Dict:
+    """What a worker writes for one task"""
+    partial = {
+        'task_id': task['task_id'],
+        'worker_id': worker_id,
+        'finished_at': datetime.now().isoformat(),
+        'indices': task['indices'],
+        'expense_count': len(task['indices']),
+        'audit_report': results['audit_report'],
+        'compliance_report': results['compliance_report'],
+        'report_aggregate': results['report_aggregate'].to_dict()
+    }
+    for name in RESULT_FRAMES:
+        partial[name] = _frame_records(results.get(name))
+    return partial
+
+
+def run_worker(queue: WorkQueue, worker_id: Optional[str] = None, system=None,
+               max_tasks: Optional[int] = None) -> int:
+    """Claim and process tasks until none are pending; returns the number processed"""
+    worker_id = worker_id or f'{socket.gethostname()}-{os.getpid()}'
+    processed = 0
+    owned = None  # a system created here is closed here
+    try:
+        while max_tasks is None or processed < max_tasks:
+            task = queue.claim(worker_id)
+            if task is None:
+                break
+            if system is None:
+                from main import EnterpriseExpenseAuditSystem
+                system = owned = EnterpriseExpenseAuditSystem()
+            print(f"[{worker_id}] {task['task_id']}: {len(task['expenses'])} expenses")
+            results = system.process_expenses(task['expenses'])
+            queue.complete(task, partial_result(task, results, worker_id))
+            processed += 1
+    finally:
+        if owned is not None:
+            owned.close()
+    return processed
+
+
+def _merge_values(values: List, weights: List[float], key: str = ''):
+    """Combine the same report field from several partitions"""
+    present = [(v, w) for v, w in zip(values, weights) if v is not None]
+    if not present:
+        return None
+    values, weights = [v for v, _ in present], [w for _, w in present]
+    first = values[0]
+    if isinstance(first, dict):
+        keys = list(dict.fromkeys(k for v in values for k in v))
+        return {k: _merge_values([v.get(k) for v in values], weights, k) for k in keys}
+    if isinstance(first, bool) or isinstance(first, str):
+        return first
+    if isinstance(first, (int, float)):
+        if 'rate' in key or 'average' in key:
+            total = sum(weights)
+            return sum(v * w for v, w in zip(values, weights)) / total if total else first
+        return sum(values)
+    if isinstance(first, list):
+        if all(isinstance(item, (list, tuple)) and len(item) == 2 for v in values for item in v):
+            # (label, count) rankings such as top_violations
+            counts = Counter()
+            for v in values:
+                counts.update({label: count for label, count in v})
+            return counts.most_common(max(len(v) for v in values))
+        merged = []
+        for v in values:
+            merged.extend(item for item in v if item not in merged)
+        return merged
+    return first
+
+
+def merge_reports(reports: List[Dict], weights: List[float]) -> Dict:
+    """Sum counts, weight rates by partition size, and merge rankings and lists"""
+    return _merge_values(reports, weights) or {}
+
+
+def merge_results(queue: WorkQueue) -> Dict:
+    """Combine every partial into results shaped like ``process_expenses``'s"""
+    partials = queue.load_results()
+    weights = [p['expense_count'] for p in partials]
+    merged = {
+        'job': queue.manifest(),
+        'audit_report': merge_reports([p['audit_report'] for p in partials], weights),
+        'compliance_report': merge_reports([p['compliance_report'] for p in partials], weights),
+        'report_aggregate': ReportAggregate.combine(ReportAggregate.from_dict(p['report_aggregate']) for p in partials)
+    }
+    for name in RESULT_FRAMES:
+        rows = []
+        for partial in partials:
+            records = partial[name]
+            # Frames have one row per expense, in task order; anything else is kept as is
+            if len(records) == len(partial['indices']):
+                rows.extend({'_input_row': i, **record} for i, record in zip(partial['indices'], records))
+            else:
+                rows.extend({'_input_row': None, **record} for record in records)
+        frame = pd.DataFrame(rows)
+        if not frame.empty:
+            frame = frame.sort_values('_input_row', kind='stable').drop(columns='_input_row').reset_index(drop=True)
+        merged[name] = frame
+    return merged
+
+
+def write_merged(merged: Dict, output_dir: str):
+    os.makedirs(output_dir, exist_ok=True)
+    for name in RESULT_FRAMES:
+        if not merged[name].empty:
+            filename = name if name.endswith('_results') else f'{name}_results'
+            merged[name].to_csv(os.path.join(output_dir, f'{filename}.csv'), index=False)
+    for name in ('audit_report', 'compliance_report'):
+        with open(os.path.join(output_dir, f'{name}.json'), 'w') as f:
+            json.dump(merged[name], f, default=_json_default, indent=2)
+    with open(os.path.join(output_dir, 'period_report.json'), 'w') as f:
+        json.dump(merged['report_aggregate'].to_report(), f, default=_json_default, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Distributed batch audit over a shared directory')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    coordinate = sub.add_parser('coordinate', help='split expenses into tasks')
+    coordinate.add_argument('--input', required=True, help='JSON list of structured expenses')
+    coordinate.add_argument('--partitions', type=int, default=8)
+    coordinate.add_argument('--wait', action='store_true', help='wait for all tasks, then merge')
+    coordinate.add_argument('--output', default='reports/batch_audit')
+
+    work = sub.add_parser('work', help='claim and process tasks until none are left')
+    work.add_argument('--worker-id')
+    work.add_argument('--max-tasks', type=int)
+
+    merge = sub.add_parser('merge', help='combine partial results')
+    merge.add_argument('--output', default='reports/batch_audit')
+
+    for command in (coordinate, work, merge):
+        command.add_argument('--queue', required=True, help='shared queue directory')
+        command.add_argument('--lease', type=float, default=DEFAULT_LEASE_SECONDS,
+                             help='seconds before an unfinished claim is requeued')
+    args = parser.parse_args()
+
+    queue = WorkQueue(args.queue, lease_seconds=args.lease)
+    if args.command == 'coordinate':
+        manifest = queue.create(_read_json(args.input), args.partitions)
+        print(f"📦 {manifest['expense_count']} expenses -> {len(manifest['tasks'])} tasks in {args.queue}")
+        if not args.wait:
+            return 0
+        while not queue.is_complete():
+            queue.requeue_stale()
+            time.sleep(5)
+    elif args.command == 'work':
+        processed = run_worker(queue, args.worker_id, max_tasks=args.max_tasks)
+        print(f"✅ Processed {processed} task(s); queue: {queue.status()}")
+        return 0
+
+    if not queue.is_complete():
+        print(f"❌ Not all tasks have results yet: {queue.status()}")
+        return 1
+    write_merged(merge_results(queue), args.output)
+    print(f"✅ Merged results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,280 @@
+"""
+Scaling benchmark for every pipeline stage
+
+Runs extraction, policy validation, duplicate detection (pairwise and
+batch near-duplicate mode), vendor risk, behaviour analysis, collusion
+graph analysis, ML anomaly detection, summaries and reporting on
+synthetic data at increasing row counts and prints a results table. A
+stage is skipped at a size when extrapolating its previous run says it
+would exceed the time budget, so quadratic stages do not stall the suite.
+
+    python benchmarks/scaling_benchmark.py
+    python benchmarks/scaling_benchmark.py --sizes 1000,10000 --stages policy,summary
+    python benchmarks/scaling_benchmark.py --baseline reports/scaling_benchmark.json
+
+Results are written as JSON; passing a previous file as ``--baseline``
+fails the run when any stage's rows/sec drops by more than the tolerance.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(REPO_ROOT, 'src'))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic_data import SyntheticExpenseGenerator, to_detector_format
+from utils.profiling import StageProfiler
+
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000]
+
+
+def run_extraction(ctx):
+    from agents.field_extraction_agent import FieldExtractionAgent
+    receipts = ctx['generator'].receipts(ctx['rows'])
+    with contextlib.redirect_stdout(io.StringIO()):
+        agent = FieldExtractionAgent()
+
+    def stage():
+        # The agent prints one line per receipt
+        with contextlib.redirect_stdout(io.StringIO()):
+            return agent.process_raw_receipts(receipts)
+    return stage
+
+
+def run_policy(ctx):
+    from agents.policy_agent import PolicyAgent
+    from config import Config
+    from memory.memory_manager import MemoryManager
+    agent = PolicyAgent(MemoryManager(), Config())
+
+    def stage():
+        ctx['policy_results'] = agent.batch_validate(ctx['expenses'])
+        return ctx['policy_results']
+    return stage
+
+
+def run_duplicates(ctx):
+    from fraud_detection import DuplicateDetector
+    detector = DuplicateDetector()
+    return lambda: [detector.detect_duplicates(row, ctx['history']) for row in ctx['detector_rows']]
+
+
+def run_near_duplicates(ctx):
+    from fraud_detection import DuplicateDetector
+    detector = DuplicateDetector()
+    return lambda: detector.detect_duplicates_batch(ctx['detector_rows'], ctx['history'])
+
+
+def run_vendor_risk(ctx):
+    from fraud_detection import VendorRiskEngine
+    engine = VendorRiskEngine()
+    return lambda: [
+        engine.assess_vendor_risk(row['vendor'], row['amount_raw'], row['date_raw'], row['category'], ctx['history'])
+        for row in ctx['detector_rows']
+    ]
+
+
+def run_behavior(ctx):
+    from fraud_detection import BehaviorAnalyzer
+    analyzer = BehaviorAnalyzer()
+    return lambda: [analyzer.analyze_behavior(row, ctx['history']) for row in ctx['detector_rows']]
+
+
+def run_collusion(ctx):
+    from fraud_detection import CollusionGraphAnalyzer
+    analyzer = CollusionGraphAnalyzer()
+    return lambda: analyzer.analyze_expenses(ctx['detector_rows'])
+
+
+def run_ml(ctx):
+    from agents.fraud_detection_agent import FraudDetectionAgent
+    from config import Config
+    from memory.memory_manager import MemoryManager
+    agent = FraudDetectionAgent(MemoryManager(), Config())
+    agent.anomaly_detector  # load scikit-learn outside the timed region
+    return lambda: agent.detect_anomalies(ctx['expenses'])
+
+
+def run_summary(ctx):
+    from agents.summary_agent import SummaryAgent
+    agent = SummaryAgent()
+    return lambda: agent.summarize_results(ctx['expenses'], ctx['fraud_results'])
+
+
+def run_reporting(ctx):
+    from agents.reporting_agent import ReportingAgent
+    from config import Config
+    if ctx.get('policy_results') is None:
+        return None  # needs this size's policy stage output
+    agent = ReportingAgent(None, Config())
+    return lambda: agent.generate_compliance_report(ctx['policy_results'], ctx['fraud_results'])
+
+
+# Pipeline order matters: reporting reuses the policy stage's results
+STAGES = [
+    ('extraction', run_extraction),
+    ('policy', run_policy),
+    ('duplicates', run_duplicates),
+    ('near_dups', run_near_duplicates),
+    ('vendor_risk', run_vendor_risk),
+    ('behavior', run_behavior),
+    ('collusion', run_collusion),
+    ('ml', run_ml),
+    ('summary', run_summary),
+    ('reporting', run_reporting),
+]
+
+
+class LazyContext(dict):
+    """Per-size inputs, generated on first use and excluded from stage timings"""
+
+    def __init__(self, generator, rows, history):
+        super().__init__(generator=generator, rows=rows, history=history)
+
+    def __missing__(self, key):
+        if key == 'expenses':
+            value = self['generator'].expenses(self['rows'])
+        elif key == 'detector_rows':
+            value = [to_detector_format(expense) for expense in self['expenses']]
+        elif key == 'fraud_results':
+            value = self['generator'].fraud_results(self['expenses'])
+        else:
+            raise KeyError(key)
+        self[key] = value
+        return value
+
+
+def run_benchmark(sizes=None, stages=None, budget_seconds=120.0, track_memory=False, **generator_options):
+    sizes = sizes or DEFAULT_SIZES
+    selected = [(name, setup) for name, setup in STAGES if not stages or name in stages]
+    generator = SyntheticExpenseGenerator(**generator_options)
+    history = generator.history()
+    profiler = StageProfiler(enabled=True, track_memory=track_memory)
+
+    results = []
+    last_run = {}  # stage -> (rows, seconds) of its latest completed size
+    for rows in sizes:
+        ctx = LazyContext(generator, rows, history)
+        for name, setup in selected:
+            if name in last_run:
+                previous_rows, previous_seconds = last_run[name]
+                estimate = previous_seconds * rows / previous_rows
+                if estimate > budget_seconds:
+                    results.append(_skipped(name, rows, f'est. {estimate:.0f}s > budget'))
+                    continue
+
+            stage = setup(ctx)
+            if stage is None:
+                results.append(_skipped(name, rows, 'needs policy stage'))
+                continue
+
+            with profiler.stage(name, rows=rows):
+                stage()
+            record = profiler.records[-1]
+            last_run[name] = (rows, record['wall_time_ms'] / 1000)
+            results.append({
+                'stage': name,
+                'rows': rows,
+                'wall_time_s': round(record['wall_time_ms'] / 1000, 4),
+                'rows_per_sec': record['rows_per_sec'],
+                'peak_memory_mb': record['peak_memory_mb'],
+                'status': 'ok'
+            })
+            print(_format_row(results[-1]), flush=True)
+        ctx.clear()
+    return {
+        'history_size': generator.history_size,
+        'employees': len(generator.employees),
+        'duplicate_rate': generator.duplicate_rate,
+        'results': results
+    }
+
+
+def _skipped(stage, rows, reason):
+    result = {'stage': stage, 'rows': rows, 'wall_time_s': None, 'rows_per_sec': None,
+              'peak_memory_mb': None, 'status': f'skipped ({reason})'}
+    print(_format_row(result), flush=True)
+    return result
+
+
+def _format_row(result):
+    def fmt(value, width, spec):
+        return format(value, f'>{width}{spec}') if value is not None else '-'.rjust(width)
+    return (f"{result['stage']:<12} {result['rows']:>9,} {fmt(result['wall_time_s'], 10, '.3f')} "
+            f"{fmt(result['rows_per_sec'], 12, ',.0f')} {fmt(result['peak_memory_mb'], 9, '.1f')}  {result['status']}")
+
+
+def compare_to_baseline(run, baseline, tolerance=0.25):
+    """(stage, rows, baseline rows/sec, current rows/sec) for every slowdown beyond ``tolerance``"""
+    previous = {
+        (r['stage'], r['rows']): r['rows_per_sec'] for r in baseline['results'] if r['rows_per_sec']
+    }
+    regressions = []
+    for result in run['results']:
+        before = previous.get((result['stage'], result['rows']))
+        if before and result['rows_per_sec'] and result['rows_per_sec'] < before * (1 - tolerance):
+            regressions.append((result['stage'], result['rows'], before, result['rows_per_sec']))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Per-stage scaling benchmark on synthetic expenses')
+    parser.add_argument('--sizes', default=','.join(str(s) for s in DEFAULT_SIZES), help='comma-separated row counts')
+    parser.add_argument('--stages', default='', help=f"comma-separated subset of: {', '.join(n for n, _ in STAGES)}")
+    parser.add_argument('--employees', type=int, default=200)
+    parser.add_argument('--vendor-skew', type=float, default=1.1)
+    parser.add_argument('--duplicate-rate', type=float, default=0.02)
+    parser.add_argument('--history-size', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--budget', type=float, default=120.0, help='skip a stage when its extrapolated time exceeds this (s)')
+    parser.add_argument('--memory', action='store_true', help='record peak memory (tracemalloc slows every stage)')
+    parser.add_argument('--output', default=os.path.join('reports', 'scaling_benchmark.json'))
+    parser.add_argument('--baseline', help='previous results file to check for regressions')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed rows/sec drop vs. baseline')
+    args = parser.parse_args()
+
+    # Read the baseline first: it may be the file this run is about to overwrite
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    print("📈 SCALING BENCHMARK")
+    print("=" * 72)
+    print(f"{'stage':<12} {'rows':>9} {'wall s':>10} {'rows/sec':>12} {'peak MB':>9}  status")
+    run = run_benchmark(
+        sizes=[int(s) for s in args.sizes.split(',') if s],
+        stages=[s for s in args.stages.split(',') if s],
+        budget_seconds=args.budget,
+        track_memory=args.memory,
+        employees=args.employees,
+        vendor_skew=args.vendor_skew,
+        duplicate_rate=args.duplicate_rate,
+        history_size=args.history_size,
+        seed=args.seed
+    )
+
+    directory = os.path.dirname(args.output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(run, f, indent=2)
+    print("=" * 72)
+    print(f"Results saved to {args.output}")
+
+    if baseline is not None:
+        regressions = compare_to_baseline(run, baseline, args.tolerance)
+        for stage, rows, before, after in regressions:
+            print(f"❌ {stage} @ {rows:,} rows: {before:,.0f} -> {after:,.0f} rows/sec")
+        if regressions:
+            return 1
+        print("✅ No scaling regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""
+Startup benchmark based on ``python -X importtime``
+
+Each scenario imports an entry point in a fresh interpreter and reports the
+total import time, the slowest modules, and whether heavy dependencies
+(pandas, scikit-learn, matplotlib, ...) were pulled in. Scenarios with a
+target fail the run when they exceed it.
+
+    python benchmarks/startup_benchmark.py
+"""
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ['pandas', 'numpy', 'sklearn', 'scipy', 'matplotlib', 'seaborn', 'sentence_transformers']
+
+# (name, import statement, import-time target in ms or None, heavy modules allowed)
+SCENARIOS = [
+    ('extraction', 'from src.agents.field_extraction_agent import FieldExtractionAgent', 150, False),
+    ('summary', 'from src.agents.summary_agent import SummaryAgent', 150, False),
+    ('quick_demo', 'import contextlib, io, demo\nwith contextlib.redirect_stdout(io.StringIO()): demo.quick_demo()', 150, False),
+    ('main', 'import main', None, True),
+]
+
+
+def measure_imports(statement, repeats=3):
+    """Return (total import ms, {module: cumulative ms}) for the fastest of ``repeats`` runs"""
+    best = None
+    for _ in range(repeats):
+        completed = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', statement],
+            cwd=REPO_ROOT, capture_output=True, text=True
+        )
+        if completed.returncode != 0:
+            raise RuntimeError(f"'{statement}' failed:\n{completed.stderr[-2000:]}")
+
+        total_us = 0
+        modules = {}
+        for line in completed.stderr.splitlines():
+            if not line.startswith('import time:') or 'self [us]' in line:
+                continue
+            self_us, cumulative_us, name = line[len('import time:'):].split('|')
+            total_us += int(self_us)
+            modules[name.strip()] = int(cumulative_us) / 1000.0
+        if best is None or total_us < best[0]:
+            best = (total_us, modules)
+    return best[0] / 1000.0, best[1]
+
+
+def run_benchmark(top=3):
+    print("🚀 STARTUP IMPORT BENCHMARK")
+    print("=" * 60)
+    failures = []
+
+    for name, statement, target_ms, heavy_allowed in SCENARIOS:
+        total_ms, modules = measure_imports(statement)
+        heavy = [m for m in HEAVY_MODULES if m in modules]
+        within_target = target_ms is None or total_ms <= target_ms
+        clean = heavy_allowed or not heavy
+
+        status = '✅' if within_target and clean else '❌'
+        target = f"target {target_ms} ms" if target_ms else "no target"
+        print(f"\n{status} {name}: {total_ms:.1f} ms ({target})")
+        print(f"   {statement.splitlines()[-1]}")
+        print(f"   Heavy modules loaded: {', '.join(heavy) if heavy else 'none'}")
+        slowest = sorted(modules.items(), key=lambda item: item[1], reverse=True)[:top]
+        for module, cumulative_ms in slowest:
+            print(f"   • {module}: {cumulative_ms:.1f} ms")
+
+        if not within_target or not clean:
+            failures.append(name)
+
+    print("\n" + "=" * 60)
+    if failures:
+        print(f"❌ Startup targets missed: {', '.join(failures)}")
+    else:
+        print("✅ All startup targets met")
+    return not failures
+
+
+if __name__ == "__main__":
+    sys.exit(0 if run_benchmark() else 1)
@@ -0,0 +1,132 @@
+"""
+Synthetic receipts and expenses for benchmarks
+
+Vendors are drawn from a Zipf-like distribution (a few vendors get most of
+the traffic, as in real expense data), employees are uniform, and a
+configurable fraction of rows are re-submissions of an earlier expense
+with the same vendor, amount and date. Everything is seeded, so two runs
+with the same parameters produce identical data.
+
+    from synthetic_data import SyntheticExpenseGenerator
+    generator = SyntheticExpenseGenerator(employees=500, duplicate_rate=0.03)
+    expenses = generator.expenses(10000)
+"""
+import random
+from datetime import date, timedelta
+from typing import Dict, List
+
+# (vendor, category, typical amount) -- vendor names match FieldExtractionAgent patterns
+VENDORS = [
+    ('Uber', 'Travel', 450.0), ('OLA', 'Travel', 320.0), ('Lyft', 'Travel', 600.0),
+    ('Starbucks', 'Meals', 280.0), ('Zomato', 'Meals', 520.0), ('Swiggy', 'Meals', 410.0),
+    ('McDonald', 'Meals', 240.0), ('Pizza Hut', 'Meals', 650.0), ('KFC', 'Meals', 380.0),
+    ('Amazon', 'Shopping', 1499.0), ('Flipkart', 'Shopping', 999.0),
+    ('Hotel Grand', 'Accommodation', 4200.0), ('Marriott', 'Accommodation', 7800.0),
+    ('Hilton', 'Accommodation', 6900.0), ('OFFICE Store', 'Supplies', 350.0),
+    ('RECHARGE STORE', 'Personal', 500.0), ('GIFT CARD EMPORIUM', 'Personal', 300.0),
+    ('Lucky Casino Bar', 'Entertainment', 2500.0), ('Cloud Software Services', 'Software', 2400.0),
+]
+
+LOCATIONS = ['Mumbai', 'Delhi', 'Bangalore', 'Chennai', 'Pune', 'Hyderabad', 'Las Vegas']
+MONTHS = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+DESCRIPTIONS = ['Client meeting', 'Team lunch', 'Airport transfer', 'Office supplies',
+                'Conference travel', 'Food', 'Software subscription', 'Hotel stay']
+
+
+class SyntheticExpenseGenerator:
+    def __init__(self, employees: int = 200, vendor_skew: float = 1.1, duplicate_rate: float = 0.02,
+                 history_size: int = 1000, start_date: date = date(2025, 1, 1), days: int = 365,
+                 seed: int = 42):
+        self.employees = [f'E{i:05d}' for i in range(1, employees + 1)]
+        self.duplicate_rate = duplicate_rate
+        self.history_size = history_size
+        self.start_date = start_date
+        self.days = days
+        self.seed = seed
+        # Zipf-like vendor weights: rank r gets weight 1 / r^skew
+        self.vendor_weights = [1.0 / (rank ** vendor_skew) for rank in range(1, len(VENDORS) + 1)]
+
+    def _format_date(self, day: date) -> str:
+        return f"{day.day:02d} {MONTHS[day.month - 1]} {day.year}"
+
+    def expenses(self, n: int, seed_offset: int = 0) -> List[Dict]:
+        """``n`` structured expenses in the shape FieldExtractionAgent produces"""
+        rng = random.Random(self.seed + seed_offset)
+        vendor_picks = rng.choices(VENDORS, weights=self.vendor_weights, k=n)
+        expenses = []
+        for i, (vendor, category, typical) in enumerate(vendor_picks):
+            if expenses and rng.random() < self.duplicate_rate:
+                # Re-submission of an earlier receipt under a new id
+                expense = dict(rng.choice(expenses))
+                expense['id'] = f'EXP{seed_offset + i:07d}'
+                expenses.append(expense)
+                continue
+
+            day = self.start_date + timedelta(days=rng.randrange(self.days))
+            amount = round(max(10.0, rng.lognormvariate(0, 0.5) * typical), 2)
+            expenses.append({
+                'id': f'EXP{seed_offset + i:07d}',
+                'employee_id': rng.choice(self.employees),
+                'amount': amount,
+                'category': category,
+                'date': self._format_date(day),
+                'merchant': vendor,
+                'location': rng.choice(LOCATIONS),
+                'description': f'{rng.choice(DESCRIPTIONS)} at {vendor}',
+                'hour': rng.randint(6, 23)
+            })
+        return expenses
+
+    def receipts(self, n: int, seed_offset: int = 0) -> List[str]:
+        """Raw receipt text for ``n`` expenses, for the extraction stage"""
+        return [
+            f"{expense['merchant'].upper()}\n{expense['description']}\n"
+            f"Date: {expense['date']}\nTotal: ₹{expense['amount']:.2f}\nEmployee: {expense['employee_id']}"
+            for expense in self.expenses(n, seed_offset)
+        ]
+
+    def history(self) -> List[Dict]:
+        """``history_size`` past expenses in the format the fraud detectors compare against"""
+        return [to_detector_format(expense) for expense in self.expenses(self.history_size, seed_offset=10 ** 7)]
+
+    def fraud_results(self, expenses: List[Dict]):
+        """Rule-based fraud results with the columns SummaryAgent and the reports expect"""
+        import pandas as pd
+
+        rng = random.Random(self.seed + 1)
+        rows = []
+        for expense in expenses:
+            score = rng.choice([5, 15, 25, 45, 65, 75, 90])
+            decision = 'REJECT' if score >= 80 else 'NEEDS_REVIEW' if score >= 50 else 'APPROVE'
+            reasons = [] if score < 50 else rng.sample(
+                ['Same vendor, amount, and date combination', 'Personal expense pattern detected',
+                 'Same amount ₹450.0 repeated 3 times', 'Expense on weekend'], 2)
+            rows.append({
+                'expense_id': expense['id'],
+                'employee_id': expense['employee_id'],
+                'amount': expense['amount'],
+                'category': expense['category'],
+                'merchant': expense['merchant'],
+                'is_anomaly': score >= 70,
+                'risk_level': 'High' if score >= 70 else 'Low',
+                'fraud_score': score,
+                'fraud_decision': decision,
+                'fraud_reasons': reasons,
+                'is_duplicate': False,
+                'vendor_risk_score': score
+            })
+        return pd.DataFrame(rows)
+
+
+def to_detector_format(expense: Dict) -> Dict:
+    """The dict shape DuplicateDetector, VendorRiskEngine and BehaviorAnalyzer read"""
+    return {
+        'vendor': expense['merchant'],
+        'amount': expense['amount'],
+        'amount_raw': f"₹{expense['amount']:.2f}",
+        'date': expense['date'],
+        'date_raw': expense['date'],
+        'category': expense['category'],
+        'raw_text': f"{expense['merchant']} {expense['description']} {expense['date']} {expense['amount']:.2f}",
+        'employee_id': expense['employee_id']
+    }
@@ -6,6 +6,25 @@ import re
 import json
 from datetime import datetime, timedelta
 from collections import Counter
+from contextlib import nullcontext
+
+# Stage profiling shared with the agents (enable with PROFILE_STAGES=1)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+from utils.profiling import PROFILER, profile_stage
+from utils.checkpoints import CheckpointStore, input_hash
+from memory.fingerprint_store import FingerprintStore, receipt_fingerprint
+from utils.streaming_stats import AmountBaselines
+
+# Bump a stage's version when its logic changes so old checkpoints are not reused
+CHECKPOINT_STAGE_VERSIONS = {
+    'extraction': 1,
+    'policy': 1,
+    'rule_based_fraud': 1,
+    'ml_fraud': 1,
+    'summaries': 1,
+    'audit_report': 1,
+    'compliance_report': 1
+}
 
 # Field Extraction Agent Class
 class FieldExtractionAgent:
@@ -103,6 +122,7 @@ class FieldExtractionAgent:
         employees = [f'E{str(i).zfill(3)}' for i in range(1, 21)]
         return np.random.choice(employees)
     
+    @profile_stage()
     def process_raw_receipts(self, raw_receipts):
         """Convert raw receipts to structured expense data"""
         structured_expenses = []
@@ -156,21 +176,41 @@ class FieldExtractionAgent:
 
 # Enhanced Fraud Detection with Proper Score Calculation
 class AdvancedFraudDetector:
-    def __init__(self):
+    def __init__(self, fingerprints=None):
+        # Optional FingerprintStore of receipts filed in earlier runs
+        self.fingerprints = fingerprints
         self.high_risk_vendors = ['uber', 'ola', 'zomato', 'swiggy', 'recharge', 'gift', 'personal']
         self.personal_keywords = ['recharge', 'gift', 'personal', 'mobile', 'entertainment']
     
-    def detect_duplicates(self, expenses):
-        """Detect duplicate receipts based on vendor + amount + date"""
+    def detect_duplicates(self, expenses, batch_id=None):
+        """Detect duplicate receipts based on vendor + amount + date
+        
+        With a fingerprint store, receipts filed by an earlier batch are
+        duplicates too. Passing ``batch_id`` records this batch's new
+        receipts, and re-running the same batch does not flag them.
+        """
         duplicates = []
         seen = set()
+        new_fingerprints = []
         
         for expense in expenses:
-            key = (expense['merchant'].lower(), expense['amount'], expense['date'])
+            key = receipt_fingerprint(expense['merchant'], expense['amount'], expense['date'])
             if key in seen:
                 duplicates.append(expense)
+                continue
             seen.add(key)
+            
+            if self.fingerprints is None:
+                continue
+            previous = self.fingerprints.get(key)
+            if previous is None:
+                if batch_id is not None:
+                    new_fingerprints.append((key, expense['employee_id'], expense['date'], batch_id))
+            elif previous['batch_id'] != batch_id:
+                duplicates.append(expense)
         
+        if new_fingerprints:
+            self.fingerprints.add_many(new_fingerprints)
         return duplicates
     
     def calculate_vendor_risk(self, vendor, category):
@@ -280,16 +320,19 @@ class AdvancedFraudDetector:
             "vendor_risk_score": vendor_risk_score
         }
     
-    def analyze_expenses(self, expenses):
+    @profile_stage()
+    def analyze_expenses(self, expenses, verbose=True, batch_id=None):
         """Complete fraud analysis for all expenses"""
-        print("    🔍 Analyzing duplicates...")
-        duplicates = self.detect_duplicates(expenses)
-        print(f"       Found {len(duplicates)} potential duplicates")
-        
-        print("    🔍 Analyzing vendor risk...")
-        print("    🔍 Analyzing behavior patterns...")
+        if verbose:
+            print("    🔍 Analyzing duplicates...")
+        duplicates = self.detect_duplicates(expenses, batch_id)
+        if verbose:
+            print(f"       Found {len(duplicates)} potential duplicates")
+            print("    🔍 Analyzing vendor risk...")
+            print("    🔍 Analyzing behavior patterns...")
         behavior_anomalies = self.detect_behavior_anomalies(expenses)
-        print(f"       Found {len(behavior_anomalies)} behavior anomalies")
+        if verbose:
+            print(f"       Found {len(behavior_anomalies)} behavior anomalies")
         
         results = []
         for expense in expenses:
@@ -336,11 +379,15 @@ except ImportError as e:
     USE_SUMMARY_AGENT = False
     print(f"⚠️ SummaryAgent not available: {e}")
 
+# Mergeable per-batch report aggregates for period reporting
+from src.reporting import ReportAggregate, AggregateStore
+
 class PolicyAgent:
     def __init__(self, memory, config):
         self.memory = memory
         self.config = config
     
+    @profile_stage()
     def batch_validate(self, expenses_data):
         """Mock policy validation"""
         df = pd.DataFrame(expenses_data)
@@ -353,6 +400,7 @@ class AuditAgent:
         self.memory = memory
         self.config = config
     
+    @profile_stage()
     def generate_audit_report(self, policy_results, fraud_results, behavioral_patterns):
         """Enhanced audit report with fraud insights"""
         high_risk_policy = len(policy_results[policy_results['violation_count'] > 0])
@@ -379,6 +427,7 @@ class ReportingAgent:
         self.memory = memory
         self.config = config
     
+    @profile_stage()
     def generate_compliance_report(self, policy_results, fraud_results):
         """Mock compliance report"""
         return {
@@ -386,16 +435,13 @@ class ReportingAgent:
             'violations_by_category': {'Travel': 10, 'Meals': 5},
             'summary': 'Compliance report generated'
         }
-    
-    def generate_visualizations(self, policy_results, fraud_results):
-        """Mock visualization generation"""
-        print("Visualizations saved to reports/audit_visualizations.png")
-        return True
 
 class MemoryManager:
     def __init__(self):
         self.memory_data = {}
         self.historical_expenses = []
+        self.amount_baselines = AmountBaselines()
+        self.batch_ids = set()
     
     def save_memory(self, filename):
         """Save memory to file"""
@@ -403,9 +449,30 @@ class MemoryManager:
             json.dump(self.memory_data, f, indent=2)
         return True
     
+    def add_expenses(self, expenses, batch_id=None):
+        """Keep expenses for duplicate detection and fold them into the amount baselines
+        
+        A batch that was already added (re-run or resumed) is skipped, so its
+        amounts are not counted twice.
+        """
+        if batch_id is not None:
+            if batch_id in self.batch_ids:
+                return
+            self.batch_ids.add(batch_id)
+        self.historical_expenses.extend(expenses)
+        for expense in expenses:
+            self.amount_baselines.add(expense)
+    
     def get_employee_behavior(self, employee_id):
-        """Mock employee behavior data"""
-        return {'total_amount': 5000, 'total_expenses': 15}
+        """Employee amount baseline (empty before their first processed expense)"""
+        stats = self.amount_baselines.employee(employee_id)
+        if stats is None:
+            return {}
+        return {
+            'total_amount': stats.mean * stats.count,
+            'total_expenses': stats.count,
+            **{f'amount_{key}': value for key, value in stats.summary().items()}
+        }
     
     def get_historical_expenses(self):
         """Get historical expenses for duplicate detection"""
@@ -429,61 +496,69 @@ class Config:
             },
             'categories': ['Travel', 'Meals', 'Entertainment', 'Supplies', 'Software', 'Accommodation', 'Shopping', 'Other', 'Personal']
         })()
+        
+        # Optional local LLM for summaries
+        self.LLM_ENDPOINT = os.environ.get('LLM_ENDPOINT')
+        self.LLM_SUMMARY_CACHE = 'reports/llm_summary_cache.jsonl'
+        
+        # Per-batch report partials, combined into monthly/quarterly reports
+        self.REPORT_AGGREGATES_FILE = 'reports/report_aggregates.jsonl'
+        
+        # Profiling output (stage metrics need PROFILE_STAGES=1; cProfile dump is optional)
+        self.PROFILE_METRICS_FILE = 'reports/stage_metrics.json'
+        self.PROFILE_CPROFILE_FILE = os.environ.get('PROFILE_CPROFILE')  # e.g. reports/run.pstats
+        
+        # Charts are opt-in so audits do not wait on rendering
+        self.VISUALIZATIONS_ENABLED = os.environ.get('VISUALIZATIONS_ENABLED', '').lower() in ('1', 'true', 'yes')
+        
+        # Per-stage checkpoints so a restarted batch skips finished work (off unless a directory is set)
+        self.CHECKPOINT_DIR = os.environ.get('CHECKPOINT_DIR')  # e.g. reports/checkpoints
+        self.CHECKPOINT_CHUNK_SIZE = 1000
+        
+        # Receipt fingerprints kept across runs for duplicate checks (off unless a path is set)
+        self.FINGERPRINT_STORE = os.environ.get('FINGERPRINT_STORE')  # e.g. reports/receipt_fingerprints.sqlite
+        # Bloom-filter front instead of an in-memory fingerprint dict, sized for this many receipts
+        self.FINGERPRINT_BLOOM_CAPACITY = int(os.environ.get('FINGERPRINT_BLOOM_CAPACITY', 0)) or None
 
 # Summary Agent Integration
 class SummaryProcessor:
-    def __init__(self):
-        self.summary_agent = SummaryAgent() if USE_SUMMARY_AGENT else None
+    def __init__(self, config=None):
+        self.summary_agent = None
+        if USE_SUMMARY_AGENT:
+            llm_generator = None
+            if getattr(config, 'LLM_ENDPOINT', None):
+                from src.agents.llm_summary_backend import LLMSummaryGenerator
+                llm_generator = LLMSummaryGenerator.from_config(config)
+                print(f"✅ Using local LLM summaries from {config.LLM_ENDPOINT}")
+            self.summary_agent = SummaryAgent(llm_generator=llm_generator)
     
-    def generate_summaries(self, expenses_data, rule_based_results):
+    @profile_stage()
+    def generate_summaries(self, expenses_data, rule_based_results, verbose=True):
         """Generate human-friendly summaries for all expenses"""
         if not self.summary_agent:
-            print("⚠️  SummaryAgent not available - skipping summary generation")
+            if verbose:
+                print("⚠️  SummaryAgent not available - skipping summary generation")
             return pd.DataFrame()
         
-        summaries = []
-        print("    📝 Generating human-friendly explanations...")
+        if verbose:
+            print("    📝 Generating human-friendly explanations...")
         
-        for expense in expenses_data:
-            # Find corresponding fraud result
-            fraud_result = rule_based_results[rule_based_results['expense_id'] == expense['id']]
-            if fraud_result.empty:
-                continue
-            
-            fraud_row = fraud_result.iloc[0]
-            
-            # Create P2 output format for summary agent
-            p2_output = {
-                "decision": fraud_row['fraud_decision'],
-                "final_risk_score": fraud_row['fraud_score'],
-                "policy_violations": [],  # Could integrate with policy results
-                "reasons": fraud_row.get('fraud_reasons', [])
-            }
-            
-            # Generate summary
-            summary_result = self.summary_agent.generate(expense, p2_output)
-            
-            summaries.append({
-                'expense_id': expense['id'],
-                'employee_id': expense['employee_id'],
-                'merchant': expense['merchant'],
-                'amount': expense['amount'],
-                'summary_text': summary_result['summary_text'],
-                'confidence_score': summary_result['confidence_score'],
-                'recommendation': summary_result['recommendation'],
-                'explanation_points': summary_result['explanation_points'],
-                'review_timestamp': summary_result['review_timestamp']
-            })
-        
-        return pd.DataFrame(summaries)
+        # One join by expense id instead of filtering the fraud results per expense
+        return self.summary_agent.summarize_results(expenses_data, rule_based_results)
 
 # Main System Class
 class EnterpriseExpenseAuditSystem:
     def __init__(self):
         self.config = Config()
         self.memory = MemoryManager()
-        self.advanced_fraud_detector = AdvancedFraudDetector()
-        self.summary_processor = SummaryProcessor()
+        fingerprints = None
+        if self.config.FINGERPRINT_STORE:
+            fingerprints = FingerprintStore(self.config.FINGERPRINT_STORE,
+                                            bloom_capacity=self.config.FINGERPRINT_BLOOM_CAPACITY)
+        self.advanced_fraud_detector = AdvancedFraudDetector(fingerprints)
+        self.summary_processor = SummaryProcessor(self.config)
+        self.checkpoints = CheckpointStore(self.config.CHECKPOINT_DIR) if self.config.CHECKPOINT_DIR else None
+        self._online_policy = None
         
         self.agents = {
             'field_extraction': FieldExtractionAgent(),
@@ -497,42 +572,161 @@ class EnterpriseExpenseAuditSystem:
             self.agents['fraud'] = FraudDetectionAgent(self.memory, self.config)
         else:
             self.agents['fraud'] = self.advanced_fraud_detector
+        
+        # Charts come from the real reporting agent (Agg backend in a worker
+        # process); the compliance report stays with the built-in agent
+        if self.config.VISUALIZATIONS_ENABLED:
+            from src.agents.reporting_agent import ReportingAgent as ChartReportingAgent
+            self.agents['visualization'] = ChartReportingAgent(self.memory, self.config)
             
         print("Enterprise Expense Audit System initialized successfully!")
     
+    def close(self):
+        """Stop agent worker processes (waiting for pending charts) and close the fingerprint store"""
+        for agent in self.agents.values():
+            shutdown = getattr(agent, 'shutdown', None)
+            if callable(shutdown):
+                shutdown()
+        fingerprints = self.advanced_fraud_detector.fingerprints
+        if fingerprints is not None:
+            fingerprints.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    @profile_stage()
     def process_raw_receipts(self, raw_receipts):
         """Process raw receipts through the entire pipeline"""
         print(f"Processing {len(raw_receipts)} raw receipts...")
         
         # Step 1: Field Extraction
         print("1. Extracting fields from raw receipts...")
-        structured_expenses = self.agents['field_extraction'].process_raw_receipts(raw_receipts)
+        if self.checkpoints is None:
+            structured_expenses = self.agents['field_extraction'].process_raw_receipts(raw_receipts)
+        else:
+            structured_expenses = self._extract_in_chunks(raw_receipts)
+        
+        # Continue with existing processing; extraction randomizes some fields, so the
+        # batch is identified by its raw receipts
+        return self.process_expenses(structured_expenses, batch_id=input_hash(raw_receipts))
+    
+    def _extract_in_chunks(self, raw_receipts):
+        """Field extraction one checkpointed chunk at a time"""
+        chunk_size = self.config.CHECKPOINT_CHUNK_SIZE
+        structured_expenses = []
+        for start in range(0, len(raw_receipts), chunk_size):
+            chunk = raw_receipts[start:start + chunk_size]
+            structured_expenses.extend(self.checkpoints.run(
+                'extraction', CHECKPOINT_STAGE_VERSIONS['extraction'], chunk,
+                lambda: self.agents['field_extraction'].process_raw_receipts(chunk)
+            ))
         
-        # Continue with existing processing
-        return self.process_expenses(structured_expenses)
+        # Ids are positional, so renumber across chunks
+        for i, expense in enumerate(structured_expenses):
+            expense['id'] = f'EXP{i:06d}'
+        return structured_expenses
     
-    def process_expenses(self, expenses_data):
-        """Process expenses through all agents - ENHANCED VERSION"""
+    def _audit_report(self, policy_results, fraud_results, rule_based_results, behavioral_patterns):
+        audit_report = self.agents['audit'].generate_audit_report(
+            policy_results, fraud_results, behavioral_patterns
+        )
+        
+        # Add rule-based results to audit report
+        if not rule_based_results.empty:
+            high_risk_fraud = rule_based_results[rule_based_results['fraud_decision'].isin(['REJECT', 'NEEDS_REVIEW'])]
+            audit_report['advanced_fraud'] = {
+                'rule_based_high_risk': len(high_risk_fraud),
+                'duplicates_detected': rule_based_results['is_duplicate'].sum(),
+                'high_risk_vendors': rule_based_results[rule_based_results['vendor_risk_score'] > 50].shape[0],
+                'total_fraud_cases': len(high_risk_fraud),
+                'fraud_decisions': {
+                    'REJECT': len(rule_based_results[rule_based_results['fraud_decision'] == 'REJECT']),
+                    'NEEDS_REVIEW': len(rule_based_results[rule_based_results['fraud_decision'] == 'NEEDS_REVIEW']),
+                    'APPROVE': len(rule_based_results[rule_based_results['fraud_decision'] == 'APPROVE'])
+                }
+            }
+        return audit_report
+    
+    def _checkpointed(self, stage, batch_key, compute):
+        """Whole-batch stage result, from the checkpoint store when enabled"""
+        if self.checkpoints is None:
+            return compute()
+        return self.checkpoints.run(stage, CHECKPOINT_STAGE_VERSIONS[stage], None, compute, key=batch_key)
+    
+    @property
+    def online_policy(self):
+        """RuleEngine policy checks for online scoring, built on first use
+        
+        It has no memory, so the same expense always gets the same
+        violations; duplicates are left to the rule-based fraud stage.
+        """
+        if self._online_policy is None:
+            from src.agents.policy_agent import PolicyAgent as RulePolicyAgent
+            self._online_policy = RulePolicyAgent(None, self.config)
+        return self._online_policy
+    
+    @profile_stage()
+    def score_expenses(self, expenses_data):
+        """Score expenses for online use: policy, rule-based fraud and summaries only
+        
+        Skips audit/compliance reports and visualizations so a warm system can
+        answer per-request without the batch reporting overhead.
+        """
+        policy_results = self.online_policy.batch_validate(expenses_data)
+        rule_based_results = self.advanced_fraud_detector.analyze_expenses(expenses_data, verbose=False)
+        summary_results = self.summary_processor.generate_summaries(
+            expenses_data, rule_based_results, verbose=False
+        )
+        
+        return {
+            'policy_validation': policy_results,
+            'rule_based_fraud': rule_based_results,
+            'summary_results': summary_results
+        }
+    
+    @profile_stage()
+    def process_expenses(self, expenses_data, batch_id=None):
+        """Process expenses through all agents - ENHANCED VERSION
+        
+        ``batch_id`` identifies the batch across re-runs (a hash of the
+        expenses when not given).
+        """
         print(f"2. Processing {len(expenses_data)} structured expenses through multi-agent system...")
+        # Stage checkpoints are keyed by this batch and every stage version (later stages use earlier outputs)
+        batch_key = self.checkpoints.key([expenses_data, CHECKPOINT_STAGE_VERSIONS]) if self.checkpoints else None
+        # Fingerprints record the batch that filed them, so re-ingesting this batch is idempotent
+        batch_id = batch_id or input_hash(expenses_data)
         
         # Policy validation
         print("3. Running policy validation...")
-        policy_results = self.agents['policy'].batch_validate(expenses_data)
+        policy_results = self._checkpointed(
+            'policy', batch_key, lambda: self.agents['policy'].batch_validate(expenses_data)
+        )
         
         # ENHANCED FRAUD DETECTION
         print("4. Running ADVANCED rule-based fraud detection...")
-        rule_based_results = self.advanced_fraud_detector.analyze_expenses(expenses_data)
+        rule_based_results = self._checkpointed(
+            'rule_based_fraud', batch_key, lambda: self.advanced_fraud_detector.analyze_expenses(expenses_data, batch_id=batch_id)
+        )
         
         # ML fraud detection (if available)
         if USE_ENHANCED_AGENT:
             print("4a. Running ML fraud detection...")
-            fraud_results = self.agents['fraud'].detect_anomalies(expenses_data)
+            fraud_results = self._checkpointed(
+                'ml_fraud', batch_key, lambda: self.agents['fraud'].detect_anomalies(expenses_data)
+            )
         else:
             fraud_results = pd.DataFrame()
         
         # NEW: Generate human-friendly summaries
         print("5. Generating human-friendly explanations...")
-        summary_results = self.summary_processor.generate_summaries(expenses_data, rule_based_results)
+        summary_results = self._checkpointed(
+            'summaries', batch_key,
+            lambda: self.summary_processor.generate_summaries(expenses_data, rule_based_results)
+        )
         
         # Behavioral analysis
         print("6. Analyzing behavioral patterns...")
@@ -541,37 +735,31 @@ class EnterpriseExpenseAuditSystem:
         
         # Generate audit report
         print("7. Generating enhanced audit report...")
-        audit_report = self.agents['audit'].generate_audit_report(
-            policy_results, fraud_results, behavioral_patterns
+        audit_report = self._checkpointed(
+            'audit_report', batch_key,
+            lambda: self._audit_report(policy_results, fraud_results, rule_based_results, behavioral_patterns)
         )
         
-        # Add rule-based results to audit report
-        if not rule_based_results.empty:
-            high_risk_fraud = rule_based_results[rule_based_results['fraud_decision'].isin(['REJECT', 'NEEDS_REVIEW'])]
-            audit_report['advanced_fraud'] = {
-                'rule_based_high_risk': len(high_risk_fraud),
-                'duplicates_detected': rule_based_results['is_duplicate'].sum(),
-                'high_risk_vendors': rule_based_results[rule_based_results['vendor_risk_score'] > 50].shape[0],
-                'total_fraud_cases': len(high_risk_fraud),
-                'fraud_decisions': {
-                    'REJECT': len(rule_based_results[rule_based_results['fraud_decision'] == 'REJECT']),
-                    'NEEDS_REVIEW': len(rule_based_results[rule_based_results['fraud_decision'] == 'NEEDS_REVIEW']),
-                    'APPROVE': len(rule_based_results[rule_based_results['fraud_decision'] == 'APPROVE'])
-                }
-            }
-        
         # Generate compliance report
         print("8. Generating compliance report...")
-        compliance_report = self.agents['reporting'].generate_compliance_report(
-            policy_results, fraud_results
+        compliance_report = self._checkpointed(
+            'compliance_report', batch_key,
+            lambda: self.agents['reporting'].generate_compliance_report(policy_results, fraud_results)
         )
         
         # Generate visualizations
-        print("9. Creating visualizations...")
-        self.agents['reporting'].generate_visualizations(policy_results, fraud_results)
+        if self.config.VISUALIZATIONS_ENABLED:
+            print("9. Creating visualizations...")
+            self.agents['visualization'].generate_visualizations(policy_results, fraud_results)
+        else:
+            print("9. Skipping visualizations (set VISUALIZATIONS_ENABLED=1 to render charts)")
+        
+        # Mergeable partial for period reports
+        report_aggregate = ReportAggregate.from_results(policy_results, rule_based_results, fraud_results, batch_id)
+        daily_aggregates = ReportAggregate.by_expense_date(policy_results, rule_based_results, fraud_results, batch_id)
         
-        # Store expenses for future duplicate detection
-        self.memory.historical_expenses.extend(expenses_data)
+        # Store expenses for future duplicate detection and baselines
+        self.memory.add_expenses(expenses_data, batch_id)
         
         return {
             'field_extraction': expenses_data,
@@ -581,7 +769,9 @@ class EnterpriseExpenseAuditSystem:
             'summary_results': summary_results,  # NEW: Human-friendly summaries
             'behavioral_patterns': behavioral_patterns,
             'audit_report': audit_report,
-            'compliance_report': compliance_report
+            'compliance_report': compliance_report,
+            'report_aggregate': report_aggregate,
+            'daily_aggregates': daily_aggregates
         }
 
 def generate_fraud_test_receipts(num_receipts=10):
@@ -744,7 +934,7 @@ def display_results(results):
         for rec in audit['recommendations'][:3]:
             print(f"   [{rec['priority']}] {rec['description']}")
     
-    print(f"\n📈 Reports and visualizations have been generated")
+    print(f"\n📈 Reports have been generated")
     print("="*60)
 
 def main():
@@ -762,7 +952,14 @@ def main():
     
     # Process raw receipts through the entire pipeline
     print("\n🔄 Starting end-to-end processing...")
-    results = audit_system.process_raw_receipts(sample_receipts)
+    config = audit_system.config
+    profiling = PROFILER.enabled or bool(config.PROFILE_CPROFILE_FILE)
+    run_context = (
+        PROFILER.profile_run(config.PROFILE_METRICS_FILE, config.PROFILE_CPROFILE_FILE)
+        if profiling else nullcontext()
+    )
+    with run_context:
+        results = audit_system.process_raw_receipts(sample_receipts)
     
     # Display results
     display_results(results)
@@ -792,9 +989,23 @@ def main():
     with open('reports/audit_report.json', 'w') as f:
         json.dump(results['audit_report'], f, default=str, indent=2)
     
+    # Append this batch's per-day aggregates so period reports never re-run old batches
+    aggregate_store = AggregateStore(audit_system.config.REPORT_AGGREGATES_FILE)
+    aggregate_store.extend(results['daily_aggregates'])
+    with open('reports/period_report.json', 'w') as f:
+        json.dump(aggregate_store.period_report(), f, default=str, indent=2)
+    
     # Save memory for future sessions
     audit_system.memory.save_memory('reports/system_memory.json')
     
+    if audit_system.checkpoints is not None:
+        overhead = audit_system.checkpoints.overhead()
+        print(f"\n💾 Checkpoints: {overhead['hits']} reused, {overhead['misses']} written, "
+              f"{overhead['overhead_seconds']:.3f}s overhead ({overhead['overhead_pct']:.1f}% of stage time)")
+    
+    # Wait for background chart rendering and release worker processes
+    audit_system.close()
+    
     print("\n✅ Audit completed successfully!")
     print("📁 Results saved to:")
     print("   - reports/extracted_expenses.csv")
@@ -803,8 +1014,15 @@ def main():
     print("   - reports/rule_based_fraud_results.csv")
     print("   - reports/summary_results.csv")  # NEW
     print("   - reports/audit_report.json")
+    print("   - reports/report_aggregates.jsonl")
+    print("   - reports/period_report.json")
     print("   - reports/system_memory.json")
-    print("   - reports/audit_visualizations.png")
+    if config.VISUALIZATIONS_ENABLED:
+        print(f"   - reports/audit_visualizations.{getattr(config, 'VISUALIZATION_FORMAT', 'png')}")
+    if profiling:
+        print(f"   - {config.PROFILE_METRICS_FILE}")
+        if config.PROFILE_CPROFILE_FILE:
+            print(f"   - {config.PROFILE_CPROFILE_FILE}")
     
     # Show sample extracted data
     print(f"\n🎯 SAMPLE EXTRACTED DATA:")
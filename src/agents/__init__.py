@@ -1,9 +1,23 @@
-from .field_extraction_agent import FieldExtractionAgent
-from .policy_agent import PolicyAgent
-from .fraud_detection_agent import FraudDetectionAgent
-from .summary_agent import SummaryAgent
-from .audit_agent import AuditAgent
-from .reporting_agent import ReportingAgent
+import importlib
+import os
+import sys
+
+# The agents import sibling packages under src/ (utils, policy, fraud_detection,
+# models) top-level, so src/ is put on the path once for the whole package
+_SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _SRC_DIR not in sys.path:
+    sys.path.append(_SRC_DIR)
+
+# Agents are imported on first use so light entry points (e.g. extraction-only
+# runs) do not pay for pandas, scikit-learn or matplotlib at startup
+_AGENT_MODULES = {
+    'FieldExtractionAgent': '.field_extraction_agent',
+    'PolicyAgent': '.policy_agent',
+    'FraudDetectionAgent': '.fraud_detection_agent',
+    'SummaryAgent': '.summary_agent',
+    'AuditAgent': '.audit_agent',
+    'ReportingAgent': '.reporting_agent'
+}
 
 __all__ = [
     'FieldExtractionAgent',
@@ -12,4 +26,10 @@ __all__ = [
     'SummaryAgent',
     'AuditAgent',
     'ReportingAgent'
-]
\ No newline at end of file
+]
+
+def __getattr__(name):
+    if name in _AGENT_MODULES:
+        module = importlib.import_module(_AGENT_MODULES[name], __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
@@ -1,73 +1,109 @@
+import json
 import pandas as pd
+from collections import deque
 from typing import Dict, List
 from datetime import datetime
+from utils.profiling import profile_stage
 
 class AuditAgent:
     def __init__(self, memory_manager, config):
         self.memory = memory_manager
         self.config = config
-        self.audit_trails = []
+        # Recent reports stay in memory; the full history goes to the spill file when configured
+        self.audit_trails = deque(maxlen=getattr(config, 'AUDIT_TRAIL_SIZE', 50))
+        self.audit_trail_path = getattr(config, 'AUDIT_TRAIL_SPILL_PATH', None)
     
+    @profile_stage()
     def generate_audit_report(self, policy_results, fraud_results, behavioral_patterns):
         """Generate comprehensive audit report"""
         
         # Calculate key metrics
-        total_expenses = len(policy_results)
-        policy_violations = len(policy_results[policy_results['violation_count'] > 0])
-        anomalies_detected = len(fraud_results[fraud_results['is_anomaly'] == True]) if not fraud_results.empty else 0
-        behavioral_issues = len(behavioral_patterns)
-        
-        # Risk assessment
-        high_risk_expenses = policy_results[
-            (policy_results['violation_count'] > 0) | 
-            (policy_results['requires_review'] == True)
-        ]
+        metrics = self._compute_metrics(policy_results, fraud_results, behavioral_patterns)
+        total_expenses = metrics['total_expenses']
+        policy_violations = metrics['policy_violations']
         
         # Generate report
         audit_report = {
             'report_date': datetime.now(),
             'summary': {
                 'total_expenses_audited': total_expenses,
-                'policy_violations': int(policy_violations),
-                'anomalies_detected': int(anomalies_detected),
-                'behavioral_patterns_found': int(behavioral_issues),
+                'policy_violations': policy_violations,
+                'anomalies_detected': metrics['anomalies_detected'],
+                'behavioral_patterns_found': len(behavioral_patterns),
                 'compliance_rate': ((total_expenses - policy_violations) / total_expenses * 100) if total_expenses > 0 else 100
             },
             'risk_assessment': {
-                'high_risk_count': len(high_risk_expenses),
-                'medium_risk_count': len(behavioral_patterns[behavioral_patterns['risk_level'] == 'Medium']),
-                'low_risk_count': len(behavioral_patterns[behavioral_patterns['risk_level'] == 'Low'])
+                'high_risk_count': metrics['high_risk_count'],
+                'medium_risk_count': metrics['behavior_risk_levels'].get('Medium', 0),
+                'low_risk_count': metrics['behavior_risk_levels'].get('Low', 0)
             },
-            'top_violations': self._get_top_violations(policy_results),
-            'recommendations': self._generate_recommendations(policy_results, fraud_results, behavioral_patterns)
+            'top_violations': metrics['top_violations'],
+            'recommendations': self._generate_recommendations(metrics)
         }
         
         # Store audit trail
-        self.audit_trails.append(audit_report)
+        self._store_audit_trail(audit_report)
         
         return audit_report
     
-    def _get_top_violations(self, policy_results):
-        """Extract top policy violations"""
-        all_violations = []
-        for violations in policy_results['violations']:
-            all_violations.extend(violations)
+    def _compute_metrics(self, policy_results, fraud_results, behavioral_patterns):
+        """Compute every count the report needs with one pass per input frame"""
+        has_violations = policy_results['violation_count'] > 0
+        high_risk = has_violations | (policy_results['requires_review'] == True)
+        
+        anomalies_detected = 0
+        if not fraud_results.empty:
+            anomalies_detected = int((fraud_results['is_anomaly'] == True).sum())
         
-        violation_counts = {}
-        for violation in all_violations:
-            if violation in violation_counts:
-                violation_counts[violation] += 1
-            else:
-                violation_counts[violation] = 1
+        behavior_risk_levels = {}
+        if not behavioral_patterns.empty and 'risk_level' in behavioral_patterns:
+            behavior_risk_levels = behavioral_patterns['risk_level'].value_counts().to_dict()
+        
+        return {
+            'total_expenses': len(policy_results),
+            'policy_violations': int(has_violations.sum()),
+            'high_risk_count': int(high_risk.sum()),
+            'anomalies_detected': anomalies_detected,
+            'behavior_risk_levels': behavior_risk_levels,
+            'top_violations': self._get_top_violations(policy_results)
+        }
+    
+    def _get_top_violations(self, policy_results, n=5):
+        """Extract top policy violations"""
+        # First-seen order breaks ties, matching a stable sort over a running count
+        violation_counts = policy_results['violations'].explode().dropna().value_counts(sort=False)
+        violation_counts = violation_counts.sort_values(ascending=False, kind='stable').head(n)
+        return [(violation, int(count)) for violation, count in violation_counts.items()]
+    
+    def _store_audit_trail(self, audit_report):
+        self.audit_trails.append(audit_report)
+        if self.audit_trail_path:
+            with open(self.audit_trail_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(audit_report, default=str) + '\n')
+    
+    def get_audit_history(self) -> List[Dict]:
+        """All stored audit reports, oldest first (from the spill file when configured)"""
+        if not self.audit_trail_path:
+            return list(self.audit_trails)
         
-        return sorted(violation_counts.items(), key=lambda x: x[1], reverse=True)[:5]
+        history = []
+        try:
+            with open(self.audit_trail_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        history.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        continue  # tolerate a torn final line
+        except FileNotFoundError:
+            pass
+        return history
     
-    def _generate_recommendations(self, policy_results, fraud_results, behavioral_patterns):
+    def _generate_recommendations(self, metrics):
         """Generate recommendations based on audit findings"""
         recommendations = []
         
         # Policy violation recommendations
-        policy_violation_count = len(policy_results[policy_results['violation_count'] > 0])
+        policy_violation_count = metrics['policy_violations']
         if policy_violation_count > 0:
             recommendations.append({
                 'type': 'policy_training',
@@ -76,23 +112,20 @@ class AuditAgent:
             })
         
         # Anomaly detection recommendations
-        if not fraud_results.empty:
-            anomaly_count = fraud_results['is_anomaly'].sum()
-            if anomaly_count > 0:
-                recommendations.append({
-                    'type': 'manual_review',
-                    'priority': 'High',
-                    'description': f'Manually review {anomaly_count} anomalous expenses'
-                })
+        anomaly_count = metrics['anomalies_detected']
+        if anomaly_count > 0:
+            recommendations.append({
+                'type': 'manual_review',
+                'priority': 'High',
+                'description': f'Manually review {anomaly_count} anomalous expenses'
+            })
         
         # Behavioral pattern recommendations
-        if not behavioral_patterns.empty:
-            high_risk_patterns = behavioral_patterns[behavioral_patterns['risk_level'] == 'High']
-            if len(high_risk_patterns) > 0:
-                recommendations.append({
-                    'type': 'behavior_monitoring',
-                    'priority': 'Medium',
-                    'description': 'Implement enhanced monitoring for employees with suspicious behavioral patterns'
-                })
+        if metrics['behavior_risk_levels'].get('High', 0) > 0:
+            recommendations.append({
+                'type': 'behavior_monitoring',
+                'priority': 'Medium',
+                'description': 'Implement enhanced monitoring for employees with suspicious behavioral patterns'
+            })
         
-        return recommendations
\ No newline at end of file
+        return recommendations
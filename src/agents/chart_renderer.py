@@ -0,0 +1,83 @@
+import os
+from typing import Dict
+
+SUPPORTED_FORMATS = ('png', 'svg')
+
+
+def build_chart_data(category_breakdown: Dict, policy_results, fraud_results, bins: int = 20) -> Dict:
+    """
+    Reduce audit results to the small, picklable summary the charts need
+
+    Only category totals, top violation counts, a pre-binned amount
+    histogram and risk level counts are kept, so rendering in another
+    process never has to ship or rescan the full DataFrames.
+    """
+    import numpy as np
+
+    violation_counts = policy_results['violations'].explode().dropna().value_counts().head(8)
+    amounts = policy_results['amount'].dropna().to_numpy(dtype=float)
+    if len(amounts):
+        hist_counts, hist_edges = np.histogram(amounts, bins=bins)
+    else:
+        hist_counts, hist_edges = np.array([]), np.array([])
+    risk_counts = fraud_results['risk_level'].value_counts() if not fraud_results.empty else {}
+
+    return {
+        'categories': [
+            {'category': category, 'compliant': int(stats['compliant']), 'non_compliant': int(stats['non_compliant'])}
+            for category, stats in category_breakdown.items()
+        ],
+        'violation_types': {str(k): int(v) for k, v in violation_counts.items()},
+        'amount_histogram': {'counts': hist_counts.tolist(), 'edges': hist_edges.tolist()},
+        'risk_levels': {str(k): int(v) for k, v in dict(risk_counts).items()}
+    }
+
+
+def render_charts(chart_data: Dict, output_path: str, dpi: int = 100, fmt: str = 'png') -> str:
+    """Draw the 2x2 audit dashboard from ``build_chart_data`` output on the Agg backend"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    directory = os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    plt.style.use('seaborn-v0_8')
+    fig, axes = plt.subplots(2, 2, figsize=(15, 12))
+
+    # 1. Compliance by Category
+    categories = chart_data['categories']
+    if categories:
+        positions = range(len(categories))
+        width = 0.4
+        axes[0, 0].bar([p - width / 2 for p in positions], [c['compliant'] for c in categories], width, label='Compliant')
+        axes[0, 0].bar([p + width / 2 for p in positions], [c['non_compliant'] for c in categories], width, label='Non-Compliant')
+        axes[0, 0].set_xticks(list(positions))
+        axes[0, 0].set_xticklabels([c['category'] for c in categories], rotation=90)
+        axes[0, 0].legend()
+    axes[0, 0].set_title('Compliance by Category')
+
+    # 2. Violation Types
+    violation_types = chart_data['violation_types']
+    if violation_types:
+        axes[0, 1].pie(list(violation_types.values()), labels=list(violation_types.keys()))
+    axes[0, 1].set_title('Top Violation Types')
+
+    # 3. Amount Distribution (already binned)
+    histogram = chart_data['amount_histogram']
+    if histogram['counts']:
+        edges = histogram['edges']
+        axes[1, 0].hist(edges[:-1], bins=edges, weights=histogram['counts'])
+    axes[1, 0].set_title('Expense Amount Distribution')
+
+    # 4. Risk Levels
+    risk_levels = chart_data['risk_levels']
+    if risk_levels:
+        axes[1, 1].bar(list(risk_levels.keys()), list(risk_levels.values()), color=['green', 'orange', 'red'][:len(risk_levels)])
+    axes[1, 1].set_title('Risk Level Distribution')
+
+    fig.tight_layout()
+    fig.savefig(output_path, dpi=dpi, format=fmt, bbox_inches='tight')
+    plt.close(fig)
+    return output_path
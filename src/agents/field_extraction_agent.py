@@ -1,9 +1,9 @@
 import re
 import json
-import pandas as pd
-import numpy as np
+import random
 from datetime import datetime
 from typing import List, Dict
+from utils.profiling import profile_stage
 
 class FieldExtractionAgent:
     def __init__(self):
@@ -104,8 +104,9 @@ class FieldExtractionAgent:
         
         # Default employee IDs for demo
         employees = [f'E{str(i).zfill(3)}' for i in range(1, 21)]
-        return np.random.choice(employees)
+        return random.choice(employees)
     
+    @profile_stage()
     def process_raw_receipts(self, raw_receipts):
         """Convert raw receipts to structured expense data"""
         structured_expenses = []
@@ -136,7 +137,7 @@ class FieldExtractionAgent:
                 'merchant': vendor,
                 'location': self._extract_location(receipt),
                 'description': f'Expense at {vendor} for {category}',
-                'hour': np.random.randint(6, 23)  # Random hour for demo
+                'hour': random.randint(6, 22)  # Random hour for demo
             }
             
             structured_expenses.append(expense)
@@ -155,4 +156,4 @@ class FieldExtractionAgent:
             if location.lower() in text_lower:
                 return location
         
-        return np.random.choice(locations)
\ No newline at end of file
+        return random.choice(locations)
\ No newline at end of file
@@ -1,16 +1,38 @@
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import IsolationForest
-from sklearn.preprocessing import StandardScaler
 from typing import Dict, List
 import warnings
 warnings.filterwarnings('ignore')
 
 # Import the new fraud detection components
-import sys
-import os
-sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-from fraud_detection import DuplicateDetector, VendorRiskEngine, BehaviorAnalyzer, FraudScoreCalculator
+import zlib
+from fraud_detection import DuplicateDetector, VendorRiskEngine, BehaviorAnalyzer, FraudScoreCalculator, CollusionGraphAnalyzer
+from utils.profiling import profile_stage
+from models import Expense, ExpenseBatch
+from utils.dates import parse_date_column, parse_hour_of_day
+
+def partition_by_employee(employee_ids: List[str], partitions: int) -> List[List[int]]:
+    """Row indices grouped by a stable hash of the employee id (empty partitions dropped)"""
+    groups = [[] for _ in range(max(partitions, 1))]
+    for i, employee_id in enumerate(employee_ids):
+        groups[zlib.crc32(str(employee_id).encode()) % len(groups)].append(i)
+    return [group for group in groups if group]
+
+
+# Per-process state for partitioned rule-based scoring
+_worker_agent = None
+_worker_history = None
+
+
+def _init_rule_worker(config, historical_records):
+    global _worker_agent, _worker_history
+    _worker_agent = FraudDetectionAgent(None, config)
+    _worker_history = historical_records
+
+
+def _score_partition(items) -> List[Dict]:
+    return [_worker_agent._score_expense(*item, _worker_history) for item in items]
+
 
 class FraudDetectionAgent:
     def __init__(self, memory_manager, config):
@@ -18,9 +40,12 @@ class FraudDetectionAgent:
         self.config = config
         
         # ML-based anomaly detection (your existing code)
-        self.anomaly_detector = IsolationForest(contamination=0.1, random_state=42)
-        self.scaler = StandardScaler()
+        # scikit-learn is only imported once anomaly detection is first used
+        self._anomaly_detector = None
+        self._scaler = None
         self.is_fitted = False
+        # Whether the model was fitted on features informed by amount baselines
+        self.fitted_on_baselines = False
         self.detected_frauds = []
         
         # Rule-based fraud detection (new components)
@@ -28,26 +53,49 @@ class FraudDetectionAgent:
         self.vendor_risk_engine = VendorRiskEngine()
         self.behavior_analyzer = BehaviorAnalyzer()
         self.fraud_calculator = FraudScoreCalculator()
+        self.collusion_analyzer = CollusionGraphAnalyzer()
         
+    @property
+    def anomaly_detector(self):
+        if self._anomaly_detector is None:
+            from sklearn.ensemble import IsolationForest
+            self._anomaly_detector = IsolationForest(contamination=0.1, random_state=42)
+        return self._anomaly_detector
+    
+    @property
+    def scaler(self):
+        if self._scaler is None:
+            from sklearn.preprocessing import StandardScaler
+            self._scaler = StandardScaler()
+        return self._scaler
+    
+    @profile_stage()
     def extract_features(self, expenses: List[Dict]) -> pd.DataFrame:
         """Extract features for anomaly detection - YOUR EXISTING CODE"""
         features = []
         
-        for expense in expenses:
+        # Date features: the whole column is parsed at once by the shared parser
+        raw_dates = [expense.get('date') for expense in expenses]
+        parsed_dates = parse_date_column(raw_dates)
+        now = pd.Timestamp.now()
+        # Streaming employee/category baselines, when the memory keeps them
+        baselines = getattr(self.memory, 'amount_baselines', None)
+        
+        for expense, expense_date, parsed_date in zip(expenses, raw_dates, parsed_dates):
             # Basic features
             amount = expense.get('amount', 0)
             description = expense.get('description', '')
             
-            # Date features
-            expense_date = expense.get('date')
             if isinstance(expense_date, str):
-                try:
-                    expense_date = pd.to_datetime(expense_date)
-                except:
-                    expense_date = pd.Timestamp.now()
-            
-            hour = expense_date.hour if hasattr(expense_date, 'hour') else 12
-            weekday = expense_date.weekday() if hasattr(expense_date, 'weekday') else 0
+                # Date-only strings parse to midnight (timestamps keep their hour); unparseable ones count as now
+                if np.isnat(parsed_date):
+                    hour, weekday = now.hour, now.weekday()
+                else:
+                    hour = parse_hour_of_day(expense_date) or 0
+                    weekday = parsed_date.astype(object).weekday()
+            else:
+                hour = expense_date.hour if hasattr(expense_date, 'hour') else 12
+                weekday = expense_date.weekday() if hasattr(expense_date, 'weekday') else 0
             is_weekend = 1 if weekday >= 5 else 0
             
             # Category encoding
@@ -58,11 +106,17 @@ class FraudDetectionAgent:
             threshold = self.config.EXPENSE.thresholds.get(category, 1000) if hasattr(self.config, 'EXPENSE') else 1000
             amount_ratio = amount / threshold if threshold > 0 else 0
             
-            # Employee behavior features
+            # Employee behavior features: relative deviation from the employee's average,
+            # plus z-scores and percentile against the streaming baselines
             employee_id = expense.get('employee_id')
+            employee_stats = baselines.employee(employee_id) if baselines else None
+            category_stats = baselines.category(category) if baselines else None
             employee_data = self.memory.get_employee_behavior(employee_id) if hasattr(self.memory, 'get_employee_behavior') else {}
             avg_amount = employee_data.get('total_amount', 0) / max(employee_data.get('total_expenses', 1), 1)
             amount_deviation = (amount - avg_amount) / max(avg_amount, 1) if avg_amount > 0 else 0
+            amount_zscore = employee_stats.zscore(amount) if employee_stats is not None else 0.0
+            category_zscore = category_stats.zscore(amount) if category_stats is not None else 0.0
+            amount_percentile = employee_stats.percentile(amount) / 100 if employee_stats is not None else 0.5
             
             feature_vector = [
                 amount,
@@ -72,13 +126,17 @@ class FraudDetectionAgent:
                 is_weekend,
                 category_enc,
                 amount_ratio,
-                amount_deviation
+                amount_deviation,
+                amount_zscore,
+                category_zscore,
+                amount_percentile
             ]
             features.append(feature_vector)
         
         return pd.DataFrame(features, columns=[
             'amount', 'description_length', 'hour', 'weekday', 
-            'is_weekend', 'category_enc', 'amount_ratio', 'amount_deviation'
+            'is_weekend', 'category_enc', 'amount_ratio', 'amount_deviation',
+            'amount_zscore', 'category_zscore', 'amount_percentile'
         ])
     
     def _get_category_encoding(self, category: str) -> int:
@@ -86,6 +144,7 @@ class FraudDetectionAgent:
         categories = getattr(self.config.EXPENSE, 'categories', ['Travel', 'Meals', 'Entertainment', 'Supplies', 'Software', 'Accommodation', 'Shopping', 'Other'])
         return categories.index(category) if category in categories else len(categories)
     
+    @profile_stage()
     def detect_anomalies(self, expenses: List[Dict]) -> pd.DataFrame:
         """Detect anomalous expenses using machine learning - YOUR EXISTING CODE"""
         if len(expenses) < 5:
@@ -94,10 +153,15 @@ class FraudDetectionAgent:
         try:
             features_df = self.extract_features(expenses)
             
-            if not self.is_fitted:
+            # The first batch sees no history, so its baseline features are constant;
+            # refit once baselines exist so the model learns from them
+            baselines = getattr(self.memory, 'amount_baselines', None)
+            has_baselines = bool(baselines is not None and baselines.employees)
+            if not self.is_fitted or (has_baselines and not self.fitted_on_baselines):
                 features_scaled = self.scaler.fit_transform(features_df)
                 anomalies = self.anomaly_detector.fit_predict(features_scaled)
                 self.is_fitted = True
+                self.fitted_on_baselines = has_baselines
             else:
                 features_scaled = self.scaler.transform(features_df)
                 anomalies = self.anomaly_detector.predict(features_scaled)
@@ -145,74 +209,104 @@ class FraudDetectionAgent:
                 'detection_method': 'ML_Anomaly'
             } for exp in expenses])
     
+    @profile_stage()
     def detect_rule_based_fraud(self, expenses: List[Dict]) -> pd.DataFrame:
         """NEW: Detect fraud using rule-based approaches"""
         if not expenses:
             return pd.DataFrame()
             
-        results = []
         historical_expenses = getattr(self.memory, 'get_historical_expenses', lambda: [])()
+        # Parse amounts, dates and hashes once per record instead of once per comparison
+        historical_records = [Expense.from_dict(expense) for expense in historical_expenses]
+        batch = ExpenseBatch.from_records(expenses)
+        batch_duplicates = self._batch_duplicate_results(batch, historical_records)
+        if batch_duplicates is None:
+            batch_duplicates = [None] * len(expenses)
         
-        for expense in expenses:
-            # Convert to the format expected by rule-based detectors
-            expense_dict = {
-                'vendor': expense.get('merchant', ''),
-                'amount': expense.get('amount', 0),
-                'amount_raw': f"₹{expense.get('amount', 0):.2f}",
-                'date': expense.get('date', ''),
-                'date_raw': expense.get('date', ''),
-                'category': expense.get('category', ''),
-                'category_raw': expense.get('category', ''),
-                'raw_text': expense.get('description', ''),
-                'employee_id': expense.get('employee_id', '')
-            }
-            
-            # Run rule-based fraud detection
+        items = list(zip(expenses, batch, batch_duplicates))
+        workers = getattr(self.config, 'RULE_BASED_WORKERS', 1)
+        if workers > 1 and len(items) >= getattr(self.config, 'RULE_BASED_PARALLEL_MIN_ROWS', 2000):
+            results = self._score_partitioned(items, historical_records, workers)
+        else:
+            results = [self._score_expense(*item, historical_records) for item in items]
+        
+        return pd.DataFrame(results)
+    
+    def _score_expense(self, expense, record, duplicate_result, historical_records) -> Dict:
+        """Duplicate, vendor and behaviour checks plus the final score for one expense"""
+        # Run rule-based fraud detection
+        if duplicate_result is None:
             duplicate_result = self.duplicate_detector.detect_duplicates(
-                expense_dict, historical_expenses
+                record, historical_records
             )
-            
-            vendor_risk_result = self.vendor_risk_engine.assess_vendor_risk(
-                vendor_name=expense_dict.get('vendor', ''),
-                amount=expense_dict.get('amount_raw', ''),
-                date_str=expense_dict.get('date_raw', ''),
-                category=expense_dict.get('category_raw', ''),
-                historical_data=historical_expenses
-            )
-            
-            behavior_risk_result = self.behavior_analyzer.analyze_behavior(
-                expense_dict, historical_expenses
-            )
-            
-            # Calculate final fraud score
-            fraud_result = self.fraud_calculator.calculate_fraud_score(
-                duplicate_result=duplicate_result,
-                vendor_risk_result=vendor_risk_result,
-                behavior_risk_result=behavior_risk_result
-            )
-            
-            # Combine results
-            result = {
-                'expense_id': expense.get('id'),
-                'employee_id': expense.get('employee_id'),
-                'amount': expense.get('amount'),
-                'category': expense.get('category'),
-                'is_anomaly': fraud_result['final_risk_score'] >= 70,  # Needs review or reject
-                'anomaly_score': fraud_result['final_risk_score'] / 100.0,
-                'risk_level': 'High' if fraud_result['final_risk_score'] >= 70 else 'Low',
-                'detection_method': 'Rule_Based',
-                'fraud_score': fraud_result['final_risk_score'],
-                'fraud_decision': fraud_result['decision'],
-                'fraud_reasons': fraud_result['reasons'],
-                'is_duplicate': duplicate_result.get('is_duplicate', False),
-                'vendor_risk_score': vendor_risk_result.get('vendor_risk_score', 0),
-                'behavior_risk_score': behavior_risk_result.get('behavior_risk_score', 0)
-            }
-            
-            results.append(result)
         
-        return pd.DataFrame(results)
+        vendor_risk_result = self.vendor_risk_engine.assess_vendor_risk(
+            vendor_name=record.vendor,
+            amount=record.amount,
+            date_str=record.date_raw,
+            category=record.category,
+            historical_data=historical_records
+        )
+        
+        behavior_risk_result = self.behavior_analyzer.analyze_behavior(
+            record, historical_records
+        )
+        
+        # Calculate final fraud score
+        fraud_result = self.fraud_calculator.calculate_fraud_score(
+            duplicate_result=duplicate_result,
+            vendor_risk_result=vendor_risk_result,
+            behavior_risk_result=behavior_risk_result
+        )
+        
+        # Combine results
+        return {
+            'expense_id': expense.get('id'),
+            'employee_id': expense.get('employee_id'),
+            'amount': expense.get('amount'),
+            'category': expense.get('category'),
+            'is_anomaly': fraud_result['final_risk_score'] >= 70,  # Needs review or reject
+            'anomaly_score': fraud_result['final_risk_score'] / 100.0,
+            'risk_level': 'High' if fraud_result['final_risk_score'] >= 70 else 'Low',
+            'detection_method': 'Rule_Based',
+            'fraud_score': fraud_result['final_risk_score'],
+            'fraud_decision': fraud_result['decision'],
+            'fraud_reasons': fraud_result['reasons'],
+            'is_duplicate': duplicate_result.get('is_duplicate', False),
+            'vendor_risk_score': vendor_risk_result.get('vendor_risk_score', 0),
+            'behavior_risk_score': behavior_risk_result.get('behavior_risk_score', 0)
+        }
+    
+    def _score_partitioned(self, items, historical_records, workers) -> List[Dict]:
+        """Score employee partitions in a process pool; results come back in input order"""
+        from concurrent.futures import ProcessPoolExecutor
+        
+        partitions = partition_by_employee(
+            [record.employee_id for _, record, _ in items],
+            workers * getattr(self.config, 'RULE_BASED_PARTITIONS_PER_WORKER', 4)
+        )
+        results = [None] * len(items)
+        # History goes to each worker once, not with every partition
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_rule_worker,
+                                 initargs=(self.config, historical_records)) as pool:
+            futures = [(indices, pool.submit(_score_partition, [items[i] for i in indices]))
+                       for indices in partitions]
+            for indices, future in futures:
+                for i, result in zip(indices, future.result()):
+                    results[i] = result
+        return results
     
+    def _batch_duplicate_results(self, batch, historical_records):
+        """Duplicate results for the whole batch in batch mode, else None (pairwise per expense)"""
+        mode = getattr(self.config, 'DUPLICATE_DETECTION_MODE', 'pairwise')
+        min_pairs = getattr(self.config, 'DUPLICATE_BATCH_MIN_PAIRS', 250000)
+        if mode == 'pairwise' or (mode == 'auto' and len(batch) * len(historical_records) < min_pairs):
+            return None
+        return self.duplicate_detector.detect_duplicates_batch(
+            batch, historical_records, top_k=getattr(self.config, 'DUPLICATE_TOP_K', 5)
+        )
+    
+    @profile_stage()
     def detect_behavioral_patterns(self, expenses_df: pd.DataFrame) -> pd.DataFrame:
         """Enhanced behavioral pattern detection"""
         if expenses_df.empty:
@@ -251,6 +345,28 @@ class FraudDetectionAgent:
         
         return pd.DataFrame(patterns)
     
+    @profile_stage()
+    def detect_collusion_rings(self, expenses: List[Dict]) -> pd.DataFrame:
+        """Cross-employee clusters (shared obscure vendors or receipts) over history plus this batch"""
+        historical_expenses = list(getattr(self.memory, 'get_historical_expenses', lambda: [])())
+        if not expenses and not historical_expenses:
+            return pd.DataFrame()
+        
+        graph = self.collusion_analyzer.analyze_expenses(historical_expenses + list(expenses))
+        
+        # Expenses of this batch that are one of a cluster's suspicious edges
+        flagged = {}
+        for expense, cluster in zip(expenses, graph['expense_cluster'][len(historical_expenses):].tolist()):
+            if cluster >= 0:
+                flagged.setdefault(cluster, []).append(expense.get('id'))
+        
+        return pd.DataFrame([{
+            **cluster,
+            'expense_ids': flagged.get(i, []),
+            'risk_level': 'High',
+            'detection_method': 'Graph_Analysis'
+        } for i, cluster in enumerate(graph['clusters'])])
+    
     def comprehensive_fraud_detection(self, expenses: List[Dict]) -> Dict:
         """NEW: Combine ML and rule-based approaches for comprehensive fraud detection"""
         print("Running comprehensive fraud detection...")
@@ -268,16 +384,22 @@ class FraudDetectionAgent:
         behavioral_patterns = self.detect_behavioral_patterns(expenses_df)
         print(f"Behavioral patterns found: {len(behavioral_patterns)}")
         
+        # Run cross-employee graph analysis
+        collusion_clusters = self.detect_collusion_rings(expenses)
+        print(f"Collusion clusters found: {len(collusion_clusters)}")
+        
         # Combine results
         combined_results = {
             'ml_anomalies': ml_results,
             'rule_based_fraud': rule_results,
             'behavioral_patterns': behavioral_patterns,
+            'collusion_clusters': collusion_clusters,
             'summary': {
                 'total_expenses': len(expenses),
                 'ml_anomalies_count': ml_results['is_anomaly'].sum(),
                 'rule_based_fraud_count': rule_results[rule_results['is_anomaly']].shape[0],
                 'behavioral_patterns_count': len(behavioral_patterns),
+                'collusion_clusters_count': len(collusion_clusters),
                 'combined_risk_count': len(set(ml_results[ml_results['is_anomaly']]['expense_id']).union(
                     set(rule_results[rule_results['is_anomaly']]['expense_id'])
                 ))
@@ -0,0 +1,194 @@
+import asyncio
+import json
+import os
+import re
+import urllib.request
+from typing import Dict, List, Optional, Tuple
+
+from .summary_agent import ReasonClassifier
+
+
+class HTTPModelClient:
+    """
+    Client for a local OpenAI-compatible chat endpoint (llama.cpp server,
+    Ollama, vLLM, ...). Any object with an async ``complete(prompt)`` method
+    can be used instead.
+    """
+
+    def __init__(self, endpoint: str, model: str = "local-model", temperature: float = 0.1, timeout: float = 30.0):
+        self.url = endpoint.rstrip('/') + '/v1/chat/completions'
+        self.model = model
+        self.temperature = temperature
+        self.timeout = timeout
+
+    def _post(self, prompt: str) -> str:
+        body = json.dumps({
+            'model': self.model,
+            'temperature': self.temperature,
+            'messages': [{'role': 'user', 'content': prompt}]
+        }).encode('utf-8')
+        request = urllib.request.Request(self.url, data=body, headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            payload = json.loads(response.read().decode('utf-8'))
+        return payload['choices'][0]['message']['content']
+
+    async def complete(self, prompt: str) -> str:
+        return await asyncio.to_thread(self._post, prompt)
+
+
+class StubModelClient:
+    """Deterministic stand-in for a local model, for tests and offline runs"""
+
+    CASE_PATTERN = re.compile(r'^(\d+)\. decision=(\S+) score~(\d+) reasons=(.*)$', re.MULTILINE)
+
+    def __init__(self):
+        self.calls = 0
+
+    async def complete(self, prompt: str) -> str:
+        self.calls += 1
+        narratives = []
+        for _, decision, score, reasons in self.CASE_PATTERN.findall(prompt):
+            detail = f" Signals: {reasons}." if reasons != 'none' else ""
+            narratives.append(f"Assessed as {decision} with risk around {score}/100.{detail}")
+        return json.dumps(narratives)
+
+
+class LLMSummaryGenerator:
+    """
+    Optional LLM-backed narrative generator for SummaryAgent
+
+    Cases are keyed by (decision, score bucket, normalized reasons) so the
+    narrative never depends on amounts or vendors and repeated cases are
+    served from a persistent JSON-lines cache. Cache misses are deduplicated,
+    packed ``batch_size`` cases per prompt, and sent with at most
+    ``max_concurrency`` requests in flight.
+    """
+
+    PROMPT_HEADER = (
+        "You explain expense audit decisions to managers. For each numbered case below, "
+        "write one or two plain-English sentences explaining the decision. Do not invent "
+        "amounts or vendor names. Reply with only a JSON array of strings, one per case, "
+        "in the same order.\n\n"
+    )
+
+    def __init__(self, client, cache_path: Optional[str] = None, batch_size: int = 8,
+                 max_concurrency: int = 2, score_bucket: int = 10):
+        self.client = client
+        self.cache_path = cache_path
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+        self.score_bucket = score_bucket
+        self.cache: Dict[str, str] = {}
+        self.model_calls = 0
+        self.cache_hits = 0
+        self._load_cache()
+
+    @classmethod
+    def from_config(cls, config, client=None):
+        """Build a generator from Config.LLM_* settings; None when no endpoint is set"""
+        agent_config = getattr(config, 'AGENTS', {}).get('summary_agent')
+        endpoint = getattr(config, 'LLM_ENDPOINT', None)
+        if client is None:
+            if not endpoint:
+                return None
+            client = HTTPModelClient(
+                endpoint,
+                model=getattr(agent_config, 'model', 'local-model'),
+                temperature=getattr(agent_config, 'temperature', 0.1)
+            )
+        return cls(
+            client,
+            cache_path=getattr(config, 'LLM_SUMMARY_CACHE', None),
+            batch_size=getattr(config, 'LLM_BATCH_SIZE', 8),
+            max_concurrency=getattr(config, 'LLM_MAX_CONCURRENCY', 2)
+        )
+
+    def _load_cache(self):
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return
+        with open(self.cache_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # tolerate a torn final line
+                self.cache[entry['key']] = entry['text']
+
+    def _persist(self, entries: Dict[str, str]):
+        if not self.cache_path or not entries:
+            return
+        directory = os.path.dirname(self.cache_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.cache_path, 'a', encoding='utf-8') as f:
+            for key, text in entries.items():
+                f.write(json.dumps({'key': key, 'text': text}, ensure_ascii=False) + '\n')
+
+    def case_key(self, decision: str, risk_score, reasons: List) -> Tuple[str, int, Tuple[str, ...]]:
+        try:
+            bucket = int(float(risk_score) // self.score_bucket * self.score_bucket)
+        except (TypeError, ValueError):
+            bucket = 0
+        normalized = sorted({
+            ReasonClassifier.NUMBER_PATTERN.sub('#', str(reason).lower()) for reason in reasons
+        })
+        return str(decision), bucket, tuple(normalized)
+
+    @staticmethod
+    def _cache_id(case: Tuple) -> str:
+        return json.dumps(case, ensure_ascii=False)
+
+    def build_prompt(self, cases: List[Tuple]) -> str:
+        lines = [
+            f"{i}. decision={decision} score~{bucket} reasons={'; '.join(reasons) or 'none'}"
+            for i, (decision, bucket, reasons) in enumerate(cases, 1)
+        ]
+        return self.PROMPT_HEADER + '\n'.join(lines)
+
+    async def _complete_batch(self, cases: List[Tuple], semaphore) -> Dict[str, str]:
+        async with semaphore:
+            self.model_calls += 1
+            reply = await self.client.complete(self.build_prompt(cases))
+        try:
+            start, end = reply.index('['), reply.rindex(']') + 1
+            narratives = json.loads(reply[start:end])
+        except ValueError:
+            return {}
+        return {
+            self._cache_id(case): str(text).strip()
+            for case, text in zip(cases, narratives) if str(text).strip()
+        }
+
+    async def agenerate(self, cases: List[Tuple[str, object, List]]) -> List[Optional[str]]:
+        """Narratives for ``(decision, risk_score, reasons)`` cases; None where the model gave nothing"""
+        case_keys = [self.case_key(*case) for case in cases]
+        keys = [self._cache_id(case) for case in case_keys]
+        self.cache_hits += sum(1 for key in keys if key in self.cache)
+        missing = {key: case for key, case in zip(keys, case_keys) if key not in self.cache}
+
+        if missing:
+            pending = list(missing.values())
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            batches = [pending[i:i + self.batch_size] for i in range(0, len(pending), self.batch_size)]
+            results = await asyncio.gather(
+                *(self._complete_batch(batch, semaphore) for batch in batches), return_exceptions=True
+            )
+            fresh = {}
+            for result in results:
+                if isinstance(result, dict):
+                    fresh.update(result)
+            self.cache.update(fresh)
+            self._persist(fresh)
+
+        return [self.cache.get(key) for key in keys]
+
+    def generate(self, cases: List[Tuple[str, object, List]]) -> List[Optional[str]]:
+        """Synchronous wrapper around agenerate"""
+        return asyncio.run(self.agenerate(cases))
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'model_calls': self.model_calls,
+            'cache_hits': self.cache_hits,
+            'cache_size': len(self.cache)
+        }
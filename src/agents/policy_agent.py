@@ -3,82 +3,64 @@ from typing import Dict, List, Tuple
 import json
 from datetime import datetime
 
+# Import the declarative policy rule engine
+from policy import RuleEngine, ViolationStats
+from utils.profiling import profile_stage
+
 class PolicyAgent:
     def __init__(self, memory_manager, config):
         self.memory = memory_manager
         self.config = config
-        self.policy_violations = []
+        self.violation_stats = ViolationStats(
+            bucket_seconds=getattr(config, 'VIOLATION_BUCKET_SECONDS', 3600),
+            max_buckets=getattr(config, 'VIOLATION_MAX_BUCKETS', 168),
+            spill_path=getattr(config, 'VIOLATION_SPILL_PATH', None)
+        )
+        
+        # Rules are data: fall back to the bundled rule file when the config has none
+        rule_spec = getattr(config, 'POLICY_RULES', None)
+        if rule_spec is None:
+            from config import Config
+            rule_spec = Config.POLICY_RULES
+        self.rule_engine = RuleEngine(rule_spec, getattr(config, 'EXPENSE', None))
         
     def validate_expense(self, expense: Dict) -> Tuple[bool, List[str]]:
         """Validate expense against company policies"""
-        violations = []
-        
-        # Amount threshold checks
-        category = expense.get('category', 'Other')
-        amount = expense.get('amount', 0)
-        
-        if category in self.config.EXPENSE.thresholds:
-            if amount > self.config.EXPENSE.thresholds[category]:
-                violations.append(f"Amount ${amount} exceeds ${self.config.EXPENSE.thresholds[category]} limit for {category}")
-        
-        # Merchant checks
-        merchant = expense.get('merchant', '').lower()
-        for risky_merchant in self.config.EXPENSE.high_risk_merchants:
-            if risky_merchant.lower() in merchant:
-                violations.append(f"Merchant '{merchant}' is high-risk")
-        
-        # Location checks
-        location = expense.get('location', '').lower()
-        for risky_location in self.config.EXPENSE.risky_locations:
-            if risky_location.lower() in location:
-                violations.append(f"Location '{location}' is flagged as high-risk")
-        
-        # Date validation
-        expense_date = expense.get('date')
-        if isinstance(expense_date, str):
-            try:
-                expense_date = pd.to_datetime(expense_date)
-            except:
-                expense_date = datetime.now()
-        
-        if expense_date and expense_date > datetime.now():
-            violations.append("Future-dated expense")
-        
-        # Weekend expenses check
-        if expense_date and expense_date.weekday() >= 5:  # Saturday=5, Sunday=6
-            violations.append("Weekend expense - requires additional justification")
-        
-        # Duplicate expense check
+        violations = self.rule_engine.evaluate_with_ids([expense])[0]
+        violations.extend(self._check_duplicate_pattern(expense))
+        is_valid, messages = self._record(expense, violations)
+        self.violation_stats.flush()
+        return is_valid, messages
+    
+    def _check_duplicate_pattern(self, expense: Dict) -> List[Tuple[str, str]]:
+        """Memory-backed duplicate check, which cannot be expressed as a column rule (skipped without memory)"""
+        if self.memory is None:
+            return []
         similar_expenses = self.memory.find_similar_expenses(expense, threshold=0.9)
         if len(similar_expenses) > 2:  # More than 2 very similar expenses
-            violations.append("Potential duplicate expense pattern detected")
-        
-        # Missing information checks
-        if not expense.get('description') or len(expense.get('description', '').strip()) < 5:
-            violations.append("Insufficient description")
-            
-        if not expense.get('merchant'):
-            violations.append("Missing merchant information")
-        
-        is_valid = len(violations) == 0
-        if not is_valid:
-            self.policy_violations.append({
-                'expense_id': expense.get('id'),
-                'violations': violations,
-                'timestamp': datetime.now()
-            })
-            
-        return is_valid, violations
+            return [("duplicate_pattern", "Potential duplicate expense pattern detected")]
+        return []
     
+    def _record(self, expense: Dict, violations: List[Tuple[str, str]]) -> Tuple[bool, List[str]]:
+        self.violation_stats.record(expense, violations)
+        return len(violations) == 0, [message for _, message in violations]
+    
+    @profile_stage()
     def batch_validate(self, expenses: List[Dict]) -> pd.DataFrame:
         """Validate multiple expenses"""
-        results = []
+        # Memory checks stay sequential so each expense only sees earlier ones
+        duplicate_flags = []
         for expense in expenses:
-            # Add to memory first
-            self.memory.add_expense(expense)
-            
-            # Then validate
-            is_valid, violations = self.validate_expense(expense)
+            if self.memory is not None:
+                self.memory.add_expense(expense)
+            duplicate_flags.append(self._check_duplicate_pattern(expense))
+        
+        # Column rules run once over the whole batch
+        rule_violations = self.rule_engine.evaluate_with_ids(expenses) if expenses else []
+        
+        results = []
+        for expense, violations, duplicate in zip(expenses, rule_violations, duplicate_flags):
+            is_valid, violations = self._record(expense, violations + duplicate)
             results.append({
                 'expense_id': expense.get('id'),
                 'employee_id': expense.get('employee_id'),
@@ -92,14 +74,9 @@ class PolicyAgent:
                 'requires_review': len(violations) > 0
             })
         
+        self.violation_stats.flush()
         return pd.DataFrame(results)
     
     def get_violation_summary(self):
-        """Get summary of policy violations"""
-        summary = {}
-        for violation in self.policy_violations:
-            for v in violation['violations']:
-                if v not in summary:
-                    summary[v] = 0
-                summary[v] += 1
-        return summary
\ No newline at end of file
+        """Get summary of policy violations, counted per violation type"""
+        return self.violation_stats.get_summary()
\ No newline at end of file
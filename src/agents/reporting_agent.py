@@ -1,37 +1,32 @@
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 from datetime import datetime
 import os
+from concurrent.futures import ProcessPoolExecutor
+
+from utils.profiling import profile_stage
+from .chart_renderer import SUPPORTED_FORMATS, build_chart_data, render_charts
 
 class ReportingAgent:
     def __init__(self, memory_manager, config):
         self.memory = memory_manager
         self.config = config
+        self._render_pool = None
         
+    @profile_stage()
     def generate_compliance_report(self, policy_results, fraud_results):
         """Generate compliance summary report"""
         
         compliance_data = {
             'total_expenses': len(policy_results),
-            'compliant_expenses': len(policy_results[policy_results['is_valid'] == True]),
-            'non_compliant_expenses': len(policy_results[policy_results['is_valid'] == False]),
+            'compliant_expenses': int((policy_results['is_valid'] == True).sum()),
+            'non_compliant_expenses': int((policy_results['is_valid'] == False).sum()),
             'total_amount': policy_results['amount'].sum(),
             'average_amount': policy_results['amount'].mean(),
             'max_amount': policy_results['amount'].max()
         }
         
         # Category-wise compliance
-        category_compliance = {}
-        for category in self.config.EXPENSE.categories:
-            category_data = policy_results[policy_results['category'] == category]
-            if len(category_data) > 0:
-                compliance_rate = (len(category_data[category_data['is_valid'] == True]) / len(category_data)) * 100
-                category_compliance[category] = {
-                    'count': len(category_data),
-                    'compliance_rate': compliance_rate,
-                    'total_amount': category_data['amount'].sum()
-                }
+        category_compliance = self._category_breakdown(policy_results).to_dict('index')
         
         report = {
             'report_date': datetime.now(),
@@ -43,6 +38,33 @@ class ReportingAgent:
         
         return report
     
+    def _category_breakdown(self, policy_results):
+        """Per-category counts, compliance rate and totals from a single groupby pass"""
+        columns = ['count', 'compliant', 'non_compliant', 'compliance_rate', 'total_amount']
+        if policy_results.empty:
+            return pd.DataFrame(columns=columns)
+        
+        # Results without an is_valid column count an expense as compliant when it has no violations
+        if 'is_valid' in policy_results:
+            compliant, non_compliant = policy_results['is_valid'] == True, policy_results['is_valid'] == False
+        else:
+            compliant, non_compliant = policy_results['violation_count'] == 0, policy_results['violation_count'] > 0
+        grouped = policy_results.assign(
+            _compliant=compliant.astype(int),
+            _non_compliant=non_compliant.astype(int)
+        ).groupby('category', sort=False).agg(
+            count=('_compliant', 'size'),
+            compliant=('_compliant', 'sum'),
+            non_compliant=('_non_compliant', 'sum'),
+            total_amount=('amount', 'sum')
+        )
+        
+        # Keep the configured category order and drop categories outside policy
+        categories = [c for c in self.config.EXPENSE.categories if c in grouped.index]
+        grouped = grouped.loc[categories]
+        grouped['compliance_rate'] = grouped['compliant'] / grouped['count'] * 100
+        return grouped[columns]
+    
     def _get_top_violators(self, policy_results):
         """Identify employees with most violations"""
         violators = policy_results[policy_results['violation_count'] > 0]
@@ -78,49 +100,51 @@ class ReportingAgent:
         else:
             return 'Low'
     
-    def generate_visualizations(self, policy_results, fraud_results, output_dir='reports'):
-        """Generate visual charts and graphs"""
-        if not os.path.exists(output_dir):
-            os.makedirs(output_dir)
-        
-        # Set style
-        plt.style.use('seaborn-v0_8')
-        fig, axes = plt.subplots(2, 2, figsize=(15, 12))
-        
-        # 1. Compliance by Category
-        category_data = []
-        for category in self.config.EXPENSE.categories:
-            cat_expenses = policy_results[policy_results['category'] == category]
-            if len(cat_expenses) > 0:
-                compliant = len(cat_expenses[cat_expenses['is_valid'] == True])
-                non_compliant = len(cat_expenses[cat_expenses['is_valid'] == False])
-                category_data.append({'Category': category, 'Compliant': compliant, 'Non-Compliant': non_compliant})
-        
-        if category_data:
-            cat_df = pd.DataFrame(category_data)
-            cat_df.set_index('Category')[['Compliant', 'Non-Compliant']].plot(
-                kind='bar', ax=axes[0,0], title='Compliance by Category'
-            )
-        
-        # 2. Violation Types
-        all_violations = []
-        for violations in policy_results['violations']:
-            all_violations.extend(violations)
-        
-        if all_violations:
-            violation_counts = pd.Series(all_violations).value_counts().head(8)
-            violation_counts.plot(kind='pie', ax=axes[0,1], title='Top Violation Types')
-        
-        # 3. Amount Distribution
-        policy_results['amount'].plot(kind='hist', ax=axes[1,0], title='Expense Amount Distribution', bins=20)
-        
-        # 4. Risk Levels
-        if not fraud_results.empty:
-            risk_counts = fraud_results['risk_level'].value_counts()
-            risk_counts.plot(kind='bar', ax=axes[1,1], title='Risk Level Distribution', color=['green', 'orange', 'red'])
-        
-        plt.tight_layout()
-        plt.savefig(f'{output_dir}/audit_visualizations.png', dpi=300, bbox_inches='tight')
-        plt.close()
-        
-        print(f"Visualizations saved to {output_dir}/audit_visualizations.png")
\ No newline at end of file
+    @profile_stage()
+    def prepare_chart_data(self, policy_results, fraud_results, compliance_report=None):
+        """Pre-aggregate the data behind the audit charts"""
+        if compliance_report is not None:
+            category_breakdown = compliance_report['category_breakdown']
+        else:
+            category_breakdown = self._category_breakdown(policy_results).to_dict('index')
+        return build_chart_data(category_breakdown, policy_results, fraud_results)
+    
+    def generate_visualizations(self, policy_results, fraud_results, output_dir='reports', compliance_report=None,
+                                dpi=None, fmt=None, wait=False):
+        """Render visual charts in a background process
+        
+        Charts are drawn on the Agg backend in a worker process from
+        pre-aggregated data, so the caller only pays for the aggregation.
+        Returns a Future resolving to the output path, or the path itself
+        when ``wait`` is True. Pass the result of generate_compliance_report
+        to reuse its category breakdown.
+        """
+        dpi = dpi or getattr(self.config, 'VISUALIZATION_DPI', 100)
+        fmt = (fmt or getattr(self.config, 'VISUALIZATION_FORMAT', 'png')).lower()
+        if fmt not in SUPPORTED_FORMATS:
+            raise ValueError(f"Unsupported visualization format '{fmt}', expected one of {SUPPORTED_FORMATS}")
+        
+        chart_data = self.prepare_chart_data(policy_results, fraud_results, compliance_report)
+        output_path = os.path.join(output_dir, f'audit_visualizations.{fmt}')
+        
+        if self._render_pool is None:
+            self._render_pool = ProcessPoolExecutor(max_workers=1)
+        future = self._render_pool.submit(render_charts, chart_data, output_path, dpi, fmt)
+        future.add_done_callback(
+            lambda f: print(f"Visualizations saved to {output_path}") if f.exception() is None
+            else print(f"Visualization rendering failed: {f.exception()}")
+        )
+        
+        return future.result() if wait else future
+    
+    def shutdown(self, wait=True):
+        """Stop the rendering process, optionally waiting for pending charts"""
+        if self._render_pool is not None:
+            self._render_pool.shutdown(wait=wait)
+            self._render_pool = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.shutdown()
@@ -1,6 +1,88 @@
 import json
+import re
+from collections import OrderedDict
 from datetime import datetime
 from typing import Dict, List, Any
+from utils.profiling import profile_stage
+
+class ReasonClassifier:
+    """
+    Maps reason strings to explanations through a two-level bounded LRU cache
+    
+    Lookups try the exact reason first, then its normalized template with
+    numbers stripped ("Same amount ₹450.0 repeated 3 times" and "... ₹499.0
+    repeated 4 times" share one entry), and only then run the compiled key
+    matcher. Hit/miss counters are kept for monitoring.
+    """
+    
+    NUMBER_PATTERN = re.compile(r'\d+(?:[.,]\d+)*')
+    
+    def __init__(self, explanations: Dict[str, str], fallback_rules=(), default_prefix="Anomaly detected",
+                 maxsize=1024):
+        self.explanations = explanations
+        self.keys = list(explanations)
+        self.key_order = {key: i for i, key in enumerate(self.keys)}
+        self.fallback_rules = fallback_rules
+        self.default_prefix = default_prefix
+        self.maxsize = maxsize
+        # Zero-width lookahead finds overlapping matches; the lowest key index wins, as in dict order
+        alternation = '|'.join(re.escape(key) for key in self.keys)
+        self.matcher = re.compile(f'(?=({alternation}))') if self.keys else None
+        
+        self.exact_cache = OrderedDict()
+        self.template_cache = OrderedDict()
+        self.exact_hits = 0
+        self.template_hits = 0
+        self.misses = 0
+    
+    def explain(self, reason: str) -> str:
+        explanation = self.exact_cache.get(reason)
+        if explanation is not None:
+            self.exact_cache.move_to_end(reason)
+            self.exact_hits += 1
+            return explanation
+        
+        template = self.NUMBER_PATTERN.sub('#', reason.lower())
+        explanation = self.template_cache.get(template)
+        if explanation is not None:
+            self.template_cache.move_to_end(template)
+            self.template_hits += 1
+        else:
+            self.misses += 1
+            explanation = self._classify(template)
+            self._remember(self.template_cache, template, explanation)
+        
+        # An empty explanation means "no known pattern": fall back to the raw reason
+        rendered = explanation or f"{self.default_prefix}: {reason}"
+        self._remember(self.exact_cache, reason, rendered)
+        return rendered
+    
+    def _classify(self, text: str) -> str:
+        if self.matcher is not None:
+            found = [self.key_order[match] for match in self.matcher.findall(text)]
+            if found:
+                return self.explanations[self.keys[min(found)]]
+        for required, explanation in self.fallback_rules:
+            if all(word in text for word in required):
+                return explanation
+        return ""
+    
+    def _remember(self, cache: OrderedDict, key: str, value: str):
+        cache[key] = value
+        if len(cache) > self.maxsize:
+            cache.popitem(last=False)
+    
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.exact_hits + self.template_hits + self.misses
+        return {
+            'lookups': lookups,
+            'exact_hits': self.exact_hits,
+            'template_hits': self.template_hits,
+            'misses': self.misses,
+            'hit_rate': (self.exact_hits + self.template_hits) / lookups if lookups else 0.0,
+            'exact_cache_size': len(self.exact_cache),
+            'template_cache_size': len(self.template_cache)
+        }
 
 class SummaryAgent:
     """
@@ -8,7 +90,25 @@ class SummaryAgent:
     Converts policy + fraud results into human-friendly explanations
     """
     
-    def __init__(self):
+    NO_ISSUE_POINTS = [
+        "✓ No policy violations detected",
+        "✓ No suspicious patterns identified",
+        "✓ Vendor appears legitimate",
+        "✓ Amount within reasonable range"
+    ]
+    
+    # Partial matches tried when no explanation key appears in a fraud reason
+    FRAUD_FALLBACK_RULES = [
+        (("duplicate",), "Potential duplicate receipt detected"),
+        (("vendor", "risk"), "High-risk vendor identified"),
+        (("personal",), "Personal expense detected"),
+        (("amount", "repeat"), "Suspicious repeating amount pattern")
+    ]
+    
+    def __init__(self, cache_size=1024, llm_generator=None):
+        # Optional LLMSummaryGenerator; summaries stay template-based without one
+        self.llm_generator = llm_generator
+        
         self.confidence_rules = {
             "APPROVED": 90,
             "NEEDS_REVIEW": 50,
@@ -39,6 +139,15 @@ class SummaryAgent:
             "personal expense": "Personal expense detected",
             "same amount": "Repeated amount pattern detected"
         }
+        
+        # Reasons repeat heavily across expenses, so classification is cached
+        self.policy_classifier = ReasonClassifier(
+            self.policy_explanations, default_prefix="Policy issue", maxsize=cache_size
+        )
+        self.fraud_classifier = ReasonClassifier(
+            self.fraud_explanations, self.FRAUD_FALLBACK_RULES, default_prefix="Anomaly detected",
+            maxsize=cache_size
+        )
     
     def generate(self, expense: Dict, p2_output: Dict) -> Dict[str, Any]:
         """
@@ -58,33 +167,15 @@ class SummaryAgent:
             policy_flags = p2_output.get("policy_violations", [])
             fraud_reasons = p2_output.get("reasons", [])
             
-            # Generate explanation components
-            summary_text = self._generate_summary_text(expense, decision, risk_score)
-            explanation_points = self._generate_explanation_points(policy_flags, fraud_reasons)
-            confidence_score = self._calculate_confidence(decision, risk_score, policy_flags, fraud_reasons)
-            recommendation = self._generate_recommendation(decision, risk_score)
-            
-            return {
-                "summary_text": summary_text,
-                "explanation_points": explanation_points,
-                "confidence_score": confidence_score,
-                "recommendation": recommendation,
-                "review_timestamp": datetime.now().isoformat(),
-                "expense_id": expense.get("id", "unknown"),
-                "employee_id": expense.get("employee_id", "unknown")
-            }
-            
+            # Same rendering and confidence rules as the batch path
+            return self._render_batch([expense], [decision], [risk_score], [policy_flags], [fraud_reasons])[0]
         except Exception as e:
             return self._generate_error_response(str(e))
     
     def _generate_summary_text(self, expense: Dict, decision: str, risk_score: int) -> str:
         """Generate main summary text"""
         
-        vendor = expense.get("merchant", expense.get("vendor", "Unknown vendor"))
-        amount = expense.get("amount", "Unknown amount")
-        category = expense.get("category", "Unknown category")
-        
-        base_summary = f"Expense of ₹{amount} from {vendor} categorized as {category}"
+        base_summary = self._base_summary(expense)
         
         decision_texts = {
             "APPROVED": f"{base_summary} has been automatically approved with low risk indicators.",
@@ -94,91 +185,61 @@ class SummaryAgent:
         
         return decision_texts.get(decision, f"{base_summary} is pending review.")
     
+    def _base_summary(self, expense: Dict) -> str:
+        vendor = expense.get("merchant", expense.get("vendor", "Unknown vendor"))
+        amount = expense.get("amount", "Unknown amount")
+        category = expense.get("category", "Unknown category")
+        return f"Expense of ₹{amount} from {vendor} categorized as {category}"
+    
+    def _apply_llm_narratives(self, expenses: List[Dict], results: List[Dict], decisions: List,
+                              risk_scores: List, policy_flags: List[List], fraud_reasons: List[List]):
+        """Replace template summary text with model narratives where available"""
+        if self.llm_generator is None:
+            return
+        cases = [
+            (decisions[i], risk_scores[i], [str(r) for r in list(policy_flags[i]) + list(fraud_reasons[i])])
+            for i in range(len(expenses))
+        ]
+        try:
+            narratives = self.llm_generator.generate(cases)
+        except Exception as e:
+            print(f"⚠️  LLM summary backend unavailable, using templates: {e}")
+            return
+        for expense, result, narrative in zip(expenses, results, narratives):
+            if narrative:
+                result["summary_text"] = f"{self._base_summary(expense)}. {narrative}"
+    
     def _generate_explanation_points(self, policy_flags: List, fraud_reasons: List) -> List[str]:
         """Generate bullet-point explanations"""
-        points = []
-        
-        # Process policy violations
-        for violation in policy_flags:
-            if isinstance(violation, dict):
-                violation_type = violation.get("type", "")
-                explanation = self.policy_explanations.get(violation_type, f"Policy violation: {violation_type}")
-                points.append(explanation)
-            else:
-                # Handle string violations
-                violation_lower = str(violation).lower()
-                found_match = False
-                for key, explanation in self.policy_explanations.items():
-                    if key in violation_lower:
-                        points.append(explanation)
-                        found_match = True
-                        break
-                if not found_match:
-                    points.append(f"Policy issue: {violation}")
-        
-        # Process fraud detection reasons
-        for reason in fraud_reasons:
-            if isinstance(reason, dict):
-                reason_type = reason.get("type", "")
-                explanation = self.fraud_explanations.get(reason_type, f"Risk indicator: {reason_type}")
-                points.append(explanation)
-            else:
-                reason_lower = str(reason).lower()
-                found_match = False
-                for key, explanation in self.fraud_explanations.items():
-                    if key in reason_lower:
-                        points.append(explanation)
-                        found_match = True
-                        break
-                if not found_match:
-                    # Try partial matching for common patterns
-                    if "duplicate" in reason_lower:
-                        points.append("Potential duplicate receipt detected")
-                    elif "vendor" in reason_lower and "risk" in reason_lower:
-                        points.append("High-risk vendor identified")
-                    elif "personal" in reason_lower:
-                        points.append("Personal expense detected")
-                    elif "amount" in reason_lower and "repeat" in reason_lower:
-                        points.append("Suspicious repeating amount pattern")
-                    else:
-                        points.append(f"Anomaly detected: {reason}")
+        points = [self._explain_policy_flag(violation) for violation in policy_flags]
+        points.extend(self._explain_fraud_reason(reason) for reason in fraud_reasons)
         
         # Add positive feedback if no issues
         if not points:
-            points.extend([
-                "✓ No policy violations detected",
-                "✓ No suspicious patterns identified",
-                "✓ Vendor appears legitimate",
-                "✓ Amount within reasonable range"
-            ])
+            points.extend(self.NO_ISSUE_POINTS)
         
         return points
     
-    def _calculate_confidence(self, decision: str, risk_score: int, 
-                            policy_flags: List, fraud_reasons: List) -> int:
-        """Calculate confidence score based on rules and patterns"""
-        
-        base_confidence = self.confidence_rules.get(decision, 50)
-        
-        # Adjust based on risk score
-        if risk_score < 25:
-            base_confidence += 20
-        elif risk_score < 50:
-            base_confidence += 10
-        elif risk_score > 75:
-            base_confidence -= 25
-        elif risk_score > 50:
-            base_confidence -= 10
-        
-        # Adjust based on number and severity of violations
-        violation_count = len(policy_flags) + len(fraud_reasons)
-        if violation_count == 0:
-            base_confidence += 15
-        elif violation_count >= 3:
-            base_confidence -= 20
-        
-        # Ensure confidence stays within bounds
-        return max(0, min(100, base_confidence))
+    def _explain_policy_flag(self, violation) -> str:
+        """Explanation for one policy violation"""
+        if isinstance(violation, dict):
+            violation_type = violation.get("type", "")
+            return self.policy_explanations.get(violation_type, f"Policy violation: {violation_type}")
+        return self.policy_classifier.explain(str(violation))
+    
+    def _explain_fraud_reason(self, reason) -> str:
+        """Explanation for one fraud detection reason"""
+        if isinstance(reason, dict):
+            reason_type = reason.get("type", "")
+            return self.fraud_explanations.get(reason_type, f"Risk indicator: {reason_type}")
+        return self.fraud_classifier.explain(str(reason))
+    
+    def get_cache_stats(self) -> Dict[str, Dict]:
+        """Reason classification cache statistics, for monitoring"""
+        return {
+            'policy': self.policy_classifier.stats(),
+            'fraud': self.fraud_classifier.stats()
+        }
     
     def _generate_recommendation(self, decision: str, risk_score: int) -> str:
         """Generate specific recommendation text"""
@@ -202,10 +263,117 @@ class SummaryAgent:
             "error": error_msg
         }
     
+    @profile_stage()
     def batch_process(self, expenses_with_p2: List[tuple]) -> List[Dict]:
         """Process multiple expenses in batch"""
+        if not expenses_with_p2:
+            return []
+        
+        expenses = [expense for expense, _ in expenses_with_p2]
+        p2_outputs = [p2_output for _, p2_output in expenses_with_p2]
+        try:
+            return self._render_batch(
+                expenses,
+                [p2.get("decision", "NEEDS_REVIEW") for p2 in p2_outputs],
+                [p2.get("final_risk_score", 0) for p2 in p2_outputs],
+                [p2.get("policy_violations", []) for p2 in p2_outputs],
+                [p2.get("reasons", []) for p2 in p2_outputs]
+            )
+        except Exception:
+            # Fall back to per-expense generation, which reports errors per row
+            return [self.generate(expense, p2_output) for expense, p2_output in expenses_with_p2]
+    
+    @profile_stage()
+    def summarize_results(self, expenses: List[Dict], fraud_results, policy_results=None):
+        """
+        Batch summary engine: join expenses to fraud (and optionally policy)
+        results once by expense id and render all summaries together.
+        
+        Args:
+            expenses: Structured expenses with an ``id`` field
+            fraud_results: DataFrame with expense_id, fraud_decision, fraud_score, fraud_reasons
+            policy_results: Optional DataFrame with expense_id and violations
+        
+        Returns:
+            DataFrame with one summary row per expense that has a fraud result
+        """
+        import pandas as pd
+        
+        if not expenses or fraud_results is None or fraud_results.empty:
+            return pd.DataFrame()
+        
+        expenses_df = pd.DataFrame({'id': [e.get('id') for e in expenses], '_position': range(len(expenses))})
+        fraud_columns = fraud_results[['expense_id', 'fraud_decision', 'fraud_score', 'fraud_reasons']]
+        joined = expenses_df.merge(
+            fraud_columns.drop_duplicates('expense_id'), left_on='id', right_on='expense_id', how='inner'
+        )
+        if policy_results is not None and not policy_results.empty:
+            policy_columns = policy_results[['expense_id', 'violations']].drop_duplicates('expense_id')
+            joined = joined.merge(policy_columns, on='expense_id', how='left')
+        else:
+            joined['violations'] = None
+        
+        matched = [expenses[i] for i in joined['_position']]
+        rendered = self._render_batch(
+            matched,
+            joined['fraud_decision'].tolist(),
+            joined['fraud_score'].tolist(),
+            [v if isinstance(v, list) else [] for v in joined['violations']],
+            [r if isinstance(r, list) else [] for r in joined['fraud_reasons']]
+        )
+        
+        return pd.DataFrame([{
+            'expense_id': expense['id'],
+            'employee_id': expense.get('employee_id'),
+            'merchant': expense.get('merchant'),
+            'amount': expense.get('amount'),
+            'summary_text': result['summary_text'],
+            'confidence_score': result['confidence_score'],
+            'recommendation': result['recommendation'],
+            'explanation_points': result['explanation_points'],
+            'review_timestamp': result['review_timestamp']
+        } for expense, result in zip(matched, rendered)])
+    
+    def _render_batch(self, expenses: List[Dict], decisions: List[str], risk_scores: List,
+                      policy_flags: List[List], fraud_reasons: List[List]) -> List[Dict]:
+        """Render summaries for many expenses, scoring confidence with array ops"""
+        import numpy as np
+        
+        scores = np.nan_to_num(np.asarray(risk_scores, dtype=float))
+        violation_counts = np.fromiter(
+            (len(p) + len(f) for p, f in zip(policy_flags, fraud_reasons)), dtype=int, count=len(expenses)
+        )
+        confidence = self._batch_confidence(np.asarray(decisions, dtype=object), scores, violation_counts)
+        
+        timestamp = datetime.now().isoformat()
         results = []
-        for expense, p2_output in expenses_with_p2:
-            result = self.generate(expense, p2_output)
-            results.append(result)
-        return results
\ No newline at end of file
+        for i, expense in enumerate(expenses):
+            decision = decisions[i]
+            risk_score = risk_scores[i]
+            results.append({
+                "summary_text": self._generate_summary_text(expense, decision, risk_score),
+                "explanation_points": self._generate_explanation_points(policy_flags[i], fraud_reasons[i]),
+                "confidence_score": int(confidence[i]),
+                "recommendation": self._generate_recommendation(decision, scores[i]),
+                "review_timestamp": timestamp,
+                "expense_id": expense.get("id", "unknown"),
+                "employee_id": expense.get("employee_id", "unknown")
+            })
+        
+        self._apply_llm_narratives(expenses, results, decisions, risk_scores, policy_flags, fraud_reasons)
+        return results
+    
+    def _batch_confidence(self, decisions, scores, violation_counts):
+        """Confidence per expense: decision base, adjusted by risk score and number of issues"""
+        import numpy as np
+        
+        unique_decisions, inverse = np.unique(decisions.astype(str), return_inverse=True)
+        base = np.array([self.confidence_rules.get(d, 50) for d in unique_decisions])[inverse]
+        
+        # Adjust based on risk score (first matching band wins)
+        base = base + np.select(
+            [scores < 25, scores < 50, scores > 75, scores > 50], [20, 10, -25, -10], default=0
+        )
+        # Adjust based on number and severity of violations
+        base = base + np.select([violation_counts == 0, violation_counts >= 3], [15, -20], default=0)
+        return np.clip(base, 0, 100)
\ No newline at end of file
@@ -1,7 +1,13 @@
 import os
+import json
 from dataclasses import dataclass
 from typing import Dict, List
 
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
 @dataclass
 class AgentConfig:
     name: str
@@ -38,15 +44,65 @@ class ExpenseConfig:
                 "Las Vegas", "Macau", "Monte Carlo", "Atlantic City"
             ]
 
+def load_policy_rules(filepath: str) -> Dict:
+    """Load declarative policy rules from a JSON or YAML file"""
+    with open(filepath, 'r', encoding='utf-8') as f:
+        if filepath.endswith(('.yaml', '.yml')):
+            if yaml is None:
+                raise ImportError("PyYAML is required to load YAML policy rules")
+            return yaml.safe_load(f)
+        return json.load(f)
+
 class Config:
     AGENTS = {
         "policy_agent": AgentConfig("Policy Agent", "Validate expenses against company policies"),
         "fraud_agent": AgentConfig("Fraud Detection Agent", "Detect suspicious patterns and anomalies"),
         "audit_agent": AgentConfig("Audit Agent", "Conduct detailed expense audits"),
-        "reporting_agent": AgentConfig("Reporting Agent", "Generate compliance reports")
+        "reporting_agent": AgentConfig("Reporting Agent", "Generate compliance reports"),
+        "summary_agent": AgentConfig("Summary Agent", "Explain audit decisions in plain English", model="local-model")
     }
     
     EXPENSE = ExpenseConfig()
+    POLICY_RULES_FILE = os.environ.get(
+        'POLICY_RULES_FILE',
+        os.path.join(os.path.dirname(__file__), 'policy', 'policy_rules.json')
+    )
+    POLICY_RULES = load_policy_rules(POLICY_RULES_FILE)
+    
+    # Policy violation statistics (bounded for long-running services)
+    VIOLATION_BUCKET_SECONDS = 3600
+    VIOLATION_MAX_BUCKETS = 168
+    VIOLATION_SPILL_PATH = None  # e.g. 'reports/policy_violations.jsonl'
+    
+    # Audit report history: recent reports in memory, full history on disk
+    AUDIT_TRAIL_SIZE = 50
+    AUDIT_TRAIL_SPILL_PATH = None  # e.g. 'reports/audit_trail.jsonl'
+    
+    # Per-batch report partials, combined into monthly/quarterly reports
+    REPORT_AGGREGATES_FILE = 'reports/report_aggregates.jsonl'
+    
+    # Optional local LLM for summaries (OpenAI-compatible endpoint, e.g. http://localhost:8000)
+    LLM_ENDPOINT = os.environ.get('LLM_ENDPOINT')
+    LLM_SUMMARY_CACHE = 'reports/llm_summary_cache.jsonl'
+    LLM_BATCH_SIZE = 8
+    LLM_MAX_CONCURRENCY = 2
+    
+    # Charts are opt-in and rendered in a background process
+    VISUALIZATIONS_ENABLED = os.environ.get('VISUALIZATIONS_ENABLED', '').lower() in ('1', 'true', 'yes')
+    VISUALIZATION_DPI = 100
+    VISUALIZATION_FORMAT = 'png'  # 'png' or 'svg'
+    
+    # Duplicate detection: 'pairwise', 'batch' (chunked n-gram cosine top-k)
+    # or 'auto' (batch once expenses x history reaches DUPLICATE_BATCH_MIN_PAIRS)
+    DUPLICATE_DETECTION_MODE = 'auto'
+    DUPLICATE_BATCH_MIN_PAIRS = 250000
+    DUPLICATE_TOP_K = 5
+    
+    # Rule-based fraud scoring: employee partitions in a process pool (1 = serial)
+    RULE_BASED_WORKERS = int(os.environ.get('RULE_BASED_WORKERS', 1))
+    RULE_BASED_PARALLEL_MIN_ROWS = 2000
+    RULE_BASED_PARTITIONS_PER_WORKER = 4
+    
     MEMORY_SIZE = 1000
     SIMILARITY_THRESHOLD = 0.8
     
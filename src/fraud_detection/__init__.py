@@ -2,10 +2,14 @@ from .duplicate_detector import DuplicateDetector
 from .vendor_risk_engine import VendorRiskEngine
 from .behavior_analyzer import BehaviorAnalyzer
 from .fraud_score_calculator import FraudScoreCalculator
+from .collusion_graph import CollusionGraphAnalyzer
+from .time_windows import TimeWindowCounters
 
 __all__ = [
     'DuplicateDetector',
     'VendorRiskEngine', 
     'BehaviorAnalyzer',
-    'FraudScoreCalculator'
+    'FraudScoreCalculator',
+    'CollusionGraphAnalyzer',
+    'TimeWindowCounters'
 ]
\ No newline at end of file
@@ -1,5 +1,10 @@
 from collections import defaultdict, Counter
-from datetime import datetime
+from itertools import islice
+
+from models import parse_amount
+from utils.dates import is_weekend
+from utils.streaming_stats import AmountBaselines
+from .time_windows import TimeWindowCounters, expense_hour, vendor_key
 
 class BehaviorAnalyzer:
     def __init__(self):
@@ -7,8 +12,66 @@ class BehaviorAnalyzer:
             'same_amount_repeats': 40,
             'multiple_receipts_same_day': 30,
             'weekend_expenses': 15,
-            'after_hours_expenses': 20
+            'after_hours_expenses': 20,
+            'same_vendor_repeats': 25,
+            'amount_spike': 25
         }
+        # Rolling windows reported with every analysis, in days
+        self.window_days = (1, 7, 30)
+        self.same_vendor_hours = 24
+        self.after_hours_days = 30
+        self.after_hours_min_count = 3
+        # Amounts this many standard deviations above the employee's baseline are spikes
+        self.spike_zscore = 3.0
+        self.spike_min_history = 5
+        
+        # Window counters, amount counts and amount baselines for the last
+        # history list seen; a longer list only adds its new tail
+        self._history = None
+        self._history_size = 0
+        self._history_first = self._history_last = self._history_version = None
+        self._windows = None
+        self._amount_counts = None
+        self._baselines = None
+    
+    def windows_for(self, historical_expenses) -> TimeWindowCounters:
+        """
+        Window counters over ``historical_expenses``, reused across calls with the same list
+
+        Only an append-only history is extended in place. The counters are
+        rebuilt when the first or the last indexed expense is no longer the
+        same object (a bounded history that dropped its oldest rows, or a
+        replaced tail), or when the container's ``version`` attribute, if it
+        keeps one, has changed.
+        """
+        if not self._history_unchanged(historical_expenses):
+            self._history = historical_expenses
+            self._history_size = 0
+            self._windows = TimeWindowCounters()
+            self._amount_counts = Counter()
+            self._baselines = AmountBaselines()
+        new_expenses = list(islice(historical_expenses, self._history_size, None))
+        self._windows.add_many(new_expenses)
+        for expense in new_expenses:
+            self._baselines.add(expense)
+            amount = expense.get('amount', '') or expense.get('amount_raw', '')
+            if amount:
+                self._amount_counts[amount] += 1
+        self._history_size = len(historical_expenses)
+        if self._history_size:
+            self._history_first, self._history_last = historical_expenses[0], historical_expenses[-1]
+        self._history_version = getattr(historical_expenses, 'version', None)
+        return self._windows
+
+    def _history_unchanged(self, historical_expenses) -> bool:
+        """Whether the rows indexed so far are still the history's first ``_history_size`` rows"""
+        size = self._history_size
+        if self._history is not historical_expenses or len(historical_expenses) < size:
+            return False
+        if getattr(historical_expenses, 'version', None) != self._history_version:
+            return False
+        return not size or (historical_expenses[0] is self._history_first
+                            and historical_expenses[size - 1] is self._history_last)
     
     def analyze_behavior(self, current_expense, historical_expenses):
         """Analyze spending behavior patterns"""
@@ -24,17 +87,47 @@ class BehaviorAnalyzer:
         current_amount = current_expense.get('amount', '') or current_expense.get('amount_raw', '')
         current_date = current_expense.get('date', '') or current_expense.get('date_raw', '')
         
+        # Rolling per-employee windows
+        windows = self.windows_for(historical_expenses)
+        
         # Check for same amount repeats
         amount_repeats = self._check_same_amount_repeats(current_amount, historical_expenses)
         if amount_repeats['count'] >= 3:
             risk_score += self.suspicious_patterns['same_amount_repeats']
             reasons.append(amount_repeats['reason'])
         
+        employee_id = current_expense.get('employee_id')
+        hour = expense_hour(current_expense)
+        spend_windows = windows.spend_windows(employee_id, current_date, self.window_days, hour)
+        
         # Check multiple receipts on same day
-        same_day_count = self._count_same_day_expenses(current_date, historical_expenses)
+        same_day_count = windows.window(employee_id, current_date, 24, hour)[0]
         if same_day_count >= 3:
             risk_score += self.suspicious_patterns['multiple_receipts_same_day']
-            reasons.append(f"{same_day_count} receipts on same day")
+            reasons.append(f"{same_day_count} receipts in one day")
+        
+        # Check repeated receipts from the same vendor
+        vendor = vendor_key(current_expense)
+        vendor_count = windows.vendor_count(employee_id, vendor, current_date, self.same_vendor_hours, hour) if vendor else 0
+        if vendor_count >= 2:
+            risk_score += self.suspicious_patterns['same_vendor_repeats']
+            reasons.append(f"{vendor_count + 1} receipts from {vendor} within {self.same_vendor_hours} hours")
+        
+        # Check habitual after-hours expenses
+        if windows.is_after_hours(hour):
+            after_hours_count = windows.after_hours_count(employee_id, current_date, self.after_hours_days * 24, hour) + 1
+            if after_hours_count >= self.after_hours_min_count:
+                risk_score += self.suspicious_patterns['after_hours_expenses']
+                reasons.append(f"{after_hours_count} after-hours expenses in {self.after_hours_days} days")
+        
+        # Check amount against the employee's streaming baseline
+        amount = parse_amount(current_amount)
+        employee_stats = self._baselines.employee(employee_id)
+        amount_zscore = employee_stats.zscore(amount) if employee_stats else 0.0
+        amount_percentile = employee_stats.percentile(amount) if employee_stats else None
+        if employee_stats and employee_stats.count >= self.spike_min_history and amount_zscore >= self.spike_zscore:
+            risk_score += self.suspicious_patterns['amount_spike']
+            reasons.append(f"Amount {amount:.2f} is {amount_zscore:.1f} standard deviations above the employee's average")
         
         # Check weekend expenses
         if self._is_weekend(current_date):
@@ -43,21 +136,19 @@ class BehaviorAnalyzer:
         
         return {
             "behavior_risk_score": min(risk_score, 100),
-            "reasons": reasons
+            "reasons": reasons,
+            "spend_windows": spend_windows,
+            "amount_zscore": amount_zscore,
+            "amount_percentile": amount_percentile
         }
     
     def _check_same_amount_repeats(self, current_amount, historical_expenses):
         """Check if same amount appears multiple times"""
-        amount_counts = Counter()
-        
-        # Count all amounts in historical data
-        for expense in historical_expenses:
-            amount = expense.get('amount', '') or expense.get('amount_raw', '')
-            if amount:
-                amount_counts[amount] += 1
+        # Amounts in the historical data are counted once per history list
+        self.windows_for(historical_expenses)
         
         # Check current amount frequency
-        current_count = amount_counts.get(current_amount, 0) + 1
+        current_count = self._amount_counts.get(current_amount, 0) + 1
         
         if current_count >= 3:
             return {
@@ -67,33 +158,6 @@ class BehaviorAnalyzer:
         
         return {"count": current_count, "reason": ""}
     
-    def _count_same_day_expenses(self, current_date, historical_expenses):
-        """Count expenses on the same day"""
-        if not current_date:
-            return 0
-            
-        count = 0
-        for expense in historical_expenses:
-            exp_date = expense.get('date', '') or expense.get('date_raw', '')
-            if exp_date == current_date:
-                count += 1
-        return count
-    
     def _is_weekend(self, date_str):
         """Check if date is weekend"""
-        if not date_str:
-            return False
-            
-        try:
-            date_obj = datetime.strptime(date_str, '%d %b %Y')
-            return date_obj.weekday() >= 5  # 5=Saturday, 6=Sunday
-        except:
-            # Try other formats
-            formats = ['%d-%b-%Y', '%d/%m/%Y', '%Y-%m-%d']
-            for fmt in formats:
-                try:
-                    date_obj = datetime.strptime(date_str, fmt)
-                    return date_obj.weekday() >= 5
-                except:
-                    continue
-            return False
\ No newline at end of file
+        return is_weekend(date_str)
\ No newline at end of file
@@ -0,0 +1,165 @@
+"""
+Cross-employee collusion detection on a sparse employee x vendor graph
+
+Every other detector looks at one expense or one employee. Here the whole
+history becomes sparse employee x vendor count/spend matrices. An edge is
+suspicious when an employee funnels a large share of their spend to an
+obscure vendor (one that only a handful of employees use), or when the
+same receipt (vendor, amount and date fingerprint) is filed by more than
+one employee. Employees joined by
+suspicious edges are grouped with ``connected_components``, and every
+component with at least two employees is reported as a cluster.
+"""
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from memory.fingerprint_store import receipt_fingerprint
+from models import parse_amount
+
+
+class CollusionGraphAnalyzer:
+    def __init__(self, min_ring_size=2, max_vendor_employees=8, min_spend_share=0.2):
+        self.min_ring_size = min_ring_size
+        # A vendor used by more employees than this is considered mainstream
+        self.max_vendor_employees = max_vendor_employees
+        # Share of an employee's total spend that counts as funnelling
+        self.min_spend_share = min_spend_share
+
+    def analyze_expenses(self, expenses: List[Dict]) -> Dict:
+        """``analyze`` over expense dicts or Expense records"""
+        return self.analyze(
+            employee_ids=[e.get('employee_id') for e in expenses],
+            vendors=[e.get('merchant') or e.get('vendor') for e in expenses],
+            amounts=[e.get('amount') for e in expenses],
+            receipt_keys=[self._receipt_key(e) for e in expenses]
+        )
+    
+    def _receipt_key(self, expense) -> str:
+        """Vendor + cents + date fingerprint, or '' when any of them is missing"""
+        vendor = expense.get('merchant') or expense.get('vendor')
+        amount = parse_amount(expense.get('amount') or expense.get('amount_raw'))
+        date = expense.get('date') or expense.get('date_raw')
+        if not vendor or amount <= 0 or not date:
+            return ''
+        return receipt_fingerprint(vendor, amount, date)
+
+    def analyze(self, employee_ids, vendors, amounts, receipt_keys=None) -> Dict:
+        """
+        Find collusion clusters in column data
+
+        Returns ``clusters`` (list of dicts, largest spend first), per-row
+        ``expense_cluster`` (cluster index or -1) and ``cooccurrence``, the
+        sparse employee x employee count of shared suspicious vendors and
+        receipts (indexed like ``employees``).
+        """
+        from scipy import sparse
+        from scipy.sparse.csgraph import connected_components
+
+        employee_codes, employees = pd.factorize(pd.Series(employee_ids, dtype=object))
+        vendor_codes, vendor_names = pd.factorize(
+            pd.Series(vendors, dtype=object).fillna('').astype(str).str.strip().str.lower().replace('', None)
+        )
+        amounts = pd.to_numeric(pd.Series(amounts), errors='coerce').fillna(0).clip(lower=0).to_numpy(float)
+        n_rows, n_employees, n_vendors = len(employee_codes), len(employees), len(vendor_names)
+        if n_employees == 0:
+            return {'clusters': [], 'expense_cluster': np.full(n_rows, -1), 'employees': [],
+                    'cooccurrence': sparse.csr_matrix((0, 0))}
+
+        # Rows without an employee or vendor take no part in the vendor graph
+        has_vendor = (employee_codes >= 0) & (vendor_codes >= 0)
+        rows, cols = employee_codes[has_vendor], vendor_codes[has_vendor]
+        shape = (n_employees, n_vendors)
+        # Duplicate (employee, vendor) entries are summed on conversion
+        spend = sparse.csr_matrix((amounts[has_vendor], (rows, cols)), shape=shape)
+        counts = sparse.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=shape)
+
+        # Obscure vendors: few distinct employees, but enough to form a ring
+        vendor_employees = np.diff(counts.tocsc().indptr)
+        obscure = (vendor_employees >= self.min_ring_size) & (vendor_employees <= self.max_vendor_employees)
+
+        # Funnelling edges: a large share of the employee's spend goes to an obscure vendor
+        employee_spend = np.asarray(spend.sum(axis=1)).ravel()
+        inverse_spend = np.divide(1.0, employee_spend, out=np.zeros(n_employees), where=employee_spend > 0)
+        share = (sparse.diags(inverse_spend) @ spend).tocsr()
+        funnel = (share >= self.min_spend_share).multiply(sparse.csr_matrix(obscure.astype(np.int8))).tocsc()
+        # ...and a vendor only forms a ring when enough employees funnel to it
+        funnel = funnel.multiply(sparse.csr_matrix((np.diff(funnel.indptr) >= self.min_ring_size).astype(np.int8)))
+        funnel = sparse.csr_matrix(funnel, dtype=np.int32)
+        funnel.eliminate_zeros()
+
+        # Receipts filed by more than one employee
+        row_shared = np.zeros(n_rows, dtype=bool)
+        shared_receipts = sparse.csr_matrix((n_employees, 0), dtype=np.int32)
+        if receipt_keys is not None:
+            receipt_codes, _ = pd.factorize(pd.Series(receipt_keys, dtype=object).replace('', None))
+            has_receipt = (receipt_codes >= 0) & (employee_codes >= 0)
+            receipts = sparse.csr_matrix(
+                (np.ones(has_receipt.sum(), dtype=np.int32), (employee_codes[has_receipt], receipt_codes[has_receipt])),
+                shape=(n_employees, receipt_codes.max() + 1)
+            )
+            receipts = (receipts > 0).astype(np.int32).tocsc()
+            shared = np.diff(receipts.indptr) >= 2
+            shared_receipts = receipts[:, np.flatnonzero(shared)]
+            row_shared[has_receipt] = shared[receipt_codes[has_receipt]]
+
+        # Employee x employee counts of shared suspicious vendors and receipts
+        edges = sparse.hstack([funnel, shared_receipts]).tocsr()
+        cooccurrence = (edges @ edges.T).tocsr()
+        cooccurrence.setdiag(0)
+        cooccurrence.eliminate_zeros()
+
+        _, labels = connected_components(cooccurrence, directed=False)
+        in_ring = np.bincount(labels)[labels] >= 2
+
+        # Rows that are one of a ring member's suspicious edges
+        row_funnel = np.zeros(n_rows, dtype=bool)
+        row_funnel[has_vendor] = np.asarray(funnel[rows, cols]).ravel() > 0
+        row_label = np.where(employee_codes >= 0, labels[np.maximum(employee_codes, 0)], -1)
+        row_in_ring = (employee_codes >= 0) & in_ring[np.maximum(employee_codes, 0)]
+        row_funnel &= row_in_ring
+        row_shared &= row_in_ring
+
+        clusters = self._summarize(labels, in_ring, row_label, row_funnel, row_shared,
+                                   employees, vendor_names, vendor_codes, amounts)
+        cluster_of_label = np.full(labels.max() + 1, -1)
+        for i, cluster in enumerate(clusters):
+            cluster_of_label[cluster.pop('_label')] = i
+        expense_cluster = np.where(row_funnel | row_shared, cluster_of_label[np.maximum(row_label, 0)], -1)
+        return {
+            'clusters': clusters,
+            'expense_cluster': expense_cluster,
+            'employees': list(employees),
+            'cooccurrence': cooccurrence
+        }
+
+    def _summarize(self, labels, in_ring, row_label, row_funnel, row_shared,
+                   employees, vendor_names, vendor_codes, amounts) -> List[Dict]:
+        suspicious = row_funnel | row_shared
+        rows = pd.DataFrame({
+            'label': row_label[suspicious],
+            'vendor': vendor_codes[suspicious],
+            'amount': amounts[suspicious],
+            'funnel': row_funnel[suspicious],
+            'shared_receipt': row_shared[suspicious]
+        })
+        clusters = []
+        for label, group in rows.groupby('label', sort=False):
+            members = [employees[i] for i in np.flatnonzero((labels == label) & in_ring)]
+            vendors = sorted({vendor_names[v] for v in group.loc[group['funnel'], 'vendor']})
+            reasons = []
+            if vendors:
+                reasons.append(f"{len(members)} employees funnelling spend to obscure vendor(s): {', '.join(vendors)}")
+            if group['shared_receipt'].any():
+                reasons.append(f"Same receipt filed by multiple employees ({int(group['shared_receipt'].sum())} expenses)")
+            clusters.append({
+                '_label': label,
+                'employees': sorted(members),
+                'vendors': vendors,
+                'expense_count': len(group),
+                'total_amount': round(float(group['amount'].sum()), 2),
+                'reasons': reasons
+            })
+        clusters.sort(key=lambda c: c['total_amount'], reverse=True)
+        return clusters
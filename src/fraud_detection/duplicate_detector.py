@@ -1,7 +1,12 @@
 import hashlib
 import re
 from difflib import SequenceMatcher
-from datetime import datetime
+
+import numpy as np
+
+from models import ExpenseBatch
+from utils.dates import parse_date
+from .near_duplicate_search import top_k_similar
 
 class DuplicateDetector:
     def __init__(self, similarity_threshold=0.85):
@@ -36,23 +41,23 @@ class DuplicateDetector:
         duplicates = []
         reasons = []
         
-        current_vendor = current_expense.get('vendor', '').lower()
+        current_vendor = self._normalized_vendor(current_expense)
         current_amount = current_expense.get('amount', '') or current_expense.get('amount_raw', '')
         current_date = current_expense.get('date', '') or current_expense.get('date_raw', '')
         current_text = current_expense.get('raw_text', '')
         
         # Calculate current text hash
-        current_hash = self.calculate_text_hash(current_text)
+        current_hash = self._text_hash(current_expense, current_text)
         
         for expense in historical_expenses:
-            hist_vendor = expense.get('vendor', '').lower()
+            hist_vendor = self._normalized_vendor(expense)
             hist_amount = expense.get('amount', '') or expense.get('amount_raw', '')
             hist_date = expense.get('date', '') or expense.get('date_raw', '')
             hist_text = expense.get('raw_text', '')
-            hist_hash = self.calculate_text_hash(hist_text)
+            hist_hash = self._text_hash(expense, hist_text)
             
-            # Skip if comparing with itself
-            if current_hash == hist_hash and current_hash != "":
+            # Skip if comparing with itself (the same record, not merely the same text)
+            if expense is current_expense:
                 continue
             
             # Check exact text hash match
@@ -82,8 +87,114 @@ class DuplicateDetector:
             "reasons": list(set(reasons))
         }
     
+    def detect_duplicates_batch(self, current_expenses, historical_expenses, top_k=5,
+                                query_chunk=1024, corpus_chunk=16384):
+        """
+        Detect duplicates for a whole batch at once
+        
+        Returns one ``detect_duplicates``-shaped result per current expense.
+        Text similarity is the cosine of character n-gram vectors from a
+        chunked sparse top-k search (at most ``top_k`` text matches per
+        expense) instead of pairwise SequenceMatcher ratios, and the vendor +
+        amount + date check is a vectorized join, so large batches against
+        large histories run in bounded memory.
+        """
+        current = self._as_batch(current_expenses)
+        history = self._as_batch(historical_expenses)
+        current_items = self._items(current_expenses)
+        history_items = self._items(historical_expenses)
+        # Record identity keys: a pair is only "itself" when both sides are the same object
+        current_keys = np.array([str(id(item)) for item in current_items], dtype=object)
+        history_keys = np.array([str(id(item)) for item in history_items], dtype=object)
+        
+        # Per current expense: history index -> reason
+        matches = [{} for _ in range(len(current))]
+        if len(current) and len(history):
+            rows, cols, scores = top_k_similar(
+                [record.raw_text for record in current], [record.raw_text for record in history],
+                k=top_k, threshold=self.similarity_threshold,
+                query_chunk=query_chunk, corpus_chunk=corpus_chunk,
+                query_keys=current_keys, corpus_keys=history_keys
+            )
+            for row, col in self._exact_text_pairs(current, history, current_keys, history_keys):
+                matches[row][col] = "Exact duplicate receipt detected"
+            for row, col, score in zip(rows.tolist(), cols.tolist(), scores.tolist()):
+                matches[row].setdefault(col, f"High text similarity ({score:.2f})")
+            for row, col in self._vendor_amount_date_pairs(current, history, current_keys, history_keys):
+                matches[row].setdefault(col, "Same vendor, amount, and date combination")
+        
+        results = []
+        for found in matches:
+            order = sorted(found)
+            results.append({
+                "is_duplicate": len(order) > 0,
+                "duplicate_count": len(order),
+                "matching_expenses": [history_items[i] for i in order[:3]],
+                "reasons": list(set(found.values()))
+            })
+        return results
+    
+    def _as_batch(self, expenses):
+        return expenses if isinstance(expenses, ExpenseBatch) else ExpenseBatch.from_records(expenses)
+    
+    def _items(self, expenses):
+        return list(expenses.records if isinstance(expenses, ExpenseBatch) else expenses)
+    
+    def _exact_text_pairs(self, current, history, current_keys, history_keys):
+        """(current index, history index) pairs with the same non-empty text hash"""
+        import pandas as pd
+        
+        left = pd.DataFrame({'hash': current.text_hashes, 'key': current_keys}).reset_index()
+        right = pd.DataFrame({'hash': history.text_hashes, 'key': history_keys}).reset_index()
+        merged = left[left['hash'] != ''].merge(right, on='hash', suffixes=('', '_hist'))
+        merged = merged[merged['key'] != merged['key_hist']]
+        return zip(merged['index'].tolist(), merged['index_hist'].tolist())
+    
+    def _vendor_amount_date_pairs(self, current, history, current_keys, history_keys,
+                                  days=1, amount_threshold=0.01):
+        """(current index, history index) pairs with the same vendor, amount and date"""
+        import pandas as pd
+        
+        def frame(batch, keys):
+            index = np.flatnonzero((batch.normalized_vendors != '') & ~np.isnat(batch.dates))
+            return pd.DataFrame({
+                'index': index,
+                'vendor': batch.normalized_vendors[index],
+                'cents': np.round(batch.amounts[index] * 100).astype(np.int64),
+                'amount': batch.amounts[index],
+                'day': batch.dates[index].astype(np.int64),
+                'key': keys[index]
+            })
+        
+        left, right = frame(current, current_keys), frame(history, history_keys)
+        pairs = []
+        # Amounts within a cent of each other land in neighbouring cent buckets
+        for offset in (-1, 0, 1):
+            merged = left.merge(right.assign(cents=right['cents'] + offset),
+                                on=['vendor', 'cents'], suffixes=('', '_hist'))
+            keep = (
+                ((merged['amount'] - merged['amount_hist']).abs() <= amount_threshold) &
+                ((merged['day'] - merged['day_hist']).abs() <= days) &
+                (merged['key'] != merged['key_hist'])
+            )
+            pairs.append(merged.loc[keep, ['index', 'index_hist']])
+        pairs = pd.concat(pairs)
+        return zip(pairs['index'].tolist(), pairs['index_hist'].tolist())
+    
+    def _normalized_vendor(self, expense):
+        """Pre-normalized vendor of an Expense record, else lower-cased from the dict"""
+        normalized = getattr(expense, 'normalized_vendor', None)
+        return normalized if normalized is not None else expense.get('vendor', '').lower()
+    
+    def _text_hash(self, expense, text):
+        """Precomputed hash of an Expense record, else hashed from the text"""
+        precomputed = getattr(expense, 'text_hash', None)
+        return precomputed if precomputed is not None else self.calculate_text_hash(text)
+    
     def _extract_numeric_amount(self, amount_str):
         """Extract numeric value from amount string"""
+        if isinstance(amount_str, (int, float)):
+            return float(amount_str)
         if not amount_str:
             return 0.0
         try:
@@ -94,19 +205,8 @@ class DuplicateDetector:
             return 0.0
     
     def _parse_date(self, date_str):
-        """Parse date string to datetime object"""
-        if not date_str:
-            return None
-        try:
-            formats = ['%d %b %Y', '%d-%b-%Y', '%d/%m/%Y', '%Y-%m-%d', '%d %B %Y']
-            for fmt in formats:
-                try:
-                    return datetime.strptime(date_str, fmt)
-                except:
-                    continue
-            return None
-        except:
-            return None
+        """Parse date string to a date (already-parsed dates pass through)"""
+        return parse_date(date_str)
     
     def _dates_within_range(self, date1_str, date2_str, days=1):
         """Check if two dates are within specified days range"""
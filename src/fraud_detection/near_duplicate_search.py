@@ -0,0 +1,88 @@
+"""
+Chunked top-k cosine search over character n-grams
+
+Texts are hashed into L2-normalized character n-gram vectors (no fitted
+vocabulary, so a million-row history needs no training pass), and query
+chunks are multiplied against corpus chunks as sparse matrices. Only
+scores above the threshold survive each product and every row keeps at
+most ``k`` neighbours, so memory is bounded by the chunk sizes rather
+than by ``len(queries) * len(corpus)``.
+"""
+from typing import List, Tuple
+
+import numpy as np
+
+
+def char_ngram_vectorizer(ngram_range=(3, 5), n_features=2 ** 18):
+    from sklearn.feature_extraction.text import HashingVectorizer
+    return HashingVectorizer(
+        analyzer='char_wb', ngram_range=ngram_range, n_features=n_features,
+        lowercase=True, alternate_sign=False, norm='l2', dtype=np.float32
+    )
+
+
+def _keep_top_k(rows, cols, scores, k):
+    """Keep the ``k`` best (row, col, score) entries per row"""
+    if len(rows) == 0:
+        return rows, cols, scores
+    order = np.lexsort((cols, -scores, rows))  # ties go to the earlier corpus row
+    rows, cols, scores = rows[order], cols[order], scores[order]
+    starts = np.r_[0, np.flatnonzero(np.diff(rows)) + 1]
+    rank = np.arange(len(rows)) - np.repeat(starts, np.diff(np.r_[starts, len(rows)]))
+    keep = rank < k
+    return rows[keep], cols[keep], scores[keep]
+
+
+def top_k_similar(queries: List[str], corpus: List[str], k: int = 5, threshold: float = 0.85,
+                  query_chunk: int = 1024, corpus_chunk: int = 16384,
+                  ngram_range=(3, 5), n_features=2 ** 18,
+                  query_keys=None, corpus_keys=None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    For each query, up to ``k`` corpus texts with cosine similarity above ``threshold``
+
+    When ``query_keys``/``corpus_keys`` are given, pairs with the same
+    non-empty key (e.g. the same record on both sides) are never
+    reported. Returns parallel arrays ``(query_index, corpus_index, score)``
+    sorted by query index and descending score.
+    """
+    empty = (np.array([], dtype=np.int64), np.array([], dtype=np.int64), np.array([], dtype=np.float32))
+    if not queries or not corpus:
+        return empty
+
+    if query_keys is not None:
+        query_keys = np.asarray(query_keys, dtype=object)
+        corpus_keys = np.asarray(corpus_keys, dtype=object)
+
+    vectorizer = char_ngram_vectorizer(ngram_range, n_features)
+    query_matrix = vectorizer.transform([text or '' for text in queries]).tocsr()
+
+    found_rows, found_cols, found_scores = [], [], []
+    for corpus_start in range(0, len(corpus), corpus_chunk):
+        corpus_texts = corpus[corpus_start:corpus_start + corpus_chunk]
+        corpus_matrix = vectorizer.transform([text or '' for text in corpus_texts]).T.tocsc()
+
+        for query_start in range(0, query_matrix.shape[0], query_chunk):
+            scores = (query_matrix[query_start:query_start + query_chunk] @ corpus_matrix).tocsr()
+            # Read surviving entries straight from the CSR arrays (no COO copy)
+            above = np.flatnonzero(scores.data > threshold)
+            if not len(above):
+                continue
+            rows = np.searchsorted(scores.indptr, above, side='right').astype(np.int64) - 1 + query_start
+            cols = scores.indices[above].astype(np.int64) + corpus_start
+            values = scores.data[above]
+            if query_keys is not None:
+                same = (query_keys[rows] == corpus_keys[cols]) & (query_keys[rows] != '')
+                rows, cols, values = rows[~same], cols[~same], values[~same]
+            found_rows.append(rows)
+            found_cols.append(cols)
+            found_scores.append(values)
+
+        # Prune after each corpus chunk so candidates never exceed k per query
+        if found_rows:
+            merged = _keep_top_k(np.concatenate(found_rows), np.concatenate(found_cols),
+                                 np.concatenate(found_scores), k)
+            found_rows, found_cols, found_scores = [merged[0]], [merged[1]], [merged[2]]
+
+    if not found_rows:
+        return empty
+    return found_rows[0], found_cols[0], found_scores[0]
@@ -0,0 +1,153 @@
+"""
+Rolling time-window counters per employee
+
+Each employee's expenses are kept as a sorted array of timestamps (in
+minutes) with a running total of amounts alongside, so "how many
+expenses, and how much, in the last N hours" is two bisects and a
+subtraction. The same structure is kept per (employee, vendor) pair and
+for each employee's after-hours expenses. Expenses usually arrive in time
+order, which makes an insert an append. An out-of-order insert only marks
+the running totals stale; they are rebuilt in one pass
+(``itertools.accumulate``) at the next query, so a batch of late expenses
+costs one rebuild instead of one shift each.
+
+An expense without an hour is stored at the start of its day, and a query
+without an hour is taken at the end of its day. A one-day window then
+covers exactly the calendar day of the query, as the old same-day check
+did.
+"""
+from bisect import bisect_right
+from datetime import datetime
+from itertools import accumulate
+from typing import Dict, Iterable, Optional, Tuple
+
+from models import parse_amount, parse_hour
+from utils.dates import parse_date
+
+MINUTES_PER_DAY = 24 * 60
+
+
+def _timestamp(when, hour: Optional[int], end_of_day: bool) -> Optional[int]:
+    """Minutes since the proleptic epoch, or None for an unparseable date"""
+    if isinstance(when, datetime) and hour is None:
+        return when.toordinal() * MINUTES_PER_DAY + when.hour * 60 + when.minute
+    day = parse_date(when)
+    if day is None:
+        return None
+    if hour is None:
+        return day.toordinal() * MINUTES_PER_DAY + (MINUTES_PER_DAY - 1 if end_of_day else 0)
+    return day.toordinal() * MINUTES_PER_DAY + int(hour) * 60
+
+
+class _Series:
+    """Sorted timestamps with running amount totals (``totals[i]`` sums the first ``i``)"""
+    __slots__ = ('times', 'amounts', '_totals', '_stale')
+
+    def __init__(self):
+        self.times = []
+        self.amounts = []
+        self._totals = [0.0]
+        self._stale = False
+
+    def add(self, timestamp: int, amount: float):
+        if not self.times or timestamp >= self.times[-1]:
+            self.times.append(timestamp)
+            self.amounts.append(amount)
+            if not self._stale:
+                self._totals.append(self._totals[-1] + amount)
+            return
+        i = bisect_right(self.times, timestamp)
+        self.times.insert(i, timestamp)
+        self.amounts.insert(i, amount)
+        self._stale = True
+
+    @property
+    def totals(self):
+        if self._stale:
+            self._totals = list(accumulate(self.amounts, initial=0.0))
+            self._stale = False
+        return self._totals
+
+    def window(self, start: int, end: int) -> Tuple[int, float]:
+        """Count and total of timestamps in ``(start, end]``"""
+        low, high = bisect_right(self.times, start), bisect_right(self.times, end)
+        totals = self.totals
+        return high - low, totals[high] - totals[low]
+
+
+class TimeWindowCounters:
+    def __init__(self, after_hours_start: int = 18, after_hours_end: int = 6):
+        # Hours at or after the start, or at or before the end, count as after hours
+        self.after_hours_start = after_hours_start
+        self.after_hours_end = after_hours_end
+        self.spend = {}
+        self.vendors = {}
+        self.after_hours = {}
+
+    def __len__(self) -> int:
+        return sum(len(series.times) for series in self.spend.values())
+
+    def is_after_hours(self, hour: Optional[int]) -> bool:
+        return hour is not None and (hour >= self.after_hours_start or hour <= self.after_hours_end)
+
+    def add(self, employee_id, when, amount: float = 0.0, vendor: str = None, hour: Optional[int] = None):
+        """Count one expense; returns False when its date cannot be parsed"""
+        timestamp = _timestamp(when, hour, end_of_day=False)
+        if timestamp is None:
+            return False
+        amount = amount if isinstance(amount, (int, float)) else 0.0
+        self.spend.setdefault(employee_id, _Series()).add(timestamp, amount)
+        if vendor:
+            self.vendors.setdefault((employee_id, vendor), _Series()).add(timestamp, amount)
+        if self.is_after_hours(hour):
+            self.after_hours.setdefault(employee_id, _Series()).add(timestamp, amount)
+        return True
+
+    def add_expense(self, expense):
+        """``add`` for an expense dict or Expense record"""
+        return self.add(expense.get('employee_id'), expense.get('date') or expense.get('date_raw'),
+                        parse_amount(expense.get('amount') or expense.get('amount_raw')),
+                        vendor_key(expense), expense_hour(expense))
+
+    def add_many(self, expenses: Iterable):
+        for expense in expenses:
+            self.add_expense(expense)
+
+    @staticmethod
+    def _query(series: Optional[_Series], when, hours: float, hour: Optional[int]) -> Tuple[int, float]:
+        end = _timestamp(when, hour, end_of_day=True)
+        if series is None or end is None:
+            return 0, 0.0
+        return series.window(end - int(hours * 60), end)
+
+    def window(self, employee_id, when, hours: float, hour: Optional[int] = None) -> Tuple[int, float]:
+        """Count and total amount of the employee's expenses in the ``hours`` before ``when``"""
+        return self._query(self.spend.get(employee_id), when, hours, hour)
+
+    def vendor_count(self, employee_id, vendor: str, when, hours: float, hour: Optional[int] = None) -> int:
+        """The employee's expenses at ``vendor`` in the ``hours`` before ``when``"""
+        return self._query(self.vendors.get((employee_id, vendor)), when, hours, hour)[0]
+
+    def after_hours_count(self, employee_id, when, hours: float, hour: Optional[int] = None) -> int:
+        """The employee's after-hours expenses in the ``hours`` before ``when``"""
+        return self._query(self.after_hours.get(employee_id), when, hours, hour)[0]
+
+    def spend_windows(self, employee_id, when, days=(1, 7, 30), hour: Optional[int] = None) -> Dict[int, Dict]:
+        """``{days: {'count', 'total'}}`` for each rolling window"""
+        windows = {}
+        for span in days:
+            count, total = self.window(employee_id, when, span * 24, hour)
+            windows[span] = {'count': count, 'total': round(total, 2)}
+        return windows
+
+
+def expense_hour(expense) -> Optional[int]:
+    """The expense's hour of day, or None when missing or NaN"""
+    return parse_hour(expense.get('hour'))
+
+
+def vendor_key(expense) -> str:
+    normalized = getattr(expense, 'normalized_vendor', None)
+    if normalized is not None:
+        return normalized
+    return str(expense.get('merchant') or expense.get('vendor') or '').strip().lower()
@@ -82,6 +82,8 @@ class VendorRiskEngine:
     
     def _extract_numeric_amount(self, amount_str):
         """Extract numeric value from amount string"""
+        if isinstance(amount_str, (int, float)):
+            return float(amount_str)
         if not amount_str:
             return 0.0
         try:
@@ -109,9 +111,13 @@ class VendorRiskEngine:
             return {"score": 0, "reasons": []}
             
         vendor_count = 0
+        vendor_lower = vendor_name.lower()
         for expense in historical_data:
-            hist_vendor = expense.get('vendor', '')
-            if hist_vendor and hist_vendor.lower() == vendor_name.lower():
+            # Expense records carry a pre-normalized vendor
+            hist_vendor = getattr(expense, 'normalized_vendor', None)
+            if hist_vendor is None:
+                hist_vendor = expense.get('vendor', '').lower()
+            if hist_vendor and hist_vendor == vendor_lower:
                 vendor_count += 1
         
         risk_score = 0
@@ -0,0 +1,222 @@
+"""
+Nearest-neighbour index for "similar expense" lookups
+
+Similarity is exact equality on employee, category and merchant plus a
+ratio of amounts, so an expense can only score above a threshold against
+records that share enough of those fields. The index keeps one bucket per
+combination of field values, and each bucket holds its records sorted by
+log-amount. A radius query looks only at the buckets that can still reach
+the threshold and bisects each one to an amount window. A k-NN query walks
+outward from the query amount, starting with the heaviest buckets. Inserts
+and removals are a bisect per bucket.
+"""
+import math
+from bisect import bisect_left, bisect_right
+from heapq import heappush, heappushpop
+from itertools import combinations
+from typing import Dict, List, Tuple
+
+FIELD_WEIGHTS = (('employee_id', 0.3), ('category', 0.2), ('merchant', 0.3))
+AMOUNT_WEIGHT = 0.2
+
+
+def expense_similarity(expense1: Dict, expense2: Dict) -> float:
+    """Weighted field matches plus amount ratio, in [0, 1]"""
+    score = 0
+    matches = 0
+    for field, weight in FIELD_WEIGHTS:
+        if expense1.get(field) == expense2.get(field):
+            score += weight
+            matches += 1
+
+    # Amount similarity (ratio of the smaller to the larger)
+    amount1 = expense1.get('amount', 0)
+    amount2 = expense2.get('amount', 0)
+    if amount1 > 0 and amount2 > 0:
+        score += min(amount1, amount2) / max(amount1, amount2) * AMOUNT_WEIGHT
+        matches += 1
+
+    return score if matches > 0 else 0
+
+
+def _log_amount(expense: Dict):
+    amount = expense.get('amount', 0)
+    return math.log(amount) if isinstance(amount, (int, float)) and amount > 0 else None
+
+
+class _Bucket:
+    """Record ids sorted by log-amount, plus the ids without a usable amount"""
+    __slots__ = ('amounts', 'ids', 'unpriced')
+
+    def __init__(self):
+        self.amounts = []
+        self.ids = []
+        self.unpriced = []
+
+    def __len__(self):
+        return len(self.ids) + len(self.unpriced)
+
+    def add(self, log_amount, record_id):
+        if log_amount is None:
+            self.unpriced.append(record_id)
+            return
+        i = bisect_right(self.amounts, log_amount)
+        self.amounts.insert(i, log_amount)
+        self.ids.insert(i, record_id)
+
+    def remove(self, log_amount, record_id):
+        if log_amount is None:
+            self.unpriced.remove(record_id)
+            return
+        low, high = bisect_left(self.amounts, log_amount), bisect_right(self.amounts, log_amount)
+        i = low + self.ids[low:high].index(record_id)
+        del self.amounts[i]
+        del self.ids[i]
+
+    def within(self, log_amount, radius):
+        return self.ids[bisect_left(self.amounts, log_amount - radius):bisect_right(self.amounts, log_amount + radius)]
+
+    def outward(self, log_amount):
+        """Priced ids in order of increasing amount distance, with that distance"""
+        right = bisect_left(self.amounts, log_amount)
+        left = right - 1
+        while left >= 0 or right < len(self.amounts):
+            if right >= len(self.amounts) or (left >= 0 and log_amount - self.amounts[left] <= self.amounts[right] - log_amount):
+                yield self.ids[left], log_amount - self.amounts[left]
+                left -= 1
+            else:
+                yield self.ids[right], self.amounts[right] - log_amount
+                right += 1
+
+
+class ExpenseIndex:
+    """
+    Incremental similarity index over expense dicts
+
+    Only field combinations that can score above ``min_similarity`` are
+    bucketed, so queries with a lower threshold must fall back to a scan.
+    """
+
+    def __init__(self, min_similarity: float = 0.5):
+        self.min_similarity = min_similarity
+        # Field subsets, heaviest first, that can still exceed min_similarity with a full amount match
+        subsets = (
+            (sum(weight for _, weight in fields), tuple(field for field, _ in fields))
+            for size in range(len(FIELD_WEIGHTS) + 1)
+            for fields in combinations(FIELD_WEIGHTS, size)
+        )
+        self.subsets = sorted(
+            ((weight, fields) for weight, fields in subsets if weight + AMOUNT_WEIGHT > min_similarity),
+            reverse=True
+        )
+        self.records = {}
+        self.buckets = {}
+        self._next_id = 0
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def _key(self, expense: Dict, fields):
+        return fields, tuple(expense.get(field) for field in fields)
+
+    def add(self, expense: Dict) -> int:
+        """Insert an expense; returns the id used to remove it"""
+        record_id = self._next_id
+        self._next_id += 1
+        self.records[record_id] = expense
+        log_amount = _log_amount(expense)
+        for _, fields in self.subsets:
+            key = self._key(expense, fields)
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                bucket = self.buckets[key] = _Bucket()
+            bucket.add(log_amount, record_id)
+        return record_id
+
+    def remove(self, record_id: int):
+        expense = self.records.pop(record_id)
+        log_amount = _log_amount(expense)
+        for _, fields in self.subsets:
+            key = self._key(expense, fields)
+            bucket = self.buckets[key]
+            bucket.remove(log_amount, record_id)
+            if not len(bucket):
+                del self.buckets[key]
+
+    def clear(self):
+        self.records.clear()
+        self.buckets.clear()
+
+    def query_radius(self, expense: Dict, threshold: float) -> List[Tuple[int, Dict, float]]:
+        """All ``(id, expense, similarity)`` with similarity above ``threshold``, in insertion order"""
+        if threshold < self.min_similarity:
+            raise ValueError(f"threshold {threshold} is below the index minimum {self.min_similarity}")
+        log_amount = _log_amount(expense)
+        candidates = set()
+        for weight, fields in self.subsets:
+            # The amount term must make up whatever the matching fields leave short
+            slack = threshold - weight
+            if slack >= AMOUNT_WEIGHT + 1e-9:
+                continue
+            bucket = self.buckets.get(self._key(expense, fields))
+            if bucket is None:
+                continue
+            if slack <= 1e-9:
+                # The fields alone (nearly) suffice; the exact check below decides
+                candidates.update(bucket.ids)
+                candidates.update(bucket.unpriced)
+            elif log_amount is None:
+                continue
+            else:
+                # ratio = exp(-|log a1 - log a2|) must exceed slack / AMOUNT_WEIGHT
+                candidates.update(bucket.within(log_amount, -math.log(slack / AMOUNT_WEIGHT) + 1e-9))
+
+        results = []
+        for record_id in sorted(candidates):
+            score = expense_similarity(expense, self.records[record_id])
+            if score > threshold:
+                results.append((record_id, self.records[record_id], score))
+        return results
+
+    def kneighbors(self, expense: Dict, k: int = 5) -> List[Tuple[int, Dict, float]]:
+        """The ``k`` most similar ``(id, expense, similarity)`` scoring above ``min_similarity``, best first"""
+        log_amount = _log_amount(expense)
+        best = []  # min-heap of (score, -id): ties go to the older record
+        seen = set()
+
+        def beaten(bound):
+            # Strict, with float slack: an equal score can still win on age
+            return len(best) == k and bound < best[0][0] - 1e-9
+
+        def offer(record_id):
+            if record_id in seen:
+                return
+            seen.add(record_id)
+            score = expense_similarity(expense, self.records[record_id])
+            if score <= self.min_similarity:
+                return
+            if len(best) < k:
+                heappush(best, (score, -record_id))
+            elif (score, -record_id) > best[0]:
+                heappushpop(best, (score, -record_id))
+
+        for weight, fields in self.subsets:
+            if beaten(weight + AMOUNT_WEIGHT):
+                break  # lighter buckets cannot beat the current k-th best
+            bucket = self.buckets.get(self._key(expense, fields))
+            if bucket is None:
+                continue
+            if log_amount is not None:
+                for record_id, distance in bucket.outward(log_amount):
+                    if beaten(weight + math.exp(-distance) * AMOUNT_WEIGHT):
+                        break
+                    offer(record_id)
+                unpriced = bucket.unpriced
+            else:
+                unpriced = bucket.ids + bucket.unpriced  # no amount term for any of them
+            for record_id in unpriced:
+                if beaten(weight):
+                    break
+                offer(record_id)
+
+        return [(-neg_id, self.records[-neg_id], score) for score, neg_id in sorted(best, reverse=True)]
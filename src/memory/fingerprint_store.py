@@ -0,0 +1,119 @@
+"""
+Persistent receipt fingerprints for cross-run duplicate checks
+
+A fingerprint is the MD5 of a receipt's normalized vendor, amount (in
+cents) and date, so the same receipt re-typed with different spacing,
+case or date format still matches. Every fingerprint is stored once in a
+SQLite table, together with the employee who filed it, the expense date
+and the batch that first ingested it. Recording the batch makes re-ingest
+idempotent: a batch that is run again finds its own receipts and does not
+flag them.
+
+Lookups hit an in-memory dict by default. A worker that cannot hold the
+whole history in memory can pass ``bloom_capacity`` instead; a Bloom
+filter then answers "never seen" (the common case) without touching disk,
+and only possible matches are confirmed against the SQLite primary key.
+"""
+import hashlib
+import math
+import os
+import re
+import sqlite3
+from typing import Dict, Iterable, Optional, Tuple
+
+from utils.dates import parse_date
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def receipt_fingerprint(vendor, amount, date) -> str:
+    """MD5 of normalized vendor, amount in cents and ISO date"""
+    vendor = _WHITESPACE.sub(' ', str(vendor or '').strip().lower())
+    try:
+        cents = str(round(float(amount) * 100))
+    except (TypeError, ValueError):
+        cents = str(amount)
+    parsed = parse_date(date)
+    day = parsed.isoformat() if parsed else str(date or '').strip()
+    return hashlib.md5(f'{vendor}|{cents}|{day}'.encode()).hexdigest()
+
+
+class BloomFilter:
+    """Bit-array Bloom filter over hex digests (no false negatives)"""
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        capacity = max(int(capacity), 1)
+        self.n_bits = max(int(-capacity * math.log(error_rate) / math.log(2) ** 2), 8)
+        self.n_hashes = max(round(self.n_bits / capacity * math.log(2)), 1)
+        self.bits = bytearray((self.n_bits + 7) // 8)
+
+    def _positions(self, digest: str):
+        # Double hashing on two independent halves of the digest
+        first, second = int(digest[:16], 16), int(digest[16:32], 16) | 1
+        return [(first + i * second) % self.n_bits for i in range(self.n_hashes)]
+
+    def add(self, digest: str):
+        for position in self._positions(digest):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, digest: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(digest))
+
+
+class FingerprintStore:
+    def __init__(self, path: str, bloom_capacity: Optional[int] = None, bloom_error_rate: float = 0.001):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS fingerprints ('
+            'fingerprint TEXT PRIMARY KEY, employee_id TEXT, date TEXT, batch_id TEXT) WITHOUT ROWID'
+        )
+        self.connection.commit()
+
+        self.entries = None
+        self.bloom = None
+        rows = self.connection.execute('SELECT fingerprint, employee_id, date, batch_id FROM fingerprints')
+        if bloom_capacity:
+            self.bloom = BloomFilter(bloom_capacity, bloom_error_rate)
+            for fingerprint, *_ in rows:
+                self.bloom.add(fingerprint)
+        else:
+            self.entries = {fingerprint: (employee_id, date, batch_id)
+                            for fingerprint, employee_id, date, batch_id in rows}
+
+    def __len__(self) -> int:
+        if self.entries is not None:
+            return len(self.entries)
+        return self.connection.execute('SELECT COUNT(*) FROM fingerprints').fetchone()[0]
+
+    def get(self, fingerprint: str) -> Optional[Dict]:
+        """Where the receipt was first filed, or None when it was never seen"""
+        if self.entries is not None:
+            entry = self.entries.get(fingerprint)
+        elif fingerprint not in self.bloom:
+            return None
+        else:
+            entry = self.connection.execute(
+                'SELECT employee_id, date, batch_id FROM fingerprints WHERE fingerprint = ?', (fingerprint,)
+            ).fetchone()
+        if entry is None:
+            return None
+        employee_id, date, batch_id = entry
+        return {'employee_id': employee_id, 'date': date, 'batch_id': batch_id}
+
+    def add_many(self, entries: Iterable[Tuple[str, str, str, str]]):
+        """Record ``(fingerprint, employee_id, date, batch_id)`` rows; the first filing of a receipt wins"""
+        entries = list(entries)
+        with self.connection:
+            self.connection.executemany('INSERT OR IGNORE INTO fingerprints VALUES (?, ?, ?, ?)', entries)
+        for fingerprint, employee_id, date, batch_id in entries:
+            if self.entries is not None:
+                self.entries.setdefault(fingerprint, (employee_id, date, batch_id))
+            else:
+                self.bloom.add(fingerprint)
+
+    def close(self):
+        self.connection.close()
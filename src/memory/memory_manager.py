@@ -1,10 +1,10 @@
-import numpy as np
-import pandas as pd
-from sklearn.metrics.pairwise import cosine_similarity
 import json
 import os
 from datetime import datetime
 
+from utils.streaming_stats import AmountBaselines
+from .expense_index import ExpenseIndex, expense_similarity
+
 class MemoryManager:
     def __init__(self, memory_size=1000):
         self.memory_size = memory_size
@@ -15,6 +15,13 @@ class MemoryManager:
         # Simple embedding simulation (replace with actual model if needed)
         self.use_embeddings = False
         
+        # Similarity index over everything in expense_memory (ids kept in the same order)
+        self.similarity_index = ExpenseIndex()
+        self._index_ids = []
+        
+        # Streaming amount statistics per employee and category (never evicted)
+        self.amount_baselines = AmountBaselines()
+        
     def add_expense(self, expense_data):
         """Add expense to memory"""
         expense_record = {
@@ -23,6 +30,8 @@ class MemoryManager:
             'processed': False
         }
         self.expense_memory.append(expense_record)
+        self._index_ids.append(self.similarity_index.add(expense_data))
+        self.amount_baselines.add(expense_data)
         
         # Update employee behavior
         employee_id = expense_data.get('employee_id')
@@ -46,47 +55,32 @@ class MemoryManager:
         # Maintain memory size
         if len(self.expense_memory) > self.memory_size:
             self.expense_memory.pop(0)
+            self.similarity_index.remove(self._index_ids.pop(0))
     
     def find_similar_expenses(self, expense_data, threshold=0.8):
-        """Find similar historical expenses using simple matching"""
+        """Find similar expenses in memory, oldest first"""
         if not self.expense_memory:
             return []
-            
+        
+        if threshold >= self.similarity_index.min_similarity:
+            return [(data, score) for _, data, score in self.similarity_index.query_radius(expense_data, threshold)]
+        
+        # Below the index minimum every record can qualify, so scan
         similar_expenses = []
-        for record in self.expense_memory[-100:]:  # Check recent 100 records
+        for record in self.expense_memory:
             similarity_score = self._calculate_similarity(expense_data, record['data'])
             if similarity_score > threshold:
                 similar_expenses.append((record['data'], similarity_score))
         
         return similar_expenses
     
+    def nearest_expenses(self, expense_data, k=5):
+        """The ``k`` most similar expenses in memory, best first"""
+        return [(data, score) for _, data, score in self.similarity_index.kneighbors(expense_data, k)]
+    
     def _calculate_similarity(self, expense1, expense2):
         """Calculate similarity between two expenses"""
-        score = 0
-        matches = 0
-        
-        # Compare key fields
-        if expense1.get('employee_id') == expense2.get('employee_id'):
-            score += 0.3
-            matches += 1
-        
-        if expense1.get('category') == expense2.get('category'):
-            score += 0.2
-            matches += 1
-            
-        if expense1.get('merchant') == expense2.get('merchant'):
-            score += 0.3
-            matches += 1
-            
-        # Amount similarity (within 10%)
-        amount1 = expense1.get('amount', 0)
-        amount2 = expense2.get('amount', 0)
-        if amount1 > 0 and amount2 > 0:
-            amount_ratio = min(amount1, amount2) / max(amount1, amount2)
-            score += amount_ratio * 0.2
-            matches += 1
-        
-        return score if matches > 0 else 0
+        return expense_similarity(expense1, expense2)
     
     def add_fraud_pattern(self, pattern):
         """Add detected fraud pattern to memory"""
@@ -101,15 +95,20 @@ class MemoryManager:
         return self.fraud_patterns
     
     def get_employee_behavior(self, employee_id):
-        """Get behavior profile for an employee"""
-        return self.employee_behavior.get(employee_id, {})
+        """Get behavior profile for an employee, with their amount baseline"""
+        profile = self.employee_behavior.get(employee_id, {})
+        stats = self.amount_baselines.employee(employee_id)
+        if stats is None:
+            return profile
+        return {**profile, **{f'amount_{key}': value for key, value in stats.summary().items()}}
     
     def save_memory(self, filepath='memory_data.json'):
         """Save memory to file"""
         memory_data = {
             'expense_memory': self.expense_memory,
             'fraud_patterns': self.fraud_patterns,
-            'employee_behavior': self.employee_behavior
+            'employee_behavior': self.employee_behavior,
+            'amount_baselines': self.amount_baselines.to_dict()
         }
         
         with open(filepath, 'w') as f:
@@ -122,4 +121,9 @@ class MemoryManager:
                 memory_data = json.load(f)
                 self.expense_memory = memory_data.get('expense_memory', [])
                 self.fraud_patterns = memory_data.get('fraud_patterns', [])
-                self.employee_behavior = memory_data.get('employee_behavior', {})
\ No newline at end of file
+                self.employee_behavior = memory_data.get('employee_behavior', {})
+                baselines = memory_data.get('amount_baselines')
+                self.amount_baselines = AmountBaselines.from_dict(baselines) if baselines else AmountBaselines()
+            
+            self.similarity_index = ExpenseIndex(self.similarity_index.min_similarity)
+            self._index_ids = [self.similarity_index.add(record['data']) for record in self.expense_memory]
\ No newline at end of file
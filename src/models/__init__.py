@@ -0,0 +1,9 @@
+from .expense import Expense, ExpenseBatch, parse_amount, parse_hour, text_hash
+
+__all__ = [
+    'Expense',
+    'ExpenseBatch',
+    'parse_amount',
+    'parse_hour',
+    'text_hash'
+]
\ No newline at end of file
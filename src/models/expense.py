@@ -0,0 +1,189 @@
+import hashlib
+import re
+import sys
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+
+import numpy as np
+
+from utils.dates import parse_date, parse_date_column
+
+_NUMBER = re.compile(r'\d[\d,]*(?:\.\d+)?')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def parse_amount(value) -> float:
+    """Numeric amount from a float or a string such as '₹1,450.00'"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    if not value:
+        return 0.0
+    match = _NUMBER.search(str(value))
+    return float(match.group().replace(',', '')) if match else 0.0
+
+
+def text_hash(text: str) -> str:
+    """MD5 of lower-cased, whitespace-collapsed text (same as DuplicateDetector.calculate_text_hash)"""
+    if not text:
+        return ""
+    normalized = _WHITESPACE.sub(' ', text.strip().lower())
+    return hashlib.md5(normalized.encode()).hexdigest()
+
+
+def parse_hour(value) -> Optional[int]:
+    """Hour of day as an int, or None when missing or NaN (as in DataFrame rows)"""
+    if value is None or value != value:
+        return None
+    return int(value)
+
+
+_UNPARSED = object()
+
+
+def _intern(value) -> str:
+    return sys.intern(str(value)) if value else ''
+
+
+@dataclass(slots=True)
+class Expense:
+    """
+    Canonical expense record, parsed once at ingest
+
+    Amount and date are already numeric/``datetime.date``, vendor and
+    category strings are interned, and the normalized vendor and text hash
+    are precomputed, so downstream stages compare values instead of
+    re-parsing strings. ``get`` accepts both the pipeline keys
+    (``merchant``, ``description``) and the fraud detector keys (``vendor``,
+    ``amount_raw``, ``date_raw``, ``raw_text``) so records can be passed
+    wherever a dict was expected.
+    """
+    id: str
+    employee_id: str
+    amount: float
+    date: Optional[date]
+    vendor: str
+    category: str
+    normalized_vendor: str
+    text_hash: str
+    date_raw: str = ''
+    raw_text: str = ''
+    description: str = ''
+    location: str = ''
+    hour: Optional[int] = None
+
+    _ALIASES = {'merchant': 'vendor', 'amount_raw': 'amount', 'category_raw': 'category'}
+
+    @classmethod
+    def from_dict(cls, data: Dict, parsed_date=_UNPARSED) -> 'Expense':
+        """Build from a pipeline expense or a fraud-detector expense dict
+
+        Pass ``parsed_date`` when the date column was already parsed in bulk.
+        """
+        if isinstance(data, Expense):
+            return data
+        vendor = data.get('merchant') or data.get('vendor') or ''
+        raw_date = data.get('date') or data.get('date_raw') or ''
+        description = data.get('description', '') or ''
+        raw_text = data.get('raw_text') or description
+        return cls(
+            id=data.get('id') or data.get('expense_id') or '',
+            employee_id=_intern(data.get('employee_id')),
+            amount=parse_amount(data.get('amount') or data.get('amount_raw')),
+            date=parse_date(raw_date) if parsed_date is _UNPARSED else parsed_date,
+            vendor=_intern(vendor),
+            category=_intern(data.get('category') or data.get('category_raw')),
+            normalized_vendor=_intern(vendor.strip().lower()),
+            text_hash=text_hash(raw_text),
+            date_raw=raw_date if isinstance(raw_date, str) else str(raw_date),
+            raw_text=raw_text,
+            description=description,
+            location=data.get('location', '') or '',
+            hour=parse_hour(data.get('hour'))
+        )
+
+    def get(self, key: str, default=None):
+        if key == 'date':
+            return self.date if self.date is not None else (self.date_raw or default)
+        value = getattr(self, self._ALIASES.get(key, key), default)
+        return default if value is None else value
+
+    def to_dict(self) -> Dict:
+        """Pipeline-shaped dict, as produced by FieldExtractionAgent"""
+        return {
+            'id': self.id,
+            'employee_id': self.employee_id,
+            'amount': self.amount,
+            'category': self.category,
+            'date': self.date_raw,
+            'merchant': self.vendor,
+            'location': self.location,
+            'description': self.description,
+            'hour': self.hour
+        }
+
+
+class ExpenseBatch:
+    """
+    Columnar view of many expenses over NumPy arrays
+
+    Numeric columns (amounts, dates as ``datetime64[D]``, hours) are
+    contiguous arrays for vectorized stages; the row records stay
+    available for per-expense logic without being rebuilt.
+    """
+
+    def __init__(self, records: List[Expense]):
+        self.records = records
+        n = len(records)
+        self.ids = np.array([r.id for r in records], dtype=object)
+        self.employee_ids = np.array([r.employee_id for r in records], dtype=object)
+        self.vendors = np.array([r.vendor for r in records], dtype=object)
+        self.normalized_vendors = np.array([r.normalized_vendor for r in records], dtype=object)
+        self.categories = np.array([r.category for r in records], dtype=object)
+        self.text_hashes = np.array([r.text_hash for r in records], dtype=object)
+        self.amounts = np.fromiter((r.amount for r in records), dtype=np.float64, count=n)
+        self.dates = np.array([r.date if r.date is not None else 'NaT' for r in records], dtype='datetime64[D]')
+        self.hours = np.fromiter((r.hour if r.hour is not None else -1 for r in records), dtype=np.int16, count=n)
+
+    @classmethod
+    def from_records(cls, items: Iterable[Union[Dict, Expense]]) -> 'ExpenseBatch':
+        """Build records, parsing the whole date column in one vectorized pass"""
+        items = list(items)
+        raw_dates = [
+            item.date if isinstance(item, Expense) else (item.get('date') or item.get('date_raw'))
+            for item in items
+        ]
+        dates = parse_date_column(raw_dates).astype(object)  # NaT -> None, others -> datetime.date
+        return cls([Expense.from_dict(item, parsed_date=parsed) for item, parsed in zip(items, dates)])
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __getitem__(self, index: int) -> Expense:
+        return self.records[index]
+
+    def __iter__(self) -> Iterator[Expense]:
+        return iter(self.records)
+
+    @property
+    def weekdays(self) -> np.ndarray:
+        """Monday=0 ... Sunday=6, -1 where the date is unknown"""
+        days = self.dates.astype('int64')
+        weekdays = (days + 3) % 7  # 1970-01-01 was a Thursday
+        return np.where(np.isnat(self.dates), -1, weekdays)
+
+    @property
+    def is_weekend(self) -> np.ndarray:
+        return self.weekdays >= 5
+
+    def to_frame(self):
+        import pandas as pd
+        return pd.DataFrame({
+            'id': self.ids,
+            'employee_id': self.employee_ids,
+            'amount': self.amounts,
+            'date': self.dates,
+            'merchant': self.vendors,
+            'category': self.categories,
+            'hour': self.hours
+        })
@@ -0,0 +1,9 @@
+from .rule_engine import RuleEngine, RuleError, parse_dates
+from .violation_stats import ViolationStats
+
+__all__ = [
+    'RuleEngine',
+    'RuleError',
+    'parse_dates',
+    'ViolationStats'
+]
\ No newline at end of file
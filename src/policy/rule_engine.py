@@ -0,0 +1,339 @@
+import re
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.dates import parse_date_column
+
+
+class RuleError(ValueError):
+    """Raised when a policy rule definition cannot be compiled"""
+
+
+class Predicate:
+    """Compiled, vectorized predicate over an expense DataFrame"""
+
+    def __init__(self, cost=1):
+        self.cost = cost
+        self.evaluated = 0
+        self.matched = 0
+
+    @property
+    def selectivity(self):
+        """Observed fraction of rows that satisfied the predicate"""
+        if self.evaluated == 0:
+            return 0.5
+        return self.matched / self.evaluated
+
+    def evaluate(self, frame: pd.DataFrame) -> np.ndarray:
+        mask = self._evaluate(frame)
+        self.evaluated += len(mask)
+        self.matched += int(mask.sum())
+        return mask
+
+    def _evaluate(self, frame):
+        raise NotImplementedError
+
+
+class ComparePredicate(Predicate):
+    OPERATORS = {
+        'gt': np.greater,
+        'ge': np.greater_equal,
+        'lt': np.less,
+        'le': np.less_equal,
+        'eq': np.equal,
+        'ne': np.not_equal
+    }
+
+    def __init__(self, field, op, value=None, lookup=None, cost=1):
+        super().__init__(cost)
+        self.field = field
+        self.operator = self.OPERATORS[op]
+        self.value = value
+        self.lookup = lookup
+
+    def _evaluate(self, frame):
+        values = pd.to_numeric(frame[self.field], errors='coerce').to_numpy(dtype=float)
+        reference = self.reference(frame)
+        with np.errstate(invalid='ignore'):
+            mask = self.operator(values, reference)
+        return mask & ~np.isnan(values) & ~np.isnan(reference)
+
+    def reference(self, frame):
+        """Right-hand side of the comparison, one value per row"""
+        if self.lookup is None:
+            return np.full(len(frame), float(self.value))
+        table, key = self.lookup
+        return frame[key].map(table).astype(float).to_numpy()
+
+
+class ContainsAnyPredicate(Predicate):
+    def __init__(self, field, values, cost=3):
+        super().__init__(cost)
+        self.field = field
+        keywords = [re.escape(str(v).lower()) for v in values if v]
+        self.pattern = re.compile('|'.join(keywords)) if keywords else None
+
+    def _evaluate(self, frame):
+        if self.pattern is None:
+            return np.zeros(len(frame), dtype=bool)
+        text = frame[self.field].fillna('').astype(str).str.lower()
+        return text.str.contains(self.pattern).to_numpy(dtype=bool)
+
+
+class InPredicate(Predicate):
+    def __init__(self, field, values, cost=1):
+        super().__init__(cost)
+        self.field = field
+        self.values = list(values)
+
+    def _evaluate(self, frame):
+        return frame[self.field].isin(self.values).to_numpy(dtype=bool)
+
+
+class EmptyPredicate(Predicate):
+    def __init__(self, field, cost=1):
+        super().__init__(cost)
+        self.field = field
+
+    def _evaluate(self, frame):
+        text = frame[self.field].fillna('').astype(str)
+        return (text == '').to_numpy(dtype=bool)
+
+
+class LengthBelowPredicate(Predicate):
+    def __init__(self, field, value, cost=2):
+        super().__init__(cost)
+        self.field = field
+        self.value = int(value)
+
+    def _evaluate(self, frame):
+        lengths = frame[self.field].fillna('').astype(str).str.strip().str.len()
+        return (lengths < self.value).to_numpy(dtype=bool)
+
+
+class DatePredicate(Predicate):
+    """Date checks; each distinct date string is parsed once per batch"""
+
+    def __init__(self, field, op, cost=2):
+        super().__init__(cost)
+        self.field = field
+        self.op = op
+
+    def _evaluate(self, frame):
+        dates = parse_dates(frame[self.field])
+        valid = dates.notna().to_numpy(dtype=bool)
+        if self.op == 'future':
+            mask = (dates > pd.Timestamp(datetime.now())).to_numpy(dtype=bool)
+        else:
+            mask = (dates.dt.weekday >= 5).to_numpy(dtype=bool)
+        return mask & valid
+
+
+class NotPredicate(Predicate):
+    def __init__(self, child):
+        super().__init__(child.cost)
+        self.child = child
+
+    def _evaluate(self, frame):
+        return ~self.child.evaluate(frame)
+
+
+class AllPredicate(Predicate):
+    """Conjunction; later terms only see rows that passed earlier ones"""
+
+    def __init__(self, children):
+        super().__init__(sum(child.cost for child in children))
+        self.children = children
+
+    def ordered_children(self):
+        # Cheap terms that reject most rows go first
+        return sorted(self.children, key=lambda c: c.cost / max(1 - c.selectivity, 1e-3))
+
+    def _evaluate(self, frame):
+        active = np.arange(len(frame))
+        for child in self.ordered_children():
+            if active.size == 0:
+                break
+            subset = frame if active.size == len(frame) else frame.iloc[active]
+            active = active[child.evaluate(subset)]
+        mask = np.zeros(len(frame), dtype=bool)
+        mask[active] = True
+        return mask
+
+
+class AnyPredicate(Predicate):
+    """Disjunction; later terms only see rows no earlier term matched"""
+
+    def __init__(self, children):
+        super().__init__(sum(child.cost for child in children))
+        self.children = children
+
+    def ordered_children(self):
+        # Cheap terms that accept most rows go first
+        return sorted(self.children, key=lambda c: c.cost / max(c.selectivity, 1e-3))
+
+    def _evaluate(self, frame):
+        mask = np.zeros(len(frame), dtype=bool)
+        pending = np.arange(len(frame))
+        for child in self.ordered_children():
+            if pending.size == 0:
+                break
+            subset = frame if pending.size == len(frame) else frame.iloc[pending]
+            hits = child.evaluate(subset)
+            mask[pending[hits]] = True
+            pending = pending[~hits]
+        return mask
+
+
+class CompiledRule:
+    def __init__(self, rule_id, predicate, message, lookup=None, stop=False):
+        self.rule_id = rule_id
+        self.predicate = predicate
+        self.message = message
+        self.lookup = lookup
+        self.stop = stop
+
+    def render(self, row: Dict) -> str:
+        """Format the violation message for a matching row"""
+        if self.lookup is not None:
+            table, key = self.lookup
+            row['limit'] = table.get(row.get(key))
+        try:
+            return self.message.format(**row)
+        except (KeyError, IndexError, ValueError):
+            return self.message
+
+
+def parse_dates(series: pd.Series) -> pd.Series:
+    """Parse a date column with the shared parser (format detected once, distinct values parsed once)"""
+    return pd.Series(parse_date_column(series.to_numpy(dtype=object)), index=series.index)
+
+
+class RuleEngine:
+    """
+    Declarative policy rules compiled into vectorized predicates
+
+    Rules come from a JSON/YAML spec (see ``policy_rules.json``) and are
+    evaluated column-wise over a whole batch of expenses. Composite ``all``/``any``
+    conditions order their terms by cost and observed selectivity and only
+    evaluate later terms on rows still undecided. A rule marked ``stop``
+    removes its matching rows from all rules that follow it.
+    """
+
+    FIELD_DEFAULTS = {
+        'amount': 0,
+        'category': 'Other',
+        'merchant': '',
+        'location': '',
+        'description': '',
+        'date': None
+    }
+
+    def __init__(self, rule_spec: Dict, expense_config=None):
+        self.expense_config = expense_config
+        self.field_defaults = dict(self.FIELD_DEFAULTS)
+        rules = rule_spec.get('rules', []) if isinstance(rule_spec, dict) else rule_spec
+        self.rules = [self._compile_rule(rule) for rule in rules]
+
+    def _compile_rule(self, rule: Dict) -> CompiledRule:
+        if 'id' not in rule or 'when' not in rule:
+            raise RuleError(f"Rule definition needs 'id' and 'when': {rule}")
+        condition = rule['when']
+        predicate = self._compile_predicate(condition, rule.get('cost'))
+        lookup = self._resolve_lookup(condition['lookup']) if 'lookup' in condition else None
+        return CompiledRule(
+            rule['id'],
+            predicate,
+            rule.get('message', rule['id']),
+            lookup=lookup,
+            stop=rule.get('stop', False)
+        )
+
+    def _compile_predicate(self, condition: Dict, cost=None) -> Predicate:
+        if 'all' in condition:
+            return AllPredicate([self._compile_predicate(c) for c in condition['all']])
+        if 'any' in condition:
+            return AnyPredicate([self._compile_predicate(c) for c in condition['any']])
+        if 'not' in condition:
+            return NotPredicate(self._compile_predicate(condition['not']))
+
+        field = condition.get('field')
+        op = condition.get('op')
+        if not field or not op:
+            raise RuleError(f"Condition needs 'field' and 'op': {condition}")
+        self.field_defaults.setdefault(field, None)
+        cost = cost or condition.get('cost')
+
+        if op in ComparePredicate.OPERATORS:
+            lookup = self._resolve_lookup(condition['lookup']) if 'lookup' in condition else None
+            if lookup is None and 'value' not in condition:
+                raise RuleError(f"Comparison needs 'value' or 'lookup': {condition}")
+            return ComparePredicate(field, op, condition.get('value'), lookup, cost=cost or 1)
+        if op == 'contains_any':
+            return ContainsAnyPredicate(field, self._resolve_values(condition), cost=cost or 3)
+        if op == 'in':
+            return InPredicate(field, self._resolve_values(condition), cost=cost or 1)
+        if op == 'empty':
+            return EmptyPredicate(field, cost=cost or 1)
+        if op == 'len_lt':
+            return LengthBelowPredicate(field, condition.get('value', 0), cost=cost or 2)
+        if op in ('future', 'weekend'):
+            return DatePredicate(field, op, cost=cost or 2)
+        raise RuleError(f"Unknown operator '{op}' in condition: {condition}")
+
+    def _resolve_values(self, condition: Dict) -> List:
+        if 'values' in condition:
+            return condition['values']
+        return list(getattr(self.expense_config, condition.get('values_from', ''), None) or [])
+
+    def _resolve_lookup(self, lookup: Dict):
+        table = getattr(self.expense_config, lookup.get('table', ''), None) or {}
+        return table, lookup.get('key')
+
+    def prepare_frame(self, expenses) -> pd.DataFrame:
+        """Build a frame holding every column the rules reference"""
+        frame = expenses if isinstance(expenses, pd.DataFrame) else pd.DataFrame(list(expenses))
+        frame = frame.reset_index(drop=True)
+        for field, default in self.field_defaults.items():
+            if field not in frame.columns:
+                frame[field] = default
+            elif default is not None:
+                frame[field] = frame[field].fillna(default)
+        return frame
+
+    def evaluate(self, expenses) -> List[List[str]]:
+        """Return the violation messages for each expense, in rule order"""
+        return [[message for _, message in row] for row in self.evaluate_with_ids(expenses)]
+
+    def evaluate_with_ids(self, expenses) -> List[List[Tuple[str, str]]]:
+        """Return ``(rule_id, message)`` pairs for each expense, in rule order"""
+        frame = self.prepare_frame(expenses)
+        violations = [[] for _ in range(len(frame))]
+        active = np.arange(len(frame))
+
+        for rule in self.rules:
+            if active.size == 0:
+                break
+            subset = frame if active.size == len(frame) else frame.iloc[active]
+            hits = active[rule.predicate.evaluate(subset)]
+            if hits.size == 0:
+                continue
+            for position, row in zip(hits, frame.iloc[hits].to_dict('records')):
+                violations[position].append((rule.rule_id, rule.render(row)))
+            if rule.stop:
+                active = np.setdiff1d(active, hits, assume_unique=True)
+
+        return violations
+
+    def get_rule_stats(self) -> List[Dict]:
+        """Observed hit rate per rule, useful when tuning rule order"""
+        return [{
+            'rule_id': rule.rule_id,
+            'evaluated': rule.predicate.evaluated,
+            'matched': rule.predicate.matched,
+            'selectivity': rule.predicate.selectivity,
+            'cost': rule.predicate.cost
+        } for rule in self.rules]
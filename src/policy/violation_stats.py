@@ -0,0 +1,98 @@
+import json
+import time
+from collections import Counter, deque
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+
+class ViolationStats:
+    """
+    Bounded, incrementally maintained policy violation statistics
+
+    Counters per violation type and per employee are updated as violations
+    arrive, so summaries are read without rescanning history. Time buckets
+    keep the most recent ``max_buckets`` windows only, and raw violation
+    records can optionally be appended to a JSON-lines file instead of
+    being kept in memory.
+    """
+
+    def __init__(self, bucket_seconds=3600, max_buckets=168, recent_size=100,
+                 spill_path: Optional[str] = None):
+        self.bucket_seconds = bucket_seconds
+        self.max_buckets = max_buckets
+        self.spill_path = spill_path
+
+        self.total_expenses = 0
+        self.total_violating = 0
+        self.total_violations = 0
+        self.by_type = Counter()
+        self.by_employee = Counter()
+        self.buckets = {}
+        self.recent = deque(maxlen=recent_size)
+        self._spill_buffer = []
+
+    def record(self, expense: Dict, violations: List[Tuple[str, str]], timestamp=None):
+        """Account for one validated expense and its ``(type, message)`` violations"""
+        self.total_expenses += 1
+        if not violations:
+            return
+
+        if timestamp is None:
+            timestamp = time.time()
+        employee_id = expense.get('employee_id')
+        types = [violation_type for violation_type, _ in violations]
+
+        self.total_violating += 1
+        self.total_violations += len(types)
+        self.by_type.update(types)
+        if employee_id:
+            self.by_employee[employee_id] += len(types)
+        self._bucket_for(timestamp).update(types)
+
+        entry = {
+            'expense_id': expense.get('id'),
+            'employee_id': employee_id,
+            'violations': [message for _, message in violations],
+            'timestamp': datetime.fromtimestamp(timestamp).isoformat()
+        }
+        self.recent.append(entry)
+        if self.spill_path:
+            self._spill_buffer.append(entry)
+
+    def _bucket_for(self, timestamp) -> Counter:
+        start = int(timestamp // self.bucket_seconds) * self.bucket_seconds
+        bucket = self.buckets.get(start)
+        if bucket is None:
+            bucket = self.buckets[start] = Counter()
+            # Late records can open an older bucket, so evict by start time, not insertion order
+            while len(self.buckets) > self.max_buckets:
+                del self.buckets[min(self.buckets)]
+        return bucket
+
+    def flush(self):
+        """Append buffered raw violations to the spill file"""
+        if not self.spill_path or not self._spill_buffer:
+            return
+        with open(self.spill_path, 'a', encoding='utf-8') as f:
+            for entry in self._spill_buffer:
+                f.write(json.dumps(entry, default=str) + '\n')
+        self._spill_buffer = []
+
+    def get_summary(self) -> Dict[str, int]:
+        """Violation counts per type"""
+        return dict(self.by_type)
+
+    def get_top_employees(self, n=5) -> List[Tuple[str, int]]:
+        return self.by_employee.most_common(n)
+
+    def get_time_series(self) -> List[Dict]:
+        """Per-bucket violation counts, oldest first"""
+        return [{
+            'bucket_start': datetime.fromtimestamp(start).isoformat(),
+            'violations': dict(counts)
+        } for start, counts in sorted(self.buckets.items())]
+
+    def get_violation_rate(self) -> float:
+        if self.total_expenses == 0:
+            return 0.0
+        return self.total_violating / self.total_expenses
@@ -0,0 +1,6 @@
+from .aggregates import ReportAggregate, AggregateStore
+
+__all__ = [
+    'ReportAggregate',
+    'AggregateStore'
+]
\ No newline at end of file
@@ -0,0 +1,272 @@
+import json
+import os
+import uuid
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from utils.dates import parse_date_column
+
+
+class ReportAggregate:
+    """
+    Mergeable summary of one or more audit batches
+
+    Holds only counts, sums, maxima and counters, so partials from any
+    number of ``process_expenses`` runs can be added together and turned
+    into a period report without revisiting the raw expenses. A partial
+    built by ``by_expense_date`` covers one expense day of one batch; its
+    ``key`` (batch ids plus that day) lets a re-run or resumed batch be
+    dropped instead of counted twice.
+    """
+
+    COUNTERS = ('violation_counts', 'category_counts', 'category_compliant',
+                'employee_violations', 'fraud_decisions')
+
+    def __init__(self, batch_ids: Optional[List[str]] = None, created_at: Optional[str] = None,
+                 expense_date: Optional[str] = None):
+        self.batch_ids = batch_ids or []
+        self.created_at = created_at or datetime.now().isoformat()
+        self.expense_date = expense_date
+        self.expense_count = 0
+        self.compliant_count = 0
+        self.total_amount = 0.0
+        self.max_amount = 0.0
+        self.anomalies = 0
+        self.duplicates = 0
+        self.high_risk_vendors = 0
+        self.category_amount = Counter()
+        for name in self.COUNTERS:
+            setattr(self, name, Counter())
+
+    @classmethod
+    def from_results(cls, policy_results, rule_based_results=None, fraud_results=None,
+                     batch_id: Optional[str] = None) -> 'ReportAggregate':
+        """Build the partial for one batch of audit results"""
+        aggregate = cls(batch_ids=[batch_id or uuid.uuid4().hex])
+        if policy_results is None or policy_results.empty:
+            return aggregate
+
+        amounts = policy_results['amount'].astype(float)
+        violation_count = policy_results['violation_count']
+        compliant = violation_count == 0
+
+        aggregate.expense_count = len(policy_results)
+        aggregate.compliant_count = int(compliant.sum())
+        aggregate.total_amount = float(amounts.sum())
+        aggregate.max_amount = float(amounts.max())
+
+        by_category = policy_results.assign(_compliant=compliant.astype(int), _amount=amounts).groupby('category').agg(
+            count=('_compliant', 'size'), compliant=('_compliant', 'sum'), amount=('_amount', 'sum')
+        )
+        aggregate.category_counts.update({k: int(v) for k, v in by_category['count'].items()})
+        aggregate.category_compliant.update({k: int(v) for k, v in by_category['compliant'].items()})
+        aggregate.category_amount.update({k: float(v) for k, v in by_category['amount'].items()})
+
+        violations = policy_results['violations'].explode().dropna().value_counts()
+        aggregate.violation_counts.update({str(k): int(v) for k, v in violations.items()})
+        employee_violations = policy_results.loc[violation_count > 0].groupby('employee_id')['violation_count'].sum()
+        aggregate.employee_violations.update({str(k): int(v) for k, v in employee_violations.items()})
+
+        if rule_based_results is not None and not rule_based_results.empty:
+            decisions = rule_based_results['fraud_decision'].value_counts()
+            aggregate.fraud_decisions.update({str(k): int(v) for k, v in decisions.items()})
+            aggregate.duplicates = int(rule_based_results['is_duplicate'].sum())
+            aggregate.high_risk_vendors = int((rule_based_results['vendor_risk_score'] > 50).sum())
+
+        anomaly_source = fraud_results if fraud_results is not None and not fraud_results.empty else rule_based_results
+        if anomaly_source is not None and not anomaly_source.empty:
+            aggregate.anomalies = int((anomaly_source['is_anomaly'] == True).sum())
+
+        return aggregate
+
+    @classmethod
+    def by_expense_date(cls, policy_results, rule_based_results=None, fraud_results=None,
+                        batch_id: Optional[str] = None) -> List['ReportAggregate']:
+        """One partial per expense day of the batch (undated expenses share a partial without a date)"""
+        batch_id = batch_id or uuid.uuid4().hex
+        if policy_results is None or policy_results.empty or 'date' not in policy_results:
+            return [cls.from_results(policy_results, rule_based_results, fraud_results, batch_id)]
+
+        days = parse_date_column(policy_results['date'])
+        undated = np.isnat(days)
+        buckets = [(day, days == day) for day in np.unique(days[~undated])]
+        if undated.any():
+            buckets.append((None, undated))
+
+        def select(frame, rows):
+            # Result frames are row-aligned with the expenses; an empty or short frame has nothing to split
+            aligned = frame is not None and len(frame) == len(policy_results)
+            return frame.iloc[rows] if aligned else None
+
+        created_at = datetime.now().isoformat()
+        aggregates = []
+        for day, rows in buckets:
+            aggregate = cls.from_results(policy_results.iloc[rows], select(rule_based_results, rows),
+                                         select(fraud_results, rows), batch_id)
+            aggregate.created_at = created_at
+            aggregate.expense_date = str(day) if day is not None else None
+            aggregates.append(aggregate)
+        return aggregates
+
+    @property
+    def key(self):
+        """Identity of the partial: the same batch and expense day always give the same key"""
+        return tuple(self.batch_ids), self.expense_date
+
+    def merge(self, other: 'ReportAggregate') -> 'ReportAggregate':
+        """Fold ``other`` into this aggregate in place"""
+        self.batch_ids.extend(other.batch_ids)
+        if self.expense_date != other.expense_date:
+            self.expense_date = None
+        self.created_at = max(self.created_at, other.created_at)
+        self.expense_count += other.expense_count
+        self.compliant_count += other.compliant_count
+        self.total_amount += other.total_amount
+        self.max_amount = max(self.max_amount, other.max_amount)
+        self.anomalies += other.anomalies
+        self.duplicates += other.duplicates
+        self.high_risk_vendors += other.high_risk_vendors
+        self.category_amount.update(other.category_amount)
+        for name in self.COUNTERS:
+            getattr(self, name).update(getattr(other, name))
+        return self
+
+    def __add__(self, other: 'ReportAggregate') -> 'ReportAggregate':
+        return ReportAggregate.combine([self, other])
+
+    @classmethod
+    def combine(cls, aggregates: Iterable['ReportAggregate']) -> 'ReportAggregate':
+        """Merge the partials, counting a repeated key (re-run or resumed batch) once"""
+        combined = None
+        seen = set()
+        for aggregate in aggregates:
+            if aggregate.key in seen:
+                continue
+            seen.add(aggregate.key)
+            if combined is None:
+                combined = cls(created_at=aggregate.created_at, expense_date=aggregate.expense_date)
+            combined.merge(aggregate)
+        return combined if combined is not None else cls()
+
+    def to_report(self, top_n=5) -> Dict:
+        """Period report in the shape of the per-batch audit/compliance reports"""
+        violating = self.expense_count - self.compliant_count
+        category_breakdown = {
+            category: {
+                'count': count,
+                'compliant': self.category_compliant[category],
+                'non_compliant': count - self.category_compliant[category],
+                'compliance_rate': self.category_compliant[category] / count * 100,
+                'total_amount': self.category_amount[category]
+            }
+            for category, count in self.category_counts.items() if count
+        }
+        return {
+            'batches': len(set(self.batch_ids)),
+            'summary': {
+                'total_expenses_audited': self.expense_count,
+                'policy_violations': violating,
+                'compliance_rate': (self.compliant_count / self.expense_count * 100) if self.expense_count else 100,
+                'anomalies_detected': self.anomalies,
+                'total_amount': self.total_amount,
+                'average_amount': self.total_amount / self.expense_count if self.expense_count else 0.0,
+                'max_amount': self.max_amount
+            },
+            'category_breakdown': category_breakdown,
+            'top_violations': self.violation_counts.most_common(top_n),
+            'top_violators': self.employee_violations.most_common(top_n),
+            'advanced_fraud': {
+                'duplicates_detected': self.duplicates,
+                'high_risk_vendors': self.high_risk_vendors,
+                'fraud_decisions': dict(self.fraud_decisions)
+            }
+        }
+
+    def to_dict(self) -> Dict:
+        data = {
+            'batch_ids': self.batch_ids,
+            'created_at': self.created_at,
+            'expense_date': self.expense_date,
+            'expense_count': self.expense_count,
+            'compliant_count': self.compliant_count,
+            'total_amount': self.total_amount,
+            'max_amount': self.max_amount,
+            'anomalies': self.anomalies,
+            'duplicates': self.duplicates,
+            'high_risk_vendors': self.high_risk_vendors,
+            'category_amount': dict(self.category_amount)
+        }
+        for name in self.COUNTERS:
+            data[name] = dict(getattr(self, name))
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'ReportAggregate':
+        aggregate = cls(batch_ids=list(data['batch_ids']), created_at=data['created_at'],
+                        expense_date=data.get('expense_date'))
+        for field in ('expense_count', 'compliant_count', 'anomalies', 'duplicates', 'high_risk_vendors'):
+            setattr(aggregate, field, data.get(field, 0))
+        aggregate.total_amount = data.get('total_amount', 0.0)
+        aggregate.max_amount = data.get('max_amount', 0.0)
+        aggregate.category_amount = Counter(data.get('category_amount', {}))
+        for name in cls.COUNTERS:
+            setattr(aggregate, name, Counter(data.get(name, {})))
+        return aggregate
+
+
+class AggregateStore:
+    """
+    Append-only JSON-lines file of ReportAggregate partials
+
+    Periods are bucketed by expense date; partials without one (older
+    lines, undated expenses) fall back to when their batch ran. A batch
+    appended again keeps only its latest partials.
+    """
+
+    def __init__(self, path='reports/report_aggregates.jsonl'):
+        self.path = path
+
+    def append(self, aggregate: ReportAggregate):
+        self.extend([aggregate])
+
+    def extend(self, aggregates: Iterable[ReportAggregate]):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.writelines(json.dumps(aggregate.to_dict()) + '\n' for aggregate in aggregates)
+
+    def load(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[ReportAggregate]:
+        """Stored partials whose expenses fall in ``[start, end)``, one per key"""
+        if not os.path.exists(self.path):
+            return []
+        start_key = start.isoformat() if start else None
+        end_key = end.isoformat() if end else None
+
+        aggregates = {}
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    data = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # tolerate a torn final line
+                when = data.get('expense_date')
+                when = f'{when}T00:00:00' if when else data['created_at']
+                if (start_key and when < start_key) or (end_key and when >= end_key):
+                    continue
+                aggregate = ReportAggregate.from_dict(data)
+                aggregates.pop(aggregate.key, None)
+                aggregates[aggregate.key] = aggregate
+        return list(aggregates.values())
+
+    def period_report(self, start: Optional[datetime] = None, end: Optional[datetime] = None, top_n=5) -> Dict:
+        """Combine every partial in the period into one report"""
+        report = ReportAggregate.combine(self.load(start, end)).to_report(top_n)
+        report['period'] = {
+            'start': start.isoformat() if start else None,
+            'end': end.isoformat() if end else None
+        }
+        return report
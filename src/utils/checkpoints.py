@@ -0,0 +1,78 @@
+"""
+On-disk checkpoints for long batch runs
+
+Each stage's output is pickled under a key made from the stage name, the
+stage version and a hash of the stage's input, so a restarted run finds
+the chunks it already finished and only recomputes the rest. Bumping a
+stage's version invalidates its old checkpoints. Files are written to a
+temporary name and renamed into place, so a crash mid-write never leaves
+a truncated checkpoint behind.
+"""
+import hashlib
+import json
+import os
+import pickle
+import time
+import uuid
+from typing import Callable, Dict
+
+
+def input_hash(payload) -> str:
+    """Stable SHA-256 of JSON-serializable input (dict keys sorted)"""
+    encoded = json.dumps(payload, sort_keys=True, default=str).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class CheckpointStore:
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.stats = {'hits': 0, 'misses': 0, 'hash_seconds': 0.0, 'load_seconds': 0.0,
+                      'save_seconds': 0.0, 'compute_seconds': 0.0, 'bytes_written': 0}
+
+    def path(self, stage: str, version: int, key: str) -> str:
+        return os.path.join(self.directory, f'{stage}-v{version}-{key[:32]}.pkl')
+
+    def key(self, payload) -> str:
+        """``input_hash`` with the time counted as checkpoint overhead"""
+        started = time.perf_counter()
+        key = input_hash(payload)
+        self.stats['hash_seconds'] += time.perf_counter() - started
+        return key
+
+    def run(self, stage: str, version: int, payload, compute: Callable, key: str = None):
+        """``compute()``'s result for this stage and input, from disk when already checkpointed"""
+        key = key or self.key(payload)
+
+        path = self.path(stage, version, key)
+        if os.path.exists(path):
+            started = time.perf_counter()
+            with open(path, 'rb') as f:
+                result = pickle.load(f)
+            self.stats['load_seconds'] += time.perf_counter() - started
+            self.stats['hits'] += 1
+            return result
+
+        started = time.perf_counter()
+        result = compute()
+        self.stats['compute_seconds'] += time.perf_counter() - started
+        self.stats['misses'] += 1
+
+        started = time.perf_counter()
+        tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        self.stats['bytes_written'] += os.path.getsize(path)
+        self.stats['save_seconds'] += time.perf_counter() - started
+        return result
+
+    def overhead(self) -> Dict:
+        """Time spent hashing and saving, relative to the stage work it protects"""
+        spent = self.stats['hash_seconds'] + self.stats['save_seconds']
+        compute = self.stats['compute_seconds']
+        return {
+            **self.stats,
+            'overhead_seconds': spent,
+            'overhead_pct': spent / compute * 100 if compute else 0.0
+        }
@@ -0,0 +1,127 @@
+"""
+Shared date parsing for every pipeline stage
+
+Receipts use a handful of date formats and reuse a small set of dates, so
+scalar parsing is memoized in a bounded LRU cache, and column parsing
+factorizes the values, detects the format once from the distinct strings
+and converts them in one vectorized call. Strings in none of the known
+formats fall back to pandas' parser, once per distinct value.
+"""
+import re
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Iterable, Optional
+
+DATE_FORMATS = ['%d %b %Y', '%d-%b-%Y', '%d/%m/%Y', '%Y-%m-%d', '%d %B %Y']
+DATE_CACHE_SIZE = 4096
+_TIME_OF_DAY = re.compile(r'\d{1,2}:\d{2}')
+
+
+def _parse_with(value: str, fmt: str) -> Optional[date]:
+    try:
+        return datetime.strptime(value, fmt).date()
+    except ValueError:
+        return None
+
+
+def _fallback_parse(value: str) -> Optional[date]:
+    try:
+        import pandas as pd
+        parsed = pd.to_datetime(value)
+    except (ValueError, TypeError, OverflowError):
+        return None
+    return None if parsed is pd.NaT else parsed.date()
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def _parse_string(value: str) -> Optional[date]:
+    for fmt in DATE_FORMATS:
+        parsed = _parse_with(value, fmt)
+        if parsed is not None:
+            return parsed
+    return _fallback_parse(value)
+
+
+def parse_date(value) -> Optional[date]:
+    """``datetime.date`` for a date, datetime or date string; None when unparseable"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if not isinstance(value, str) or not value.strip():
+        return None
+    return _parse_string(value.strip())
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def _string_hour(value: str) -> Optional[int]:
+    if not _TIME_OF_DAY.search(value):
+        return None
+    try:
+        import pandas as pd
+        parsed = pd.to_datetime(value)
+    except (ValueError, TypeError, OverflowError):
+        return None
+    return None if parsed is pd.NaT else parsed.hour
+
+
+def parse_hour_of_day(value) -> Optional[int]:
+    """Hour of a datetime or of a date string that carries a time (e.g. '2024-01-06 22:45'), else None"""
+    if isinstance(value, datetime):
+        return value.hour
+    if not isinstance(value, str) or not value.strip():
+        return None
+    return _string_hour(value.strip())
+
+
+def is_weekend(value) -> bool:
+    parsed = parse_date(value)
+    return parsed is not None and parsed.weekday() >= 5
+
+
+def detect_format(values: Iterable, sample_size: int = 20) -> Optional[str]:
+    """First known format that parses every sampled string, or None"""
+    samples = []
+    for value in values:
+        if isinstance(value, str) and value.strip():
+            samples.append(value.strip())
+            if len(samples) == sample_size:
+                break
+    if not samples:
+        return None
+    for fmt in DATE_FORMATS:
+        if all(_parse_with(sample, fmt) is not None for sample in samples):
+            return fmt
+    return None
+
+
+def parse_date_column(values):
+    """Parse many dates at once into a ``datetime64[D]`` array (NaT where unparseable)"""
+    import numpy as np
+    import pandas as pd
+
+    codes, uniques = pd.factorize(pd.Series(list(values), dtype=object))
+    uniques = np.asarray(uniques, dtype=object)
+    parsed = np.full(len(uniques), np.datetime64('NaT'), dtype='datetime64[D]')
+
+    is_string = np.fromiter((isinstance(v, str) for v in uniques), dtype=bool, count=len(uniques))
+    fmt = detect_format(uniques[is_string])
+    if fmt is not None:
+        strings = pd.Series(uniques[is_string], dtype=object).str.strip()
+        parsed[is_string] = pd.to_datetime(strings, format=fmt, errors='coerce').to_numpy().astype('datetime64[D]')
+
+    # Values the detected format did not cover (other formats, date objects) go one by one
+    for i in np.flatnonzero(np.isnat(parsed)):
+        single = parse_date(uniques[i])
+        if single is not None:
+            parsed[i] = np.datetime64(single, 'D')
+
+    result = np.full(len(codes), np.datetime64('NaT'), dtype='datetime64[D]')
+    present = codes >= 0
+    result[present] = parsed[codes[present]]
+    return result
+
+
+def cache_stats():
+    """Hit/miss counters of the string -> date cache"""
+    return _parse_string.cache_info()._asdict()
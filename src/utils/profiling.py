@@ -0,0 +1,175 @@
+import functools
+import json
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+
+class StageProfiler:
+    """
+    Per-stage wall time, throughput and peak memory for pipeline methods
+
+    Disabled by default, in which case decorated methods pay one attribute
+    check per call. When enabled, every stage records wall time, rows
+    processed, rows/sec and (with ``track_memory``) the peak memory it
+    allocated on top of what was live when it started, measured with
+    tracemalloc. Nested stages report their own peak and still count
+    towards the enclosing stage.
+    """
+
+    def __init__(self, enabled: bool = False, track_memory: bool = True):
+        self.enabled = enabled
+        self.track_memory = track_memory
+        self.records: List[Dict] = []
+        self._frames: List[Dict] = []
+        self._started_tracing = False
+
+    def enable(self, track_memory: Optional[bool] = None):
+        self.enabled = True
+        if track_memory is not None:
+            self.track_memory = track_memory
+
+    def disable(self):
+        self.enabled = False
+        if self._started_tracing and not self._frames:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def reset(self):
+        self.records = []
+
+    @contextmanager
+    def stage(self, name: str, rows: Optional[int] = None):
+        """Time the enclosed block; set ``frame['rows']`` inside to report rows after the fact"""
+        if not self.enabled:
+            yield {}
+            return
+
+        if self.track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        tracing = tracemalloc.is_tracing()
+
+        if tracing:
+            current, peak = tracemalloc.get_traced_memory()
+            if self._frames:
+                # Keep the parent's peak before resetting it for this stage
+                self._frames[-1]['peak'] = max(self._frames[-1]['peak'], peak)
+            tracemalloc.reset_peak()
+        else:
+            current = 0
+
+        frame = {'rows': rows, 'start_memory': current, 'peak': current}
+        self._frames.append(frame)
+        started = time.perf_counter()
+        try:
+            yield frame
+        finally:
+            elapsed = time.perf_counter() - started
+            self._frames.pop()
+            peak_bytes = None
+            if tracing:
+                frame['peak'] = max(frame['peak'], tracemalloc.get_traced_memory()[1])
+                peak_bytes = frame['peak'] - frame['start_memory']
+                if self._frames:
+                    self._frames[-1]['peak'] = max(self._frames[-1]['peak'], frame['peak'])
+
+            rows_processed = frame['rows']
+            self.records.append({
+                'stage': name,
+                'wall_time_ms': round(elapsed * 1000, 3),
+                'rows': rows_processed,
+                'rows_per_sec': round(rows_processed / elapsed, 1) if rows_processed and elapsed > 0 else None,
+                'peak_memory_mb': round(peak_bytes / (1024 * 1024), 3) if peak_bytes is not None else None,
+                'depth': len(self._frames),
+                'timestamp': time.time()
+            })
+
+    def summary(self) -> Dict[str, Dict]:
+        """Per-stage totals across calls"""
+        stages: Dict[str, Dict] = {}
+        for record in self.records:
+            stage = stages.setdefault(record['stage'], {
+                'calls': 0, 'wall_time_ms': 0.0, 'rows': 0, 'peak_memory_mb': None
+            })
+            stage['calls'] += 1
+            stage['wall_time_ms'] = round(stage['wall_time_ms'] + record['wall_time_ms'], 3)
+            stage['rows'] += record['rows'] or 0
+            if record['peak_memory_mb'] is not None:
+                stage['peak_memory_mb'] = max(stage['peak_memory_mb'] or 0.0, record['peak_memory_mb'])
+        for stage in stages.values():
+            seconds = stage['wall_time_ms'] / 1000
+            stage['rows_per_sec'] = round(stage['rows'] / seconds, 1) if stage['rows'] and seconds > 0 else None
+        return stages
+
+    def write_metrics(self, path: str) -> str:
+        """Write per-call records and per-stage totals as JSON"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'stages': self.summary(), 'calls': self.records}, f, indent=2)
+        return path
+
+    @contextmanager
+    def profile_run(self, metrics_path: Optional[str] = None, cprofile_path: Optional[str] = None):
+        """Enable stage metrics for a whole run, optionally under cProfile
+
+        The cProfile dump is a standard pstats file (``python -m pstats``,
+        snakeviz, ...).
+        """
+        self.enable()
+        profiler = None
+        if cprofile_path:
+            import cProfile
+            profiler = cProfile.Profile()
+            profiler.enable()
+        try:
+            yield self
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                directory = os.path.dirname(cprofile_path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                profiler.dump_stats(cprofile_path)
+            if metrics_path:
+                self.write_metrics(metrics_path)
+            self.disable()
+
+
+def _default_rows(args, result):
+    """Rows for a method call: length of the first sized argument after self, else of the result"""
+    for arg in args[1:]:
+        if hasattr(arg, '__len__') and not isinstance(arg, (str, bytes, dict)):
+            return len(arg)
+    if hasattr(result, '__len__') and not isinstance(result, (str, bytes, dict)):
+        return len(result)
+    return None
+
+
+# Process-wide profiler shared by every agent
+PROFILER = StageProfiler(enabled=os.environ.get('PROFILE_STAGES', '').lower() in ('1', 'true', 'yes'))
+
+
+def profile_stage(name: Optional[str] = None, rows: Optional[Callable] = None, profiler: StageProfiler = PROFILER):
+    """Decorator recording a method call as a profiler stage
+
+    ``rows`` is an optional ``callable(args, result)`` returning the number
+    of rows processed; by default the first sized argument after ``self`` is used.
+    """
+    def decorator(func):
+        stage_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not profiler.enabled:
+                return func(*args, **kwargs)
+            with profiler.stage(stage_name) as frame:
+                result = func(*args, **kwargs)
+                frame['rows'] = (rows or _default_rows)(args, result)
+            return result
+        return wrapper
+    return decorator
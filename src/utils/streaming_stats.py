@@ -0,0 +1,178 @@
+"""
+Streaming amount statistics for employee and category baselines
+
+Every expense updates its employee's and its category's running
+statistics in O(1): count, mean and variance with Welford's algorithm, an
+exponentially weighted moving average, and a log-bucketed quantile sketch
+(DDSketch-style, quantiles within ``relative_accuracy`` of the true
+value). Z-scores and percentiles then come from the baselines instead of
+a scan over history. Everything round-trips through plain dicts so the
+baselines can be saved with the rest of the memory.
+"""
+import math
+from typing import Dict, Optional
+
+from models import parse_amount
+
+
+class QuantileSketch:
+    """Counts per logarithmic bucket; bucket ``i`` holds values in ``(gamma**(i-1), gamma**i]``"""
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def _index(self, value: float) -> int:
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def add(self, value: float):
+        self.count += 1
+        if value <= 0:
+            self.zero_count += 1
+            return
+        index = self._index(value)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Approximate ``q``-quantile (``q`` in [0, 1]), None when empty"""
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if rank < seen:
+                return 2 * self.gamma ** index / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+    def rank(self, value: float) -> float:
+        """Approximate fraction of values at or below ``value``"""
+        if not self.count:
+            return 0.0
+        if value <= 0:
+            return self.zero_count / self.count
+        limit = self._index(value)
+        below = self.zero_count + sum(count for index, count in self.buckets.items() if index <= limit)
+        return below / self.count
+
+    def to_dict(self) -> Dict:
+        return {'relative_accuracy': self.relative_accuracy, 'zero_count': self.zero_count,
+                'buckets': {str(index): count for index, count in self.buckets.items()}}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'QuantileSketch':
+        sketch = cls(data['relative_accuracy'])
+        sketch.zero_count = data['zero_count']
+        sketch.buckets = {int(index): count for index, count in data['buckets'].items()}
+        sketch.count = sketch.zero_count + sum(sketch.buckets.values())
+        return sketch
+
+
+class RunningStats:
+    def __init__(self, ewma_alpha: float = 0.1, relative_accuracy: float = 0.01):
+        self.ewma_alpha = ewma_alpha
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0  # sum of squared deviations from the mean
+        self.ewma = 0.0
+        self.sketch = QuantileSketch(relative_accuracy)
+
+    def add(self, value: float):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.ewma = value if self.count == 1 else self.ewma_alpha * value + (1 - self.ewma_alpha) * self.ewma
+        self.sketch.add(value)
+
+    @property
+    def variance(self) -> float:
+        """Sample variance (0 until there are two values)"""
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+    def zscore(self, value: float) -> float:
+        """Standard deviations above the mean, 0 when the spread is unknown"""
+        std = self.std
+        return (value - self.mean) / std if std > 0 else 0.0
+
+    def percentile(self, value: float) -> float:
+        """Approximate percentile (0-100) of ``value`` among the values seen"""
+        return self.sketch.rank(value) * 100
+
+    def summary(self) -> Dict:
+        return {
+            'count': self.count,
+            'mean': self.mean,
+            'std': self.std,
+            'ewma': self.ewma,
+            'p50': self.sketch.quantile(0.5),
+            'p95': self.sketch.quantile(0.95)
+        }
+
+    def to_dict(self) -> Dict:
+        return {'ewma_alpha': self.ewma_alpha, 'count': self.count, 'mean': self.mean,
+                'm2': self.m2, 'ewma': self.ewma, 'sketch': self.sketch.to_dict()}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'RunningStats':
+        stats = cls(data['ewma_alpha'])
+        stats.count, stats.mean, stats.m2, stats.ewma = data['count'], data['mean'], data['m2'], data['ewma']
+        stats.sketch = QuantileSketch.from_dict(data['sketch'])
+        return stats
+
+
+class AmountBaselines:
+    """RunningStats of expense amounts per employee and per category"""
+
+    def __init__(self, ewma_alpha: float = 0.1, relative_accuracy: float = 0.01):
+        self.ewma_alpha = ewma_alpha
+        self.relative_accuracy = relative_accuracy
+        self.employees: Dict[str, RunningStats] = {}
+        self.categories: Dict[str, RunningStats] = {}
+
+    def _stats(self, table: Dict, key) -> RunningStats:
+        stats = table.get(key)
+        if stats is None:
+            stats = table[key] = RunningStats(self.ewma_alpha, self.relative_accuracy)
+        return stats
+
+    def add(self, expense):
+        """Fold an expense dict or Expense record into its baselines; unparsed amounts are skipped"""
+        amount = parse_amount(expense.get('amount') or expense.get('amount_raw'))
+        if amount <= 0:
+            return
+        employee_id = expense.get('employee_id')
+        if employee_id:
+            self._stats(self.employees, employee_id).add(amount)
+        self._stats(self.categories, expense.get('category') or 'Other').add(amount)
+
+    def employee(self, employee_id) -> Optional[RunningStats]:
+        return self.employees.get(employee_id)
+
+    def category(self, category) -> Optional[RunningStats]:
+        return self.categories.get(category or 'Other')
+
+    def to_dict(self) -> Dict:
+        return {
+            'ewma_alpha': self.ewma_alpha,
+            'relative_accuracy': self.relative_accuracy,
+            'employees': {key: stats.to_dict() for key, stats in self.employees.items()},
+            'categories': {key: stats.to_dict() for key, stats in self.categories.items()}
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'AmountBaselines':
+        baselines = cls(data['ewma_alpha'], data['relative_accuracy'])
+        baselines.employees = {key: RunningStats.from_dict(value) for key, value in data['employees'].items()}
+        baselines.categories = {key: RunningStats.from_dict(value) for key, value in data['categories'].items()}
+        return baselines
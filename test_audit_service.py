@@ -0,0 +1,195 @@
+import asyncio
+import json
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+from audit_service import AuditService, BadRequest, MicroBatcher, _client
+
+def test_score_single_and_batch():
+    """Scoring returns one record per expense with decision, violations and summary"""
+    print("🧪 Testing audit scoring service...")
+    service = AuditService()
+
+    expenses = service.normalize_payload({'expenses': [
+        {'employee_id': 'E001', 'amount': '450', 'category': 'Travel', 'date': '15 Jan 2025', 'merchant': 'Uber'},
+        {'employee_id': 'E001', 'amount': 450, 'category': 'Travel', 'date': '15 Jan 2025', 'merchant': 'Uber'}
+    ]})
+    results = service.score(expenses)
+
+    assert len(results) == 2
+    assert results[1]['is_duplicate'] is True
+    assert results[1]['fraud_decision'] in ('APPROVE', 'NEEDS_REVIEW', 'REJECT')
+    assert results[0]['summary']['summary_text']
+    json.dumps(results)
+    print(f"   ✅ Scored: {[r['fraud_decision'] for r in results]}")
+
+def test_receipts_are_scored_individually():
+    """Each receipt of a request keeps its own result; only the repeated receipt is a duplicate"""
+    from main import generate_fraud_test_receipts
+
+    service = AuditService()
+    receipts = generate_fraud_test_receipts(3) + [generate_fraud_test_receipts(1)[0]]
+    expenses = service.normalize_payload({'receipts': receipts})
+    assert len({expense['id'] for expense in expenses}) == 4
+
+    results = service.score(expenses)
+    assert [r['expense_id'] for r in results] == [e['id'] for e in expenses]
+    assert [r['is_duplicate'] for r in results] == [False, True, False, True]
+    assert results[2]['fraud_score'] != results[3]['fraud_score']
+
+def test_policy_violations_come_from_the_rule_engine():
+    """Online policy checks are the configured rules, so the same input always gets the same answer"""
+    service = AuditService()
+    payload = {'employee_id': 'E001', 'amount': 500, 'merchant': 'Mobile Recharge', 'category': 'Personal',
+               'date': '18 Jan 2025', 'description': 'Monthly phone recharge for travel'}
+    first, again = (service.score(service.normalize_payload(payload))[0]['policy_violations'] for _ in range(2))
+    assert first == again
+    assert first == ['Amount $500.0 exceeds $200 limit for Personal',
+                     'Weekend expense - requires additional justification']  # 18 Jan 2025 is a Saturday
+
+def test_invalid_payload_rejected():
+    service = AuditService()
+    try:
+        service.normalize_payload({'amount': 'a lot'})
+    except BadRequest:
+        return
+    raise AssertionError("Invalid amount should be rejected")
+
+def test_http_roundtrip():
+    async def roundtrip():
+        service = AuditService()
+        server = await service.start('127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        latencies = []
+        async with server:
+            await _client('127.0.0.1', port, [{'amount': 120, 'merchant': 'Zomato', 'category': 'Meals'}], latencies)
+        return service, latencies
+
+    service, latencies = asyncio.run(roundtrip())
+    assert len(latencies) == 1
+    assert service.metrics()['requests'] == 1
+    assert service.metrics()['expenses_scored'] == 1
+
+def test_invalid_content_length_is_bad_request():
+    async def send(content_length):
+        service = AuditService()
+        server = await service.start('127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(f"POST /score HTTP/1.1\r\nContent-Length: {content_length}\r\n\r\n{{}}".encode('latin-1'))
+            await writer.drain()
+            response = await reader.read()
+            writer.close()
+        return response.decode('latin-1')
+
+    for content_length in ('abc', '-5'):
+        response = asyncio.run(send(content_length))
+        assert response.startswith('HTTP/1.1 400 Bad Request')
+        assert 'Invalid Content-Length' in response
+
+def test_micro_batcher_fans_results_back():
+    """Concurrent submissions share batches and each caller gets its own results"""
+    batches = []
+
+    def process(batch):
+        batches.append(len(batch))
+        return [item * 10 for item in batch]
+
+    async def run():
+        batcher = MicroBatcher(process, ThreadPoolExecutor(max_workers=1), max_batch_size=8, max_wait_ms=20)
+        results = await asyncio.gather(*(batcher.submit([i, i + 100]) for i in range(6)))
+        await batcher.stop()
+        return batcher, results
+
+    batcher, results = asyncio.run(run())
+    assert results == [[i * 10, (i + 100) * 10] for i in range(6)]
+    assert sum(batches) == 12
+    assert max(batches) <= 8
+    assert batcher.stats()['batches_run'] < 6
+    print(f"   ✅ Batch sizes: {batches}")
+
+def test_micro_batcher_isolates_failing_request():
+    """A request that breaks its coalesced batch fails alone; the others still get results"""
+    def process(batch):
+        if 'bad' in batch:
+            raise ValueError('unscorable expense')
+        return [item * 10 for item in batch]
+
+    async def run():
+        batcher = MicroBatcher(process, ThreadPoolExecutor(max_workers=1), max_batch_size=8, max_wait_ms=20)
+        results = await asyncio.gather(batcher.submit([1]), batcher.submit(['bad']), batcher.submit([2, 3]),
+                                       return_exceptions=True)
+        await batcher.stop()
+        return batcher, results
+
+    batcher, results = asyncio.run(run())
+    assert results[0] == [10] and results[2] == [20, 30]
+    assert isinstance(results[1], ValueError)
+    assert batcher.stats()['errors'] == 2  # the coalesced batch and the isolated bad request
+
+def test_coalesced_callers_with_the_same_id_get_their_own_results():
+    """Client ids may collide across coalesced requests; results still match solo scoring"""
+    payloads = [{'id': '1', 'employee_id': 'E001', 'amount': 500, 'merchant': 'Mobile Recharge',
+                 'category': 'Personal', 'date': '16 Jan 2025'},
+                {'id': '1', 'employee_id': 'E002', 'amount': 120, 'merchant': 'Zomato',
+                 'category': 'Meals', 'date': '15 Jan 2025'}]
+    solo_service = AuditService()
+    solo = [solo_service.score(solo_service.normalize_payload(p))[0] for p in payloads]
+
+    async def coalesced():
+        service = AuditService(max_batch_size=16, max_wait_ms=50)
+        results = await asyncio.gather(*(service.handle_score(json.dumps(p).encode()) for p in payloads))
+        assert service.batcher.stats()['batches_run'] == 1
+        await service.batcher.stop()
+        return [r['results'][0] for r in results]
+
+    together = asyncio.run(coalesced())
+    assert [r['expense_id'] for r in together] == ['1', '1']
+    assert [r['fraud_score'] for r in together] == [r['fraud_score'] for r in solo]
+    assert [r['is_duplicate'] for r in together] == [False, False]
+
+def test_stopped_batcher_fails_waiting_callers():
+    def process(batch):
+        time.sleep(0.2)
+        return batch
+
+    async def run():
+        batcher = MicroBatcher(process, ThreadPoolExecutor(max_workers=1), max_batch_size=1, max_wait_ms=0)
+        waiting = [asyncio.ensure_future(batcher.submit([i])) for i in range(3)]
+        await asyncio.sleep(0.05)  # the first request is running, the others are queued
+        await batcher.stop()
+        return await asyncio.wait_for(asyncio.gather(*waiting, return_exceptions=True), 1)
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+def test_service_with_coalescing():
+    async def roundtrip():
+        service = AuditService(max_batch_size=16, max_wait_ms=5)
+        server = await service.start('127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        payloads = [[{'amount': 100 + i, 'merchant': 'Amazon', 'category': 'Shopping'}] for i in range(4)]
+        async with server:
+            await asyncio.gather(*(_client('127.0.0.1', port, [p], []) for p in payloads))
+            await service.batcher.stop()
+        return service
+
+    service = asyncio.run(roundtrip())
+    assert service.expenses_scored == 4
+    assert service.metrics()['batching']['batches_run'] >= 1
+
+if __name__ == "__main__":
+    test_score_single_and_batch()
+    test_receipts_are_scored_individually()
+    test_policy_violations_come_from_the_rule_engine()
+    test_invalid_payload_rejected()
+    test_http_roundtrip()
+    test_invalid_content_length_is_bad_request()
+    test_micro_batcher_fans_results_back()
+    test_micro_batcher_isolates_failing_request()
+    test_coalesced_callers_with_the_same_id_get_their_own_results()
+    test_stopped_batcher_fails_waiting_callers()
+    test_service_with_coalescing()
+    print("\n✅ ALL SERVICE TESTS PASSED!")
@@ -0,0 +1,109 @@
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from batch_queue import WorkQueue, run_worker, merge_results, merge_reports, write_merged
+
+def sample_expenses(n=12):
+    vendors = [('Uber', 'Travel', 450.0), ('Zomato', 'Meals', 520.0), ('Amazon', 'Shopping', 499.0)]
+    return [{
+        'id': f'EXP{i:03d}',
+        'employee_id': f'EMP{i % 5:03d}',
+        'amount': vendors[i % 3][2],
+        'category': vendors[i % 3][1],
+        'date': f'{15 + i % 4} Jan 2025',
+        'merchant': vendors[i % 3][0],
+        'location': 'Mumbai',
+        'description': f'Receipt {i}',
+        'raw_text': f'{vendors[i % 3][0].upper()} Receipt {i}'
+    } for i in range(n)]
+
+def test_imports_in_a_fresh_interpreter():
+    """batch_queue puts src/ on the path itself, so it works as a script and as a plain import"""
+    root = os.path.dirname(os.path.abspath(__file__))
+    for command in (['-c', 'import batch_queue'], ['batch_queue.py', '--help']):
+        completed = subprocess.run([sys.executable, *command], cwd=root, capture_output=True, text=True)
+        assert completed.returncode == 0, completed.stderr
+
+def test_claims_are_exclusive_and_stale_claims_requeue(tmp_path):
+    queue = WorkQueue(str(tmp_path / 'queue'), lease_seconds=60)
+    manifest = queue.create(sample_expenses(), partitions=3)
+    assert queue.status()['pending'] == len(manifest['tasks'])
+
+    first = queue.claim('node-a')
+    second = queue.claim('node/b')  # ids are sanitized into the claim file name
+    assert first['task_id'] != second['task_id']
+    assert queue.status()['claimed'] == 2
+
+    # A crashed worker's claim goes back to pending after the lease
+    requeued = queue.requeue_stale(now=time.time() + 61)
+    assert sorted(requeued) == sorted([first['task_id'], second['task_id']])
+    assert queue.status()['claimed'] == 0
+    # ...and a late finish by the original worker is still accepted
+    queue.complete(first, {'task_id': first['task_id']})
+    assert os.path.exists(tmp_path / 'queue' / 'results' / f"{first['task_id']}.json")
+
+def test_workers_process_and_merge_in_input_order(tmp_path):
+    from main import EnterpriseExpenseAuditSystem
+
+    expenses = sample_expenses()
+    queue = WorkQueue(str(tmp_path / 'queue'))
+    manifest = queue.create(expenses, partitions=4)
+    with pytest.raises(RuntimeError):
+        merge_results(queue)
+
+    system = EnterpriseExpenseAuditSystem()
+    processed = run_worker(queue, 'node-a', system=system, max_tasks=1)
+    processed += run_worker(queue, 'node-b', system=system)
+    assert processed == len(manifest['tasks']) and queue.is_complete()
+    assert queue.status()['done'] == processed
+
+    merged = merge_results(queue)
+    assert list(merged['rule_based_fraud']['expense_id']) == [e['id'] for e in expenses]
+    assert list(merged['policy_validation']['id']) == [e['id'] for e in expenses]
+    assert merged['audit_report']['summary']['total_expenses'] == len(expenses)
+    assert merged['report_aggregate'].expense_count == len(expenses)
+
+    write_merged(merged, str(tmp_path / 'merged'))
+    assert (tmp_path / 'merged' / 'period_report.json').exists()
+
+def test_merged_counts_from_real_partials_are_numbers(tmp_path):
+    """NumPy counts in process_expenses output survive the JSON round trip and are summed"""
+    from main import EnterpriseExpenseAuditSystem
+
+    # Every employee files one of their receipts twice
+    expenses = []
+    for e in range(6):
+        receipt = {'employee_id': f'EMP{e:03d}', 'amount': 100.0 + e, 'category': 'Meals',
+                   'date': '15 Jan 2025', 'merchant': f'Cafe {e}', 'location': 'Mumbai', 'description': 'Lunch'}
+        expenses += [dict(receipt, id=f'EXP{2 * e:03d}'), dict(receipt, id=f'EXP{2 * e + 1:03d}')]
+
+    queue = WorkQueue(str(tmp_path / 'queue'))
+    queue.create(expenses, partitions=3)
+    run_worker(queue, 'node-a', system=EnterpriseExpenseAuditSystem())
+    partials = queue.load_results()
+    assert len(partials) > 1
+    assert all(isinstance(p['audit_report']['advanced_fraud']['duplicates_detected'], int) for p in partials)
+
+    merged = merge_results(queue)
+    assert merged['audit_report']['advanced_fraud']['duplicates_detected'] == 6
+    assert merged['rule_based_fraud']['is_duplicate'].sum() == 6
+
+def test_report_merge_sums_counts_and_weights_rates():
+    merged = merge_reports([
+        {'summary': {'total_expenses': 10, 'compliance_rate': 50.0}, 'top_violations': [('Weekend', 4)],
+         'recommendations': [{'priority': 'High', 'description': 'Train'}]},
+        {'summary': {'total_expenses': 30, 'compliance_rate': 90.0}, 'top_violations': [('Weekend', 1), ('Limit', 2)],
+         'recommendations': [{'priority': 'High', 'description': 'Train'}]},
+    ], weights=[10, 30])
+    assert merged['summary'] == {'total_expenses': 40, 'compliance_rate': 80.0}
+    assert merged['top_violations'] == [('Weekend', 5), ('Limit', 2)]
+    assert merged['recommendations'] == [{'priority': 'High', 'description': 'Train'}]
+
+if __name__ == "__main__":
+    test_imports_in_a_fresh_interpreter()
+    test_report_merge_sums_counts_and_weights_rates()
+    print("\n✅ ALL BATCH QUEUE TESTS PASSED!")
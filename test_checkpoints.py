@@ -0,0 +1,64 @@
+import sys
+sys.path.append('src')
+
+import os
+import tempfile
+
+import pytest
+
+from utils.checkpoints import CheckpointStore, input_hash
+
+def test_checkpoint_store_reuses_by_input_and_version():
+    print("🧪 Testing stage checkpoints...")
+    with tempfile.TemporaryDirectory() as directory:
+        check_store(directory)
+
+def check_store(directory):
+    store = CheckpointStore(directory)
+    calls = []
+    compute = lambda: calls.append(1) or {'rows': [1, 2, 3]}
+
+    assert store.run('policy', 1, ['a', 'b'], compute) == {'rows': [1, 2, 3]}
+    assert store.run('policy', 1, ['a', 'b'], compute) == {'rows': [1, 2, 3]}
+    assert len(calls) == 1
+    store.run('policy', 2, ['a', 'b'], compute)  # new stage version
+    store.run('policy', 1, ['a', 'c'], compute)  # different input
+    assert len(calls) == 3
+    assert store.stats['hits'] == 1 and store.stats['misses'] == 3
+    assert not [name for name in os.listdir(directory) if name.endswith('.tmp')]
+    assert input_hash({'b': 1, 'a': 2}) == input_hash({'a': 2, 'b': 1})
+    assert store.overhead()['overhead_seconds'] >= 0
+
+def test_restarted_run_skips_finished_stages(tmp_path, monkeypatch):
+    monkeypatch.setenv('CHECKPOINT_DIR', str(tmp_path))
+    from main import EnterpriseExpenseAuditSystem, generate_fraud_test_receipts
+
+    receipts = generate_fraud_test_receipts(8)
+    crashed = EnterpriseExpenseAuditSystem()
+    crashed.config.CHECKPOINT_CHUNK_SIZE = 3
+
+    def crash(*args, **kwargs):
+        raise RuntimeError("node lost")
+    monkeypatch.setattr(crashed.summary_processor, 'generate_summaries', crash)
+    with pytest.raises(RuntimeError):
+        crashed.process_raw_receipts(receipts)
+    # 3 extraction chunks, policy, rule-based and ML fraud finished before the crash
+    assert crashed.checkpoints.stats['misses'] == 6
+
+    resumed = EnterpriseExpenseAuditSystem()
+    resumed.config.CHECKPOINT_CHUNK_SIZE = 3
+    results = resumed.process_raw_receipts(receipts)
+    assert resumed.checkpoints.stats['hits'] == 6
+    assert [e['id'] for e in results['field_extraction']] == [f'EXP{i:06d}' for i in range(len(receipts))]
+
+    # A third run reuses everything, including the reports
+    again = EnterpriseExpenseAuditSystem()
+    again.config.CHECKPOINT_CHUNK_SIZE = 3
+    rerun = again.process_raw_receipts(receipts)
+    assert again.checkpoints.stats['misses'] == 0
+    assert rerun['policy_validation'].equals(results['policy_validation'])
+    assert rerun['audit_report'] == results['audit_report']
+
+if __name__ == "__main__":
+    test_checkpoint_store_reuses_by_input_and_version()
+    print("\n✅ ALL CHECKPOINT TESTS PASSED!")
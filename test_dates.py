@@ -0,0 +1,61 @@
+import sys
+sys.path.append('src')
+
+from datetime import date, datetime
+
+import numpy as np
+
+from utils import dates
+from utils.dates import parse_date, parse_date_column, detect_format, is_weekend
+from fraud_detection import DuplicateDetector, BehaviorAnalyzer
+
+def test_scalar_parse_and_cache():
+    print("🧪 Testing shared date parser...")
+    assert parse_date('18 Jan 2025') == date(2025, 1, 18)
+    assert parse_date('18-Jan-2025') == date(2025, 1, 18)
+    assert parse_date('18/01/2025') == date(2025, 1, 18)
+    assert parse_date('2025-01-18') == date(2025, 1, 18)
+    assert parse_date('18 January 2025') == date(2025, 1, 18)
+    assert parse_date(datetime(2025, 1, 18, 9, 30)) == date(2025, 1, 18)
+    assert parse_date('not a date') is None and parse_date(None) is None and parse_date('') is None
+
+    hits = dates.cache_stats()['hits']
+    parse_date('18 Jan 2025')
+    assert dates.cache_stats()['hits'] == hits + 1
+    assert dates.cache_stats()['maxsize'] == dates.DATE_CACHE_SIZE
+    print(f"   ✅ Cache: {dates.cache_stats()}")
+
+def test_column_parse_detects_format_once():
+    values = ['18 Jan 2025', '19 Jan 2025', None, '18 Jan 2025', '2025-01-20', date(2025, 1, 21), 'garbage']
+    assert detect_format(values) is None  # mixed formats
+    assert detect_format(['18 Jan 2025', '19 Jan 2025']) == '%d %b %Y'
+
+    parsed = parse_date_column(values)
+    assert parsed.dtype == np.dtype('datetime64[D]')
+    assert [str(d) for d in parsed] == [
+        '2025-01-18', '2025-01-19', 'NaT', '2025-01-18', '2025-01-20', '2025-01-21', 'NaT'
+    ]
+
+def test_time_of_day_is_kept():
+    from agents.fraud_detection_agent import FraudDetectionAgent
+    from config import Config
+    assert dates.parse_hour_of_day('2024-01-06 22:45') == 22
+    assert dates.parse_hour_of_day('06 Jan 2024') is None
+    features = FraudDetectionAgent(None, Config()).extract_features([
+        {'amount': 10.0, 'date': '2024-01-06 22:45'}, {'amount': 10.0, 'date': '06 Jan 2024'}
+    ])
+    assert features['hour'].tolist() == [22, 0] and features['weekday'].tolist() == [5, 5]
+
+def test_detectors_share_parser():
+    assert is_weekend('18 Jan 2025') and not is_weekend('20 Jan 2025')
+    assert BehaviorAnalyzer()._is_weekend('18 January 2025')
+    detector = DuplicateDetector()
+    assert detector._dates_within_range('18 Jan 2025', '2025-01-19')
+    assert not detector._dates_within_range('18 Jan 2025', 'garbage')
+
+if __name__ == "__main__":
+    test_scalar_parse_and_cache()
+    test_column_parse_detects_format_once()
+    test_time_of_day_is_kept()
+    test_detectors_share_parser()
+    print("\n✅ ALL DATE PARSER TESTS PASSED!")
@@ -0,0 +1,63 @@
+import sys
+sys.path.append('src')
+
+import random
+
+from memory.expense_index import ExpenseIndex, expense_similarity
+from memory.memory_manager import MemoryManager
+
+def random_expenses(n, seed=7):
+    rng = random.Random(seed)
+    return [{
+        'id': f'EXP{i}',
+        'employee_id': rng.choice(['E1', 'E2', 'E3']),
+        'category': rng.choice(['Meals', 'Travel']),
+        'merchant': rng.choice(['Uber', 'Zomato', 'Starbucks']),
+        'amount': rng.choice([0, 100.0, 120.0, 180.0, 450.0, 900.0])
+    } for i in range(n)]
+
+def brute_force(expense, records, threshold):
+    return [(i, r, expense_similarity(expense, r)) for i, r in enumerate(records)
+            if expense_similarity(expense, r) > threshold]
+
+def test_radius_query_matches_scan():
+    print("🧪 Testing expense similarity index...")
+    records = random_expenses(300)
+    index = ExpenseIndex()
+    for record in records:
+        index.add(record)
+    for query in random_expenses(40, seed=8):
+        for threshold in (0.5, 0.7, 0.8, 0.9, 0.95):
+            assert index.query_radius(query, threshold) == brute_force(query, records, threshold)
+    print("   ✅ Radius queries match a full scan")
+
+def test_kneighbors_and_removal():
+    records = random_expenses(200)
+    index = ExpenseIndex()
+    ids = [index.add(record) for record in records]
+    for record_id in ids[:150]:
+        index.remove(record_id)
+    assert len(index) == 50
+
+    for query in random_expenses(20, seed=9):
+        expected = sorted(((s, -i) for i, _, s in brute_force(query, records, 0.5) if i >= 150), reverse=True)[:5]
+        assert [(i, s) for i, _, s in index.kneighbors(query, 5)] == [(-i, s) for s, i in expected]
+
+def test_memory_manager_uses_index():
+    memory = MemoryManager(memory_size=50)
+    for expense in random_expenses(120):
+        memory.add_expense(expense)
+    assert len(memory.similarity_index) == len(memory.expense_memory) == 50
+
+    query = {'employee_id': 'E1', 'category': 'Meals', 'merchant': 'Uber', 'amount': 100.0}
+    window = [record['data'] for record in memory.expense_memory]
+    expected = [(r, s) for _, r, s in brute_force(query, window, 0.9)]
+    assert memory.find_similar_expenses(query, threshold=0.9) == expected
+    assert memory.find_similar_expenses(query, threshold=0.1) == [(r, s) for _, r, s in brute_force(query, window, 0.1)]
+    assert memory.nearest_expenses(query, k=3)[0][1] == max(s for _, s in expected)
+
+if __name__ == "__main__":
+    test_radius_query_matches_scan()
+    test_kneighbors_and_removal()
+    test_memory_manager_uses_index()
+    print("\n✅ ALL EXPENSE INDEX TESTS PASSED!")
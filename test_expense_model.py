@@ -0,0 +1,83 @@
+import sys
+sys.path.append('src')
+
+from datetime import date
+
+import numpy as np
+
+from models import Expense, ExpenseBatch, parse_amount
+from fraud_detection import DuplicateDetector, BehaviorAnalyzer
+
+def pipeline_expense(**overrides):
+    expense = {
+        'id': 'EXP001', 'employee_id': 'E001', 'amount': 450.0, 'category': 'Travel',
+        'date': '18 Jan 2025', 'merchant': 'Uber ', 'location': 'Mumbai',
+        'description': 'Ride to client office', 'hour': 23
+    }
+    expense.update(overrides)
+    return expense
+
+def test_expense_parses_once():
+    print("🧪 Testing canonical Expense record...")
+    record = Expense.from_dict(pipeline_expense())
+    detector_record = Expense.from_dict({
+        'vendor': 'Uber', 'amount_raw': '₹1,450.00', 'date_raw': '2025-01-18',
+        'category_raw': 'Travel', 'raw_text': 'UBER  Ride', 'employee_id': 'E001'
+    })
+
+    assert record.amount == 450.0 and record.date == date(2025, 1, 18)
+    assert record.normalized_vendor == 'uber'
+    assert record.text_hash == DuplicateDetector().calculate_text_hash('Ride to client office')
+    assert detector_record.amount == 1450.0 and detector_record.date == date(2025, 1, 18)
+    assert record.category is detector_record.category  # interned
+    assert record.get('merchant') == 'Uber ' and record.get('amount_raw') == 450.0
+    assert record.to_dict()['date'] == '18 Jan 2025'
+    assert not hasattr(record, '__dict__')
+    assert parse_amount('Rs. 99.50') == 99.5
+    assert Expense.from_dict(pipeline_expense(hour=float('nan'))).hour is None  # DataFrame rows
+    assert Expense.from_dict(pipeline_expense(hour=np.int64(7))).hour == 7
+    print("   ✅ Expense fields parsed at ingest")
+
+def test_expense_batch_columns():
+    batch = ExpenseBatch.from_records([
+        pipeline_expense(),
+        pipeline_expense(id='EXP002', amount=20.5, date='20 Jan 2025', hour=None),
+        pipeline_expense(id='EXP003', date='not a date')
+    ])
+
+    assert len(batch) == 3
+    assert batch.amounts.dtype == np.float64 and batch.amounts.tolist() == [450.0, 20.5, 450.0]
+    assert batch.weekdays.tolist() == [5, 0, -1]
+    assert batch.is_weekend.tolist() == [True, False, False]
+    assert batch.hours.tolist() == [23, -1, 23]
+    assert batch[1].id == 'EXP002'
+    assert list(batch.to_frame()['id']) == ['EXP001', 'EXP002', 'EXP003']
+
+def test_detectors_accept_records():
+    """Records go straight into the rule-based detectors without a dict copy"""
+    current = Expense.from_dict(pipeline_expense(description='Trip A'))
+    history = [Expense.from_dict(pipeline_expense(id='H1', description='Trip B', merchant='UBER'))]
+
+    duplicate = DuplicateDetector().detect_duplicates(current, history)
+    assert duplicate['is_duplicate']
+    assert "Same vendor, amount, and date combination" in duplicate['reasons']
+    assert "Expense on weekend" in BehaviorAnalyzer().analyze_behavior(current, history)['reasons']
+
+def test_identical_descriptions_are_still_duplicates():
+    """Same description, vendor, amount and date is a duplicate, not the record itself"""
+    history = [Expense.from_dict({'id': 'H1', 'employee_id': 'E001', 'merchant': 'Uber', 'amount': 50.0,
+                                  'date': '2024-01-05', 'description': 'Expense at Uber for Travel'})]
+    current = Expense.from_dict(dict(history[0].to_dict(), id='EXP002'))
+
+    duplicate = DuplicateDetector().detect_duplicates(current, history)
+    assert duplicate['is_duplicate'] and duplicate['matching_expenses'] == history
+    assert "Exact duplicate receipt detected" in duplicate['reasons']
+    # Only the very same record is skipped
+    assert not DuplicateDetector().detect_duplicates(history[0], history)['is_duplicate']
+
+if __name__ == "__main__":
+    test_expense_parses_once()
+    test_expense_batch_columns()
+    test_detectors_accept_records()
+    test_identical_descriptions_are_still_duplicates()
+    print("\n✅ ALL EXPENSE MODEL TESTS PASSED!")
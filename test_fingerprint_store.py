@@ -0,0 +1,84 @@
+import sys
+sys.path.append('src')
+
+import os
+import tempfile
+
+from memory.fingerprint_store import BloomFilter, FingerprintStore, receipt_fingerprint
+
+def expense(expense_id, employee_id, merchant, amount, date):
+    return {'id': expense_id, 'employee_id': employee_id, 'merchant': merchant, 'amount': amount, 'date': date}
+
+def test_fingerprints_normalize_receipts():
+    print("🧪 Testing receipt fingerprints...")
+    assert receipt_fingerprint('Uber  India', 450.0, '15 Jan 2025') == receipt_fingerprint('uber india', '450', '2025-01-15')
+    assert receipt_fingerprint('Uber', 450.0, '15 Jan 2025') != receipt_fingerprint('Uber', 450.01, '15 Jan 2025')
+    assert receipt_fingerprint('Uber', 450.0, '15 Jan 2025') != receipt_fingerprint('Uber', 450.0, '16 Jan 2025')
+
+    bloom = BloomFilter(1000, 0.01)
+    digests = [receipt_fingerprint('Vendor', i, '1 Jan 2025') for i in range(1000)]
+    for digest in digests:
+        bloom.add(digest)
+    assert all(digest in bloom for digest in digests)
+    false_positives = sum(receipt_fingerprint('Other', i, '1 Jan 2025') in bloom for i in range(1000))
+    assert false_positives < 50
+
+def test_store_persists_across_runs():
+    print("🧪 Testing persistent fingerprint store...")
+    for bloom_capacity in (None, 100):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'fingerprints.sqlite')
+            store = FingerprintStore(path, bloom_capacity=bloom_capacity)
+            store.add_many([('a' * 32, 'E001', '15 Jan 2025', 'batch-1')])
+            store.add_many([('a' * 32, 'E002', '16 Jan 2025', 'batch-2')])  # first filing wins
+            store.close()
+
+            reopened = FingerprintStore(path, bloom_capacity=bloom_capacity)
+            assert len(reopened) == 1
+            assert reopened.get('a' * 32) == {'employee_id': 'E001', 'date': '15 Jan 2025', 'batch_id': 'batch-1'}
+            assert reopened.get('b' * 32) is None
+            reopened.close()
+
+def test_cross_run_duplicates_and_idempotent_reingest(tmp_path):
+    from main import AdvancedFraudDetector
+
+    detector = AdvancedFraudDetector(FingerprintStore(str(tmp_path / 'fingerprints.sqlite')))
+    monday = [
+        expense('EXP000000', 'E001', 'Uber', 450.0, '15 Jan 2025'),
+        expense('EXP000001', 'E001', 'uber', 450.0, '15 Jan 2025'),  # same batch duplicate
+        expense('EXP000002', 'E002', 'Zomato', 650.0, '15 Jan 2025')
+    ]
+    assert [e['id'] for e in detector.detect_duplicates(monday, 'monday')] == ['EXP000001']
+    # Re-ingesting the same batch flags nothing new
+    assert [e['id'] for e in detector.detect_duplicates(monday, 'monday')] == ['EXP000001']
+
+    tuesday = [
+        expense('EXP000000', 'E003', 'UBER', 450.0, '2025-01-15'),  # filed on Monday by E001
+        expense('EXP000001', 'E003', 'Uber', 300.0, '16 Jan 2025')
+    ]
+    assert [e['id'] for e in detector.detect_duplicates(tuesday, 'tuesday')] == ['EXP000000']
+
+    # A worker that restarts with a Bloom-filter front sees the same history
+    restarted = AdvancedFraudDetector(FingerprintStore(str(tmp_path / 'fingerprints.sqlite'), bloom_capacity=1000))
+    assert len(restarted.fingerprints) == 3
+    assert [e['id'] for e in restarted.detect_duplicates(tuesday)] == ['EXP000000', 'EXP000001']
+    assert [e['id'] for e in restarted.detect_duplicates(tuesday, 'tuesday')] == ['EXP000000']
+
+def test_reingesting_raw_receipts_is_idempotent(tmp_path, monkeypatch):
+    """Extraction randomizes employee, location and hour, so the batch is keyed on the raw receipts"""
+    monkeypatch.setenv('FINGERPRINT_STORE', str(tmp_path / 'fingerprints.sqlite'))
+    from main import EnterpriseExpenseAuditSystem, generate_fraud_test_receipts
+
+    receipts = generate_fraud_test_receipts(8)
+    first = EnterpriseExpenseAuditSystem().process_raw_receipts(receipts)['rule_based_fraud']
+    again = EnterpriseExpenseAuditSystem().process_raw_receipts(receipts)['rule_based_fraud']
+    assert again['is_duplicate'].sum() == first['is_duplicate'].sum() < len(receipts)
+
+    # A different batch containing the same receipts is flagged
+    resubmitted = EnterpriseExpenseAuditSystem().process_raw_receipts(receipts[:3] + ['NEW VENDOR\nTotal: ₹10.00\nDate: 1 Feb 2025'])
+    assert resubmitted['rule_based_fraud']['is_duplicate'].tolist() == [True, True, True, False]
+
+if __name__ == "__main__":
+    test_fingerprints_normalize_receipts()
+    test_store_persists_across_runs()
+    print("\n✅ ALL FINGERPRINT STORE TESTS PASSED!")
@@ -0,0 +1,86 @@
+import sys
+sys.path.append('src')
+
+from fraud_detection import DuplicateDetector
+from fraud_detection.near_duplicate_search import top_k_similar
+from agents.fraud_detection_agent import FraudDetectionAgent
+from config import Config
+
+HISTORY = [
+    {'vendor': 'Uber', 'amount': 450.0, 'date': '18 Jan 2025', 'raw_text': 'UBER trip Airport to Office 18 Jan 2025 Total 450.00'},
+    {'vendor': 'Starbucks', 'amount': 280.0, 'date': '02 Feb 2025', 'raw_text': 'STARBUCKS coffee x2 02 Feb 2025 Total 280.00'},
+    {'vendor': 'Hotel Grand', 'amount': 4200.0, 'date': '10 Mar 2025', 'raw_text': 'HOTEL GRAND one night deluxe room 10 Mar 2025 4200.00'},
+]
+
+def test_top_k_is_chunked_and_bounded():
+    print("🧪 Testing chunked top-k cosine search...")
+    corpus = [f'UBER trip Airport to Office 18 Jan 2025 Total {450 + i}.00' for i in range(30)] + ['unrelated text']
+    queries = ['UBER trip Airport to Office 18 Jan 2025 Total 450.00', 'completely different words']
+    full = top_k_similar(queries, corpus, k=4, threshold=0.5)
+    chunked = top_k_similar(queries, corpus, k=4, threshold=0.5, query_chunk=1, corpus_chunk=7)
+    assert [a.tolist() for a in full[:2]] == [a.tolist() for a in chunked[:2]]
+    rows, cols, scores = chunked
+    assert rows.tolist() == [0, 0, 0, 0]  # at most k per query, nothing for the unrelated one
+    assert cols[0] == 0 and scores[0] > 0.99 and list(scores) == sorted(scores, reverse=True)
+
+    # Pairs with the same key (the same record) are never reported
+    rows, cols, _ = top_k_similar(queries[:1], corpus, k=2, threshold=0.5,
+                                  query_keys=['a'], corpus_keys=['a'] + [''] * 30)
+    assert 0 not in cols.tolist()
+    print("   ✅ Chunked results match, k per query respected")
+
+def test_batch_mode_maps_to_duplicate_results():
+    detector = DuplicateDetector()
+    current = [
+        {'vendor': 'Uber', 'amount': 450.0, 'date': '18 Jan 2025', 'raw_text': 'UBER trip Airport to Office 18 Jan 2025 Total 450.00 '},
+        {'vendor': 'Starbucks', 'amount': 280.01, 'date': '03 Feb 2025', 'raw_text': 'Coffee receipt'},
+        {'vendor': 'Zomato', 'amount': 520.0, 'date': '05 Apr 2025', 'raw_text': 'ZOMATO order biryani'},
+    ]
+    batch = detector.detect_duplicates_batch(current, HISTORY)
+    assert len(batch) == 3
+
+    # Same text (after normalization) is an exact duplicate, as in the pairwise path
+    assert batch[0] == detector.detect_duplicates(current[0], HISTORY)
+    assert batch[1]['is_duplicate'] and batch[1]['reasons'] == ["Same vendor, amount, and date combination"]
+    assert batch[1]['matching_expenses'] == [HISTORY[1]]
+    assert batch[1] == detector.detect_duplicates(current[1], HISTORY)
+    assert not batch[2]['is_duplicate'] and batch[2]['duplicate_count'] == 0
+
+    near = dict(current[2], raw_text='HOTEL GRAND one night deluxe room 10 Mar 2025 4200.0')
+    result = detector.detect_duplicates_batch([near], HISTORY)[0]
+    assert result['is_duplicate'] and result['reasons'][0].startswith('High text similarity')
+    assert detector.detect_duplicates_batch([], HISTORY) == []
+
+def test_batch_mode_reports_identical_pipeline_expenses():
+    """Exact duplicates with the same generic description are only excluded when they are the same record"""
+    detector = DuplicateDetector()
+    first = {'id': 'EXP000001', 'merchant': 'Uber', 'amount': 50.0, 'date': '2024-01-05',
+             'description': 'Expense at Uber for Travel', 'employee_id': 'E001'}
+    second = dict(first, id='EXP000002')
+    result = detector.detect_duplicates_batch([second], [first])[0]
+    assert result['is_duplicate'] and result['reasons'] == ["Exact duplicate receipt detected"]
+
+    # The same records on both sides match each other but never themselves
+    both = detector.detect_duplicates_batch([first, second], [first, second])
+    assert [r['matching_expenses'] for r in both] == [[second], [first]]
+
+def test_agent_switches_to_batch_mode():
+    class Memory:
+        def get_historical_expenses(self):
+            return HISTORY
+
+    class BatchConfig(Config):
+        DUPLICATE_DETECTION_MODE = 'batch'
+
+    expenses = [{'id': 'EXP1', 'employee_id': 'E1', 'amount': 280.0, 'category': 'Meals',
+                 'date': '02 Feb 2025', 'merchant': 'Starbucks', 'description': 'Coffee'}]
+    pairwise = FraudDetectionAgent(Memory(), Config()).detect_rule_based_fraud(expenses)
+    batch = FraudDetectionAgent(Memory(), BatchConfig()).detect_rule_based_fraud(expenses)
+    assert batch['is_duplicate'].tolist() == pairwise['is_duplicate'].tolist() == [True]
+    assert batch['fraud_score'].tolist() == pairwise['fraud_score'].tolist()
+
+if __name__ == "__main__":
+    test_top_k_is_chunked_and_bounded()
+    test_batch_mode_maps_to_duplicate_results()
+    test_agent_switches_to_batch_mode()
+    print("\n✅ ALL NEAR-DUPLICATE TESTS PASSED!")
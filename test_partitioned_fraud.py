@@ -0,0 +1,56 @@
+import sys
+sys.path.append('src')
+
+from agents.fraud_detection_agent import FraudDetectionAgent, partition_by_employee
+from config import Config
+
+HISTORY = [
+    {'vendor': 'Uber', 'amount': 450.0, 'date': '18 Jan 2025', 'raw_text': 'UBER trip 18 Jan 2025 450.00', 'employee_id': 'E1'},
+    {'vendor': 'Zomato', 'amount': 520.0, 'date': '19 Jan 2025', 'raw_text': 'ZOMATO order 19 Jan 2025', 'employee_id': 'E2'},
+    {'vendor': 'RECHARGE STORE', 'amount': 500.0, 'date': '20 Jan 2025', 'raw_text': 'RECHARGE 500', 'employee_id': 'E3'},
+]
+
+class Memory:
+    def get_historical_expenses(self):
+        return HISTORY
+
+class ParallelConfig(Config):
+    RULE_BASED_WORKERS = 2
+    RULE_BASED_PARALLEL_MIN_ROWS = 0
+
+def sample_expenses(n=40):
+    vendors = [('Uber', 'Travel', 450.0), ('Zomato', 'Meals', 520.0), ('RECHARGE STORE', 'Personal', 500.0)]
+    return [{
+        'id': f'EXP{i:03d}',
+        'employee_id': f'E{i % 7}',
+        'amount': vendors[i % 3][2],
+        'category': vendors[i % 3][1],
+        'date': f'{18 + i % 5} Jan 2025',
+        'merchant': vendors[i % 3][0],
+        'description': f'Expense {i}'
+    } for i in range(n)]
+
+def test_partitions_keep_employees_together():
+    print("🧪 Testing employee-partitioned rule-based scoring...")
+    employee_ids = [f'E{i % 7}' for i in range(40)]
+    partitions = partition_by_employee(employee_ids, 4)
+    assert sorted(i for part in partitions for i in part) == list(range(40))
+    for part in partitions:
+        for other in partitions:
+            if other is not part:
+                assert not {employee_ids[i] for i in part} & {employee_ids[i] for i in other}
+    assert partitions == partition_by_employee(employee_ids, 4)  # stable across calls
+
+def test_parallel_matches_serial_in_input_order():
+    expenses = sample_expenses()
+    serial = FraudDetectionAgent(Memory(), Config()).detect_rule_based_fraud(expenses)
+    parallel = FraudDetectionAgent(Memory(), ParallelConfig()).detect_rule_based_fraud(expenses)
+    assert list(parallel['expense_id']) == [e['id'] for e in expenses]
+    assert parallel.drop(columns='fraud_reasons').equals(serial.drop(columns='fraud_reasons'))
+    assert [sorted(r) for r in parallel['fraud_reasons']] == [sorted(r) for r in serial['fraud_reasons']]
+    print(f"   ✅ {len(parallel)} expenses scored in 2 workers, same as serial")
+
+if __name__ == "__main__":
+    test_partitions_keep_employees_together()
+    test_parallel_matches_serial_in_input_order()
+    print("\n✅ ALL PARTITIONED FRAUD TESTS PASSED!")
@@ -0,0 +1,126 @@
+import sys
+import os
+from datetime import datetime
+sys.path.append('src')
+
+from config import Config, ExpenseConfig
+from policy import RuleEngine, ViolationStats
+from agents.policy_agent import PolicyAgent
+from memory.memory_manager import MemoryManager
+
+def sample_expenses():
+    return [
+        {
+            'id': 'EXP001', 'employee_id': 'E001', 'amount': 1500.0, 'category': 'Travel',
+            'date': '15 Jan 2025', 'merchant': 'Uber India', 'location': 'Mumbai',
+            'description': 'Trip to client meeting'
+        },
+        {
+            'id': 'EXP002', 'employee_id': 'E002', 'amount': 80.0, 'category': 'Meals',
+            'date': '18 Jan 2025', 'merchant': 'Lucky Casino Bar', 'location': 'Las Vegas',
+            'description': 'Food'
+        },
+        {
+            'id': 'EXP003', 'employee_id': 'E003', 'amount': 40.0, 'category': 'Supplies',
+            'date': '2999-01-01', 'merchant': '', 'location': 'Office',
+            'description': 'Printer paper for the team'
+        }
+    ]
+
+def test_default_rules_match_policy():
+    """The bundled rule file reproduces the original policy checks"""
+    print("🧪 Testing declarative policy rules...")
+    engine = RuleEngine(Config.POLICY_RULES, ExpenseConfig())
+    violations = engine.evaluate(sample_expenses())
+
+    assert violations[0] == ["Amount $1500.0 exceeds $1000 limit for Travel"]
+    assert "Merchant 'Lucky Casino Bar' is high-risk" in violations[1]
+    assert "Location 'Las Vegas' is flagged as high-risk" in violations[1]
+    assert "Weekend expense - requires additional justification" in violations[1]
+    assert "Insufficient description" in violations[1]
+    assert "Future-dated expense" in violations[2]
+    assert "Missing merchant information" in violations[2]
+    print(f"   ✅ Violations: {violations}")
+
+def test_composite_rules_short_circuit():
+    """Later terms of an 'all' rule only see rows that passed earlier terms"""
+    spec = {'rules': [{
+        'id': 'big_weekend_meal',
+        'when': {'all': [
+            {'field': 'category', 'op': 'in', 'values': ['Meals']},
+            {'field': 'amount', 'op': 'gt', 'value': 50}
+        ]},
+        'message': 'Large meal: {amount}'
+    }]}
+    engine = RuleEngine(spec, ExpenseConfig())
+    violations = engine.evaluate(sample_expenses())
+
+    assert violations == [[], ['Large meal: 80.0'], []]
+    category_term, amount_term = engine.rules[0].predicate.children
+    assert category_term.evaluated == 3
+    assert amount_term.evaluated == 1
+    print(f"   ✅ Rule stats: {engine.get_rule_stats()}")
+
+def test_stop_rule_skips_later_rules():
+    spec = {'rules': [
+        {'id': 'missing_merchant', 'when': {'field': 'merchant', 'op': 'empty'}, 'stop': True},
+        {'id': 'small', 'when': {'field': 'amount', 'op': 'lt', 'value': 100}}
+    ]}
+    engine = RuleEngine(spec, ExpenseConfig())
+    assert engine.evaluate(sample_expenses()) == [[], ['small'], ['missing_merchant']]
+
+def test_policy_agent_batch_validate():
+    agent = PolicyAgent(MemoryManager(), Config())
+    results = agent.batch_validate(sample_expenses())
+
+    assert list(results['expense_id']) == ['EXP001', 'EXP002', 'EXP003']
+    assert results['requires_review'].all()
+    is_valid, violations = agent.validate_expense(sample_expenses()[0])
+    assert not is_valid and violations[0].startswith("Amount $1500.0 exceeds")
+    print(f"   ✅ Batch validation: {results['violation_count'].tolist()}")
+
+def test_violation_stats_are_bounded(tmp_path):
+    """Counters stay per type/employee and old time buckets are evicted"""
+    spill_file = tmp_path / 'violations.jsonl'
+    stats = ViolationStats(bucket_seconds=60, max_buckets=3, recent_size=2, spill_path=str(spill_file))
+
+    for minute in range(10):
+        expense = {'id': f'EXP{minute}', 'employee_id': f'E{minute % 2}'}
+        stats.record(expense, [('weekend_expense', 'Weekend expense')], timestamp=minute * 60)
+    stats.record({'id': 'EXP10', 'employee_id': 'E0'}, [])
+    stats.flush()
+
+    assert stats.get_summary() == {'weekend_expense': 10}
+    assert stats.get_top_employees() == [('E0', 5), ('E1', 5)]
+    assert len(stats.buckets) == 3
+    assert len(stats.recent) == 2
+    assert stats.get_violation_rate() == 10 / 11
+    assert len(spill_file.read_text().splitlines()) == 10
+
+def test_violation_buckets_evict_oldest_start():
+    """Epoch 0 is a real timestamp, and a late record does not evict newer buckets"""
+    stats = ViolationStats(bucket_seconds=60, max_buckets=2)
+    stats.record({'id': 'EXP0'}, [('weekend_expense', 'Weekend expense')], timestamp=0)
+    assert list(stats.buckets) == [0]
+    stats.record({'id': 'EXP1'}, [('weekend_expense', 'Weekend expense')], timestamp=300)
+    stats.record({'id': 'EXP2'}, [('weekend_expense', 'Weekend expense')], timestamp=120)  # arrives late
+    stats.record({'id': 'EXP3'}, [('weekend_expense', 'Weekend expense')], timestamp=360)
+    assert sorted(stats.buckets) == [300, 360]
+    assert [bucket['bucket_start'] for bucket in stats.get_time_series()] == [
+        datetime.fromtimestamp(300).isoformat(), datetime.fromtimestamp(360).isoformat()]
+
+def test_policy_agent_violation_summary():
+    agent = PolicyAgent(MemoryManager(), Config())
+    agent.batch_validate(sample_expenses())
+    summary = agent.get_violation_summary()
+    assert summary['amount_limit'] == 1
+    assert summary['future_dated'] == 1
+
+if __name__ == "__main__":
+    test_default_rules_match_policy()
+    test_composite_rules_short_circuit()
+    test_stop_rule_skips_later_rules()
+    test_policy_agent_batch_validate()
+    test_violation_buckets_evict_oldest_start()
+    test_policy_agent_violation_summary()
+    print("\n✅ ALL POLICY RULE TESTS PASSED!")
@@ -0,0 +1,85 @@
+import sys
+sys.path.append('src')
+
+from datetime import datetime
+
+import pandas as pd
+
+from reporting import ReportAggregate, AggregateStore
+
+def policy_batch(offset, rows):
+    return pd.DataFrame({
+        'expense_id': [f'EXP{offset + i}' for i in range(rows)],
+        'employee_id': [f'E{(offset + i) % 3}' for i in range(rows)],
+        'category': ['Travel', 'Meals', 'Supplies'][:rows] * (rows // 3) + ['Travel', 'Meals', 'Supplies'][:rows % 3],
+        'amount': [100.0 + offset + i for i in range(rows)],
+        'violation_count': [(offset + i) % 2 for i in range(rows)],
+        'violations': [['Weekend expense'] if (offset + i) % 2 else [] for i in range(rows)]
+    })
+
+def fraud_batch(policy_results):
+    decisions = ['APPROVE', 'NEEDS_REVIEW', 'REJECT']
+    return pd.DataFrame({
+        'fraud_decision': [decisions[i % 3] for i in range(len(policy_results))],
+        'is_duplicate': [i == 0 for i in range(len(policy_results))],
+        'vendor_risk_score': [60 if i % 4 == 0 else 10 for i in range(len(policy_results))],
+        'is_anomaly': [i % 3 == 2 for i in range(len(policy_results))]
+    })
+
+def test_merged_partials_match_full_history():
+    """Combining per-batch partials equals aggregating all rows at once"""
+    print("🧪 Testing mergeable report aggregates...")
+    batches = [policy_batch(0, 7), policy_batch(7, 5), policy_batch(12, 9)]
+    frauds = [fraud_batch(batch) for batch in batches]
+
+    partials = [ReportAggregate.from_results(p, f) for p, f in zip(batches, frauds)]
+    combined = ReportAggregate.combine(partials)
+    full = ReportAggregate.from_results(pd.concat(batches), pd.concat(frauds))
+
+    combined_report, full_report = combined.to_report(), full.to_report()
+    assert combined_report['summary'] == full_report['summary']
+    assert combined_report['category_breakdown'] == full_report['category_breakdown']
+    assert dict(combined.violation_counts) == dict(full.violation_counts)
+    assert combined.fraud_decisions == full.fraud_decisions
+    assert combined.duplicates == full.duplicates == 3
+    assert combined_report['batches'] == 3
+    print(f"   ✅ Period summary: {combined_report['summary']}")
+
+def test_store_period_report(tmp_path):
+    store = AggregateStore(str(tmp_path / 'report_aggregates.jsonl'))
+    january = ReportAggregate.from_results(policy_batch(0, 4), batch_id='jan')
+    january.created_at = '2025-01-15T10:00:00'
+    february = ReportAggregate.from_results(policy_batch(4, 6), batch_id='feb')
+    february.created_at = '2025-02-03T09:00:00'
+    store.append(january)
+    store.append(february)
+
+    report = store.period_report(datetime(2025, 2, 1), datetime(2025, 3, 1))
+    assert report['batches'] == 1
+    assert report['summary']['total_expenses_audited'] == 6
+    assert store.period_report()['summary']['total_expenses_audited'] == 10
+
+    restored = store.load()[0]
+    assert restored.to_dict() == january.to_dict()
+
+def test_periods_follow_expense_dates_and_reruns_count_once(tmp_path):
+    store = AggregateStore(str(tmp_path / 'report_aggregates.jsonl'))
+    batch = policy_batch(0, 6).assign(date=['30 Jan 2025', '31 Jan 2025', '31 Jan 2025', '1 Feb 2025', '2 Feb 2025', None])
+    daily = ReportAggregate.by_expense_date(batch, fraud_batch(batch), batch_id='batch-1')
+    assert [a.expense_date for a in daily] == ['2025-01-30', '2025-01-31', '2025-02-01', '2025-02-02', None]
+    assert ReportAggregate.combine(daily).to_report()['summary'] == ReportAggregate.from_results(batch, fraud_batch(batch)).to_report()['summary']
+
+    store.extend(daily)
+    store.extend(ReportAggregate.by_expense_date(batch, fraud_batch(batch), batch_id='batch-1'))  # re-run
+    assert len(store.load()) == 5
+    assert store.period_report()['summary']['total_expenses_audited'] == 6
+    assert store.period_report()['batches'] == 1
+
+    # Bucketed by the expense date, not by when the batch ran
+    february = store.period_report(datetime(2025, 2, 1), datetime(2025, 3, 1))
+    assert february['summary']['total_expenses_audited'] == 2
+    assert ReportAggregate.combine(daily + daily).expense_count == 6
+
+if __name__ == "__main__":
+    test_merged_partials_match_full_history()
+    print("\n✅ ALL REPORT AGGREGATE TESTS PASSED!")
@@ -0,0 +1,98 @@
+import sys
+sys.path.append('src')
+
+import pandas as pd
+
+from config import Config
+from agents.reporting_agent import ReportingAgent
+
+def sample_results():
+    policy_results = pd.DataFrame({
+        'expense_id': ['EXP001', 'EXP002', 'EXP003', 'EXP004', 'EXP005'],
+        'employee_id': ['E001', 'E002', 'E001', 'E003', 'E002'],
+        'category': ['Travel', 'Meals', 'Travel', 'Gambling', 'Meals'],
+        'amount': [1500.0, 40.0, 300.0, 90.0, 60.0],
+        'is_valid': [False, True, True, False, False],
+        'violations': [['Amount over limit'], [], [], ['High-risk merchant'], ['Weekend expense']],
+        'violation_count': [1, 0, 0, 1, 1]
+    })
+    fraud_results = pd.DataFrame({
+        'is_anomaly': [True, False, False, False, False],
+        'risk_level': ['High', 'Low', 'Low', 'Medium', 'Low']
+    })
+    return policy_results, fraud_results
+
+def test_category_breakdown_matches_per_category_scan():
+    """One groupby pass gives the same numbers as filtering per category"""
+    print("🧪 Testing grouped compliance report...")
+    policy_results, fraud_results = sample_results()
+    agent = ReportingAgent(None, Config())
+    report = agent.generate_compliance_report(policy_results, fraud_results)
+    breakdown = report['category_breakdown']
+
+    assert list(breakdown) == ['Travel', 'Meals']  # configured order, unknown categories dropped
+    for category, stats in breakdown.items():
+        rows = policy_results[policy_results['category'] == category]
+        assert stats['count'] == len(rows)
+        assert stats['compliant'] == rows['is_valid'].sum()
+        assert stats['compliance_rate'] == rows['is_valid'].sum() / len(rows) * 100
+        assert stats['total_amount'] == rows['amount'].sum()
+
+    assert report['compliance_summary']['compliant_expenses'] == 2
+    assert report['compliance_summary']['non_compliant_expenses'] == 3
+    print(f"   ✅ Breakdown: {breakdown}")
+
+def test_chart_data_is_pre_aggregated():
+    policy_results, fraud_results = sample_results()
+    agent = ReportingAgent(None, Config())
+    report = agent.generate_compliance_report(policy_results, fraud_results)
+    chart_data = agent.prepare_chart_data(policy_results, fraud_results, report)
+
+    assert chart_data['categories'][0] == {'category': 'Travel', 'compliant': 1, 'non_compliant': 1}
+    assert chart_data['violation_types']['Weekend expense'] == 1
+    assert sum(chart_data['amount_histogram']['counts']) == len(policy_results)
+    assert chart_data['risk_levels'] == {'Low': 3, 'High': 1, 'Medium': 1}
+
+def test_visualizations_render_in_background(tmp_path):
+    """Rendering returns a future immediately and honours format and dpi"""
+    policy_results, fraud_results = sample_results()
+    agent = ReportingAgent(None, Config())
+    report = agent.generate_compliance_report(policy_results, fraud_results)
+    try:
+        future = agent.generate_visualizations(policy_results, fraud_results, str(tmp_path),
+                                               compliance_report=report, fmt='svg', dpi=72)
+        output_path = future.result(timeout=60)
+    finally:
+        agent.shutdown()
+
+    assert output_path.endswith('audit_visualizations.svg')
+    assert (tmp_path / 'audit_visualizations.svg').read_text().lstrip().startswith('<?xml')
+
+def test_pipeline_renders_charts_when_enabled(tmp_path, monkeypatch):
+    """With VISUALIZATIONS_ENABLED the pipeline renders through this agent, and close() waits for it"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('VISUALIZATIONS_ENABLED', '1')
+    from main import EnterpriseExpenseAuditSystem, generate_fraud_test_receipts
+    from src.agents.reporting_agent import ReportingAgent as PipelineReportingAgent  # main.py's import path
+
+    with EnterpriseExpenseAuditSystem() as system:
+        agent = system.agents['visualization']
+        assert isinstance(agent, PipelineReportingAgent)
+        system.process_raw_receipts(generate_fraud_test_receipts(8))
+        workers = list(agent._render_pool._processes.values())
+
+    assert (tmp_path / 'reports' / 'audit_visualizations.png').stat().st_size > 0
+    assert agent._render_pool is None
+    assert workers and not any(worker.is_alive() for worker in workers)
+
+def test_visualizations_are_off_by_default(monkeypatch):
+    monkeypatch.delenv('VISUALIZATIONS_ENABLED', raising=False)
+    from main import EnterpriseExpenseAuditSystem
+
+    with EnterpriseExpenseAuditSystem() as system:
+        assert 'visualization' not in system.agents
+
+if __name__ == "__main__":
+    test_category_breakdown_matches_per_category_scan()
+    test_chart_data_is_pre_aggregated()
+    print("\n✅ ALL REPORTING TESTS PASSED!")
@@ -0,0 +1,52 @@
+import sys
+sys.path.append('src')
+sys.path.append('benchmarks')
+
+import contextlib
+import io
+
+from synthetic_data import SyntheticExpenseGenerator
+from scaling_benchmark import run_benchmark, compare_to_baseline
+
+def test_generator_is_seeded_and_controllable():
+    print("🧪 Testing synthetic expense generator...")
+    generator = SyntheticExpenseGenerator(employees=10, duplicate_rate=0.2, history_size=30)
+    expenses = generator.expenses(2000)
+
+    assert expenses == SyntheticExpenseGenerator(employees=10, duplicate_rate=0.2).expenses(2000)
+    assert {e['employee_id'] for e in expenses} <= set(generator.employees)
+    assert len({e['id'] for e in expenses}) == 2000
+    unique_receipts = {(e['employee_id'], e['merchant'], e['amount'], e['date']) for e in expenses}
+    duplicate_share = 1 - len(unique_receipts) / len(expenses)
+    assert 0.15 < duplicate_share < 0.25
+    assert len(generator.history()) == 30
+    assert len(generator.receipts(5)) == 5
+    print(f"   ✅ Duplicate share: {duplicate_share:.2%}")
+
+def test_benchmark_runs_stages_and_skips_over_budget():
+    with contextlib.redirect_stdout(io.StringIO()):
+        run = run_benchmark(sizes=[50, 100000], stages=['policy', 'summary', 'reporting'],
+                            budget_seconds=0.0, history_size=20)
+
+    statuses = {(r['stage'], r['rows']): r['status'] for r in run['results']}
+    assert statuses[('policy', 50)] == 'ok'
+    assert statuses[('reporting', 50)] == 'ok'
+    assert statuses[('summary', 100000)].startswith('skipped')
+    assert statuses[('reporting', 100000)].startswith('skipped')
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        run = run_benchmark(sizes=[50], stages=['reporting'], history_size=20)
+    assert run['results'][0]['status'] == 'skipped (needs policy stage)'
+
+def test_baseline_comparison_flags_slowdowns():
+    baseline = {'results': [{'stage': 'policy', 'rows': 1000, 'rows_per_sec': 1000.0}]}
+    faster = {'results': [{'stage': 'policy', 'rows': 1000, 'rows_per_sec': 900.0}]}
+    slower = {'results': [{'stage': 'policy', 'rows': 1000, 'rows_per_sec': 500.0}]}
+    assert compare_to_baseline(faster, baseline) == []
+    assert compare_to_baseline(slower, baseline) == [('policy', 1000, 1000.0, 500.0)]
+
+if __name__ == "__main__":
+    test_generator_is_seeded_and_controllable()
+    test_benchmark_runs_stages_and_skips_over_budget()
+    test_baseline_comparison_flags_slowdowns()
+    print("\n✅ ALL BENCHMARK SUITE TESTS PASSED!")
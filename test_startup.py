@@ -0,0 +1,23 @@
+import sys
+import os
+sys.path.append('src')
+sys.path.append('benchmarks')
+
+from startup_benchmark import HEAVY_MODULES, measure_imports
+
+def test_extraction_import_is_light():
+    """Extraction-only entry points must not import pandas, sklearn or matplotlib"""
+    print("🧪 Testing lazy imports for extraction-only runs...")
+    total_ms, modules = measure_imports('from src.agents.field_extraction_agent import FieldExtractionAgent', repeats=1)
+    heavy = [m for m in HEAVY_MODULES if m in modules]
+    assert heavy == [], f"Heavy modules imported at startup: {heavy}"
+    print(f"   ✅ Import time: {total_ms:.1f} ms")
+
+def test_agents_package_resolves_lazily():
+    from agents import FieldExtractionAgent, SummaryAgent
+    assert FieldExtractionAgent.__name__ == 'FieldExtractionAgent'
+    assert SummaryAgent.__name__ == 'SummaryAgent'
+
+if __name__ == "__main__":
+    test_extraction_import_is_light()
+    test_agents_package_resolves_lazily()
@@ -0,0 +1,114 @@
+import sys
+sys.path.append('src')
+
+import os
+import tempfile
+
+import numpy as np
+
+from utils.streaming_stats import AmountBaselines, RunningStats
+from memory.memory_manager import MemoryManager
+from fraud_detection import BehaviorAnalyzer
+
+def test_running_stats_match_batch_statistics():
+    print("🧪 Testing Welford running statistics...")
+    values = np.random.default_rng(7).lognormal(5, 1, 5000)
+    stats = RunningStats(ewma_alpha=0.2)
+    for value in values:
+        stats.add(float(value))
+
+    assert stats.count == len(values)
+    assert np.isclose(stats.mean, values.mean())
+    assert np.isclose(stats.variance, values.var(ddof=1))
+    ewma = values[0]
+    for value in values[1:]:
+        ewma = 0.2 * value + 0.8 * ewma
+    assert np.isclose(stats.ewma, ewma)
+    for q in (0.5, 0.9, 0.99):
+        assert abs(stats.sketch.quantile(q) - np.quantile(values, q)) <= 0.02 * np.quantile(values, q)
+    assert abs(stats.percentile(float(np.median(values))) - 50) < 1
+    assert np.isclose(stats.zscore(values.mean() + 2 * values.std(ddof=1)), 2)
+
+    restored = RunningStats.from_dict(stats.to_dict())
+    assert restored.summary() == stats.summary()
+
+def test_memory_keeps_baselines():
+    print("🧪 Testing memory baselines...")
+    memory = MemoryManager()
+    for amount in (100, 120, 80, 110, 90):
+        memory.add_expense({'employee_id': 'E001', 'category': 'Meals', 'amount': amount})
+    memory.add_expense({'employee_id': 'E002', 'category': 'Meals', 'amount': 500})
+
+    profile = memory.get_employee_behavior('E001')
+    assert profile['total_expenses'] == 5 and profile['amount_count'] == 5
+    assert np.isclose(profile['amount_mean'], 100) and np.isclose(profile['amount_std'], np.std([100, 120, 80, 110, 90], ddof=1))
+    assert memory.amount_baselines.category('Meals').count == 6
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'memory.json')
+        memory.save_memory(path)
+        reloaded = MemoryManager()
+        reloaded.load_memory(path)
+    assert reloaded.get_employee_behavior('E001')['amount_std'] == profile['amount_std']
+
+def test_behavior_flags_amount_spikes():
+    print("🧪 Testing baseline amount spikes...")
+    history = [{'employee_id': 'E001', 'date': f'{day} Jan 2025', 'amount': amount, 'merchant': f'Vendor {day}'}
+               for day, amount in zip(range(6, 12), (100, 105, 95, 98, 102, 100))]
+    analyzer = BehaviorAnalyzer()
+    spike = analyzer.analyze_behavior({'employee_id': 'E001', 'date': '20 Jan 2025', 'amount': 400, 'merchant': 'X'}, history)
+    assert spike['amount_zscore'] > 3 and spike['amount_percentile'] == 100
+    assert any('standard deviations above' in reason for reason in spike['reasons'])
+
+    usual = analyzer.analyze_behavior({'employee_id': 'E001', 'date': '20 Jan 2025', 'amount': 101, 'merchant': 'X'}, history)
+    assert not any('standard deviations above' in reason for reason in usual['reasons'])
+
+def test_pipeline_memory_replaces_mock_behavior():
+    from main import MemoryManager as PipelineMemory
+    memory = PipelineMemory()
+    assert memory.get_employee_behavior('E001') == {}
+    memory.add_expenses([{'employee_id': 'E001', 'category': 'Travel', 'amount': amount} for amount in (200, 400)])
+    assert memory.get_employee_behavior('E001')['total_amount'] == 600
+    assert len(memory.get_historical_expenses()) == 2
+    assert isinstance(memory.amount_baselines, AmountBaselines)
+
+def test_rerun_batches_fold_into_baselines_once():
+    from main import MemoryManager as PipelineMemory
+    memory = PipelineMemory()
+    batch = [{'employee_id': 'E001', 'category': 'Travel', 'amount': amount} for amount in (200, 400)]
+    memory.add_expenses(batch, 'batch-1')
+    memory.add_expenses(batch, 'batch-1')  # resumed run
+    assert memory.get_employee_behavior('E001')['total_expenses'] == 2
+    assert len(memory.get_historical_expenses()) == 2
+
+def test_anomaly_model_refits_once_baselines_exist():
+    from main import Config, MemoryManager as PipelineMemory
+    from agents.fraud_detection_agent import FraudDetectionAgent
+
+    memory = PipelineMemory()
+    agent = FraudDetectionAgent(memory, Config())
+    batch = [{'id': f'EXP{i}', 'employee_id': f'E{i % 2}', 'category': 'Meals', 'amount': 100.0 + 10 * i,
+              'date': '15 Jan 2025', 'description': 'Lunch'} for i in range(6)]
+    agent.detect_anomalies(batch)
+    assert agent.is_fitted and not agent.fitted_on_baselines
+    cold_mean = agent.scaler.mean_.copy()
+
+    memory.add_expenses(batch, 'batch-1')
+    features = agent.extract_features(batch)
+    # Relative deviation and z-score are separate columns
+    assert np.isclose(features['amount_deviation'][0], (100 - 120) / 120)
+    assert np.isclose(features['amount_zscore'][0], -1)
+    agent.detect_anomalies(batch)
+    assert agent.fitted_on_baselines and not np.allclose(agent.scaler.mean_, cold_mean)
+
+    # Only once: later batches reuse the history-informed fit
+    fitted_mean = agent.scaler.mean_.copy()
+    memory.add_expenses(batch[:3], 'batch-2')
+    agent.detect_anomalies(batch)
+    assert np.array_equal(agent.scaler.mean_, fitted_mean)
+
+if __name__ == "__main__":
+    test_running_stats_match_batch_statistics()
+    test_memory_keeps_baselines()
+    test_behavior_flags_amount_spikes()
+    print("\n✅ ALL STREAMING STATS TESTS PASSED!")
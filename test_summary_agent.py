@@ -0,0 +1,112 @@
+import sys
+import os
+import pandas as pd
+sys.path.append('src')
+
+from agents.summary_agent import SummaryAgent
+from agents.llm_summary_backend import LLMSummaryGenerator, StubModelClient
+
+def sample_cases():
+    expenses = [
+        {'id': 'EXP001', 'employee_id': 'E001', 'merchant': 'Uber', 'amount': 450.0, 'category': 'Travel'},
+        {'id': 'EXP002', 'employee_id': 'E002', 'merchant': 'Mobile Recharge', 'amount': 500.0, 'category': 'Personal'},
+        {'id': 'EXP003', 'employee_id': 'E003', 'merchant': 'Amazon', 'amount': 1200.0, 'category': 'Shopping'},
+        {'id': 'EXP004', 'employee_id': 'E004', 'merchant': 'Cafe', 'amount': 90.0, 'category': 'Meals'}
+    ]
+    p2_outputs = [
+        {'decision': 'NEEDS_REVIEW', 'final_risk_score': 65, 'policy_violations': ['amount_limit'],
+         'reasons': ['High-risk vendor: uber', 'Same amount ₹450.0 repeated 3 times']},
+        {'decision': 'REJECTED', 'final_risk_score': 85, 'policy_violations': ['non_business_expense'],
+         'reasons': ['Personal expense keyword: recharge', 'Exact duplicate receipt detected', 'odd thing']},
+        {'decision': 'APPROVED', 'final_risk_score': 15, 'policy_violations': [], 'reasons': []},
+        {'decision': 'APPROVE', 'final_risk_score': 40, 'policy_violations': [], 'reasons': ['Vendor used 3 times recently']}
+    ]
+    return expenses, p2_outputs
+
+def strip_timestamp(result):
+    return {k: v for k, v in result.items() if k != 'review_timestamp'}
+
+def test_batch_matches_single_generation():
+    """Vectorized batch rendering gives the same output as generate()"""
+    print("🧪 Testing batch summary engine...")
+    agent = SummaryAgent()
+    expenses, p2_outputs = sample_cases()
+
+    single = [strip_timestamp(agent.generate(e, p)) for e, p in zip(expenses, p2_outputs)]
+    batch = [strip_timestamp(r) for r in agent.batch_process(list(zip(expenses, p2_outputs)))]
+    assert batch == single
+    # Decision base, risk band and issue count from the one confidence rule table
+    assert [r['confidence_score'] for r in batch] == [20, 0, 100, 60]
+    print(f"   ✅ Confidence scores: {[r['confidence_score'] for r in batch]}")
+
+def test_summarize_results_joins_by_id():
+    agent = SummaryAgent()
+    expenses, p2_outputs = sample_cases()
+    fraud_results = pd.DataFrame([{
+        'expense_id': e['id'],
+        'fraud_decision': p['decision'],
+        'fraud_score': p['final_risk_score'],
+        'fraud_reasons': p['reasons']
+    } for e, p in zip(expenses, p2_outputs)][::-1][:3])  # shuffled, one expense missing
+
+    summaries = agent.summarize_results(expenses, fraud_results)
+    assert list(summaries['expense_id']) == ['EXP002', 'EXP003', 'EXP004']
+    expected = agent.generate(expenses[1], dict(p2_outputs[1], policy_violations=[]))
+    assert summaries.iloc[0]['confidence_score'] == expected['confidence_score']
+    assert summaries.iloc[0]['explanation_points'] == expected['explanation_points']
+
+def test_reason_cache_normalizes_numbers():
+    """Reasons differing only in numbers share one classification"""
+    agent = SummaryAgent(cache_size=2)
+    reasons = [
+        'Same amount ₹450.0 repeated 3 times',
+        'Same amount ₹499.0 repeated 4 times',
+        'Same amount ₹450.0 repeated 3 times',
+        'Vendor used 5 times recently',
+        'Unclassified signal 42'
+    ]
+    points = [agent._explain_fraud_reason(r) for r in reasons]
+
+    assert points[:3] == ['Repeated amount pattern detected'] * 3
+    assert points[4] == 'Anomaly detected: Unclassified signal 42'
+    stats = agent.get_cache_stats()['fraud']
+    assert stats['misses'] == 3
+    assert stats['template_hits'] == 1
+    assert stats['exact_hits'] == 1
+    assert stats['exact_cache_size'] <= 2 and stats['template_cache_size'] <= 2
+    print(f"   ✅ Fraud reason cache: {stats}")
+
+def test_matcher_prefers_first_key_in_table_order():
+    agent = SummaryAgent()
+    # 'vendor_frequency' is listed before 'high-risk vendor' and overlaps it
+    assert agent._explain_fraud_reason('high-risk vendor_frequency') == 'Unusual vendor usage pattern detected'
+    assert agent._explain_policy_flag('late_submission of amount_limit') == 'Expense exceeds category spending limit'
+
+def test_llm_summaries_are_batched_and_cached(tmp_path):
+    """Repeated cases hit the persistent cache instead of the model"""
+    cache_file = tmp_path / 'llm_cache.jsonl'
+    client = StubModelClient()
+    generator = LLMSummaryGenerator(client, cache_path=str(cache_file), batch_size=2, max_concurrency=2)
+    agent = SummaryAgent(llm_generator=generator)
+    expenses, p2_outputs = sample_cases()
+
+    results = agent.batch_process(list(zip(expenses, p2_outputs)))
+    assert client.calls == 2  # 4 distinct cases, 2 per prompt
+    assert results[0]['summary_text'].startswith('Expense of ₹450.0 from Uber categorized as Travel. Assessed as NEEDS_REVIEW')
+
+    # Same case shape with different numbers reuses the cached narrative
+    again = dict(p2_outputs[0], final_risk_score=62, reasons=['High-risk vendor: uber', 'Same amount ₹999.0 repeated 5 times'])
+    agent.generate(expenses[0], again)
+    assert client.calls == 2
+
+    # A fresh generator reloads the cache from disk
+    reloaded = LLMSummaryGenerator(StubModelClient(), cache_path=str(cache_file))
+    assert len(reloaded.cache) == 4
+    print(f"   ✅ LLM backend stats: {generator.stats()}")
+
+if __name__ == "__main__":
+    test_batch_matches_single_generation()
+    test_summarize_results_joins_by_id()
+    test_reason_cache_normalizes_numbers()
+    test_matcher_prefers_first_key_in_table_order()
+    print("\n✅ ALL SUMMARY TESTS PASSED!")
@@ -0,0 +1,107 @@
+import sys
+sys.path.append('src')
+
+from collections import deque
+
+from fraud_detection import BehaviorAnalyzer
+from fraud_detection.time_windows import TimeWindowCounters
+
+def expense(employee_id, date, amount, merchant='Uber', hour=None):
+    return {'employee_id': employee_id, 'date': date, 'amount': amount, 'merchant': merchant, 'hour': hour}
+
+def test_rolling_windows():
+    print("🧪 Testing rolling time windows...")
+    windows = TimeWindowCounters()
+    # Out of order on purpose: running totals must stay consistent
+    for row in [
+        expense('E001', '20 Jan 2025', 100.0, hour=9),
+        expense('E001', '14 Jan 2025', 50.0),
+        expense('E001', '20 Jan 2025', 30.0, 'Zomato', hour=22),
+        expense('E001', '01 Jan 2025', 500.0),
+        expense('E001', '19 Jan 2025', 20.0, hour=23),
+        expense('E002', '20 Jan 2025', 999.0)
+    ]:
+        windows.add_expense(row)
+
+    # Without an hour the query covers whole calendar days
+    assert windows.spend_windows('E001', '20 Jan 2025') == {
+        1: {'count': 2, 'total': 130.0},
+        7: {'count': 4, 'total': 200.0},
+        30: {'count': 5, 'total': 700.0}
+    }
+    # With an hour the window rolls: 23:00 the day before is within 24 hours of 10:00
+    assert windows.window('E001', '20 Jan 2025', 24, hour=10) == (2, 120.0)
+    assert windows.vendor_count('E001', 'uber', '20 Jan 2025', 24) == 1
+    assert windows.vendor_count('E001', 'uber', '20 Jan 2025', 24, hour=10) == 2
+    assert windows.vendor_count('E001', 'zomato', '20 Jan 2025', 24, hour=21) == 0
+    assert windows.after_hours_count('E001', '20 Jan 2025', 30 * 24) == 2
+    assert windows.window('E003', '20 Jan 2025', 24) == (0, 0.0)
+    assert not windows.add_expense(expense('E001', 'not a date', 10.0))
+    assert len(windows) == 6
+
+    # Late rows between queries rebuild the running totals once, and in-order rows after them still count
+    series = windows.spend['E001']
+    windows.add_expense(expense('E001', '02 Jan 2025', 1.0))
+    windows.add_expense(expense('E001', '03 Jan 2025', 2.0))
+    windows.add_expense(expense('E001', '21 Jan 2025', 4.0))
+    assert series.totals == [0.0, 500.0, 501.0, 503.0, 553.0, 573.0, 673.0, 703.0, 707.0]
+    assert windows.window('E001', '21 Jan 2025', 24 * 7) == (4, 154.0)
+
+def test_behavior_rules_use_windows():
+    print("🧪 Testing windowed behavior rules...")
+    history = [
+        expense('E001', '15 Jan 2025', 120.0, hour=20),
+        expense('E001', '15 Jan 2025', 80.0, hour=21),
+        expense('E001', '15 Jan 2025', 60.0, 'Zomato', hour=8),
+        # Other employees on the same day no longer count towards E001
+        expense('E002', '15 Jan 2025', 45.0, 'Ola'),
+        expense('E002', '15 Jan 2025', 55.0, 'Swiggy')
+    ]
+    analyzer = BehaviorAnalyzer()
+    result = analyzer.analyze_behavior(expense('E001', '15 Jan 2025', 95.0, hour=23), history)
+    assert "3 receipts in one day" in result['reasons']
+    assert "3 receipts from uber within 24 hours" in result['reasons']
+    assert "3 after-hours expenses in 30 days" in result['reasons']
+    assert result['spend_windows'][1] == {'count': 3, 'total': 260.0}
+
+    quiet = analyzer.analyze_behavior(expense('E002', '15 Jan 2025', 95.0, hour=12), history)
+    assert quiet['reasons'] == [] and quiet['behavior_risk_score'] == 0
+
+    # Appending to the same history list only indexes the new rows
+    windows = analyzer.windows_for(history)
+    history.append(expense('E002', '15 Jan 2025', 65.0, 'Amazon'))
+    assert analyzer.windows_for(history) is windows and len(windows) == 6
+    assert "3 receipts in one day" in analyzer.analyze_behavior(expense('E002', '15 Jan 2025', 95.0), history)['reasons']
+
+def test_windows_follow_mutated_history():
+    print("🧪 Testing window cache invalidation...")
+    analyzer = BehaviorAnalyzer()
+
+    # A bounded history drops its oldest row as a new one arrives: same length, new first row
+    history = deque([expense('E001', '15 Jan 2025', 10.0), expense('E001', '15 Jan 2025', 20.0)], maxlen=2)
+    assert analyzer.windows_for(history).window('E001', '15 Jan 2025', 24) == (2, 30.0)
+    history.append(expense('E001', '15 Jan 2025', 40.0))
+    assert analyzer.windows_for(history).window('E001', '15 Jan 2025', 24) == (2, 60.0)
+
+    # The last row replaced in place
+    history = [expense('E001', '15 Jan 2025', 10.0), expense('E001', '15 Jan 2025', 20.0)]
+    analyzer.windows_for(history)
+    history[-1] = expense('E001', '15 Jan 2025', 25.0)
+    assert analyzer.windows_for(history).window('E001', '15 Jan 2025', 24) == (2, 35.0)
+
+    # A container that counts its own mutations
+    class VersionedHistory(list):
+        version = 0
+
+    history = VersionedHistory([expense('E001', '15 Jan 2025', 10.0), expense('E001', '15 Jan 2025', 20.0),
+                                expense('E001', '15 Jan 2025', 30.0)])
+    analyzer.windows_for(history)
+    history[1] = expense('E001', '15 Jan 2025', 5.0)
+    history.version += 1
+    assert analyzer.windows_for(history).window('E001', '15 Jan 2025', 24) == (3, 45.0)
+
+if __name__ == "__main__":
+    test_rolling_windows()
+    test_behavior_rules_use_windows()
+    test_windows_follow_mutated_history()
+    print("\n✅ ALL TIME WINDOW TESTS PASSED!")